@@ -0,0 +1,356 @@
+"""Job runner executed inside a skill's venv interpreter.
+
+The source of this module is passed to the venv interpreter with ``-c``, so it
+must stay self-contained and must not import anything from ``skills_runner``.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+import builtins
+import importlib
+import json
+import math
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+import types
+
+
+def _exit_code(exc: SystemExit) -> int:
+    """Translate a SystemExit into a process-style return code."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _purge_local_modules(cwd: str) -> None:
+    """Drop modules imported from the skill folder so edits are picked up."""
+    prefix = os.path.join(os.path.realpath(cwd), "")
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.realpath(path).startswith(prefix):
+            del sys.modules[name]
+
+
+def _cpu_seconds(usage: Any) -> float:
+    return float(usage.ru_utime + usage.ru_stime)
+
+
+def _apply_rlimits(limits: Dict[str, int], permanent: bool) -> Dict[int, Tuple[int, int]]:
+    """Lower rlimits for one job and return the previous values.
+
+    A pooled worker keeps its hard limits so they can be restored after the
+    job, and its CPU limit counts from the time it has already used.
+    """
+    saved: Dict[int, Tuple[int, int]] = {}
+    for name, value in limits.items():
+        which = getattr(resource, name, None)
+        if which is None:
+            continue
+        soft, hard = resource.getrlimit(which)
+        if which == resource.RLIMIT_CPU and not permanent:
+            value += math.ceil(_cpu_seconds(resource.getrusage(resource.RUSAGE_SELF)))
+        # One second past the CPU soft limit SIGKILL follows a SIGXCPU the script ignored.
+        new_hard = (value + 1 if which == resource.RLIMIT_CPU else value) if permanent else hard
+        if hard != resource.RLIM_INFINITY:
+            value, new_hard = min(value, hard), min(new_hard, hard)
+        try:
+            resource.setrlimit(which, (value, new_hard))
+        except (ValueError, OSError):
+            continue
+        saved[which] = (soft, hard)
+    return saved
+
+
+def _restore_rlimits(saved: Dict[int, Tuple[int, int]]) -> None:
+    for which, limits in saved.items():
+        try:
+            resource.setrlimit(which, limits)
+        except (ValueError, OSError):
+            pass
+
+
+def _usage_since(started: float, own: Any, children: Any) -> Dict[str, Optional[float]]:
+    """CPU time used by this process and its waited-for children since a job started."""
+    own_now = resource.getrusage(resource.RUSAGE_SELF)
+    children_now = resource.getrusage(resource.RUSAGE_CHILDREN)
+    max_rss = max(own_now.ru_maxrss, children_now.ru_maxrss)
+    return {
+        "user_cpu_seconds": round(
+            own_now.ru_utime - own.ru_utime + children_now.ru_utime - children.ru_utime, 4
+        ),
+        "system_cpu_seconds": round(
+            own_now.ru_stime - own.ru_stime + children_now.ru_stime - children.ru_stime, 4
+        ),
+        # Linux reports kilobytes, macOS bytes. A pooled worker reports its lifetime peak.
+        "max_rss_kb": max_rss // 1024 if sys.platform == "darwin" else max_rss,
+        "wall_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def run_job(job: Dict[str, Any], permanent_limits: bool = False) -> Dict[str, Any]:
+    """Run one script in a fresh ``__main__`` namespace with redirected output.
+
+    ``job["rlimits"]`` maps ``resource.RLIMIT_*`` names to values; they are
+    restored after the job unless ``permanent_limits`` is set, as in a
+    forked child that exits afterwards.
+    """
+    script = str(job["script"])
+    cwd = str(job["cwd"])
+
+    saved_cwd = os.getcwd()
+    saved_path = list(sys.path)
+    saved_argv = list(sys.argv)
+    saved_environ = dict(os.environ)
+    saved_main = sys.modules.get("__main__")
+    saved_streams = (sys.stdout, sys.stderr)
+    saved_fds = (os.dup(1), os.dup(2))
+
+    # Flush each line when the runner forwards output live.
+    line_buffered = bool(job.get("line_buffered"))
+    saved_line_buffering = sys.stdout.line_buffering
+
+    stdout_file = open(job["stdout_path"], "wb", buffering=0)
+    stderr_file = open(job["stderr_path"], "wb", buffering=0)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(stdout_file.fileno(), 1)
+    os.dup2(stderr_file.fileno(), 2)
+
+    main_module = types.ModuleType("__main__")
+    main_module.__dict__["__builtins__"] = builtins
+    sys.modules["__main__"] = main_module
+    sys.argv = ["-c"]
+    sys.path[0] = ""
+    if line_buffered:
+        sys.stdout.reconfigure(line_buffering=True)  # type: ignore[union-attr]
+
+    started = time.perf_counter()
+    own_start = resource.getrusage(resource.RUSAGE_SELF)
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    saved_limits = _apply_rlimits(job.get("rlimits") or {}, permanent_limits)
+
+    returncode = 0
+    try:
+        os.chdir(cwd)
+        code = compile(script, "<string>", "exec")
+        exec(code, main_module.__dict__)
+    except SystemExit as exc:
+        returncode = _exit_code(exc)
+    except BaseException as exc:  # noqa: BLE001 - mirror the interpreter's top level
+        traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next if exc.__traceback__ else None)
+        returncode = 1
+    finally:
+        _restore_rlimits(saved_limits)
+        usage = _usage_since(started, own_start, children_start)
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        except (OSError, ValueError):
+            pass
+        sys.stdout, sys.stderr = saved_streams
+        if line_buffered:
+            sys.stdout.reconfigure(line_buffering=saved_line_buffering)  # type: ignore[union-attr]
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0])
+        os.close(saved_fds[1])
+        stdout_file.close()
+        stderr_file.close()
+
+        if saved_main is not None:
+            sys.modules["__main__"] = saved_main
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+        os.environ.clear()
+        os.environ.update(saved_environ)
+        _purge_local_modules(cwd)
+        os.chdir(saved_cwd)
+
+    return {"returncode": returncode, "usage": usage}
+
+
+def serve_pool(channel_in: TextIO, channel_out: TextIO) -> None:
+    """Serve newline-delimited JSON jobs until the input channel closes."""
+    for line in channel_in:
+        if not line.strip():
+            continue
+        result = run_job(json.loads(line))
+        channel_out.write(json.dumps(result) + "\n")
+        channel_out.flush()
+
+
+def _preload(modules: List[str]) -> None:
+    """Import modules once so forked children inherit them already loaded."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as exc:  # noqa: BLE001 - a bad entry must not stop the server
+            print(f"preload of {name!r} failed: {exc}", file=sys.stderr)
+
+
+def _serve_forked_child(conn: socket.socket) -> None:
+    """Child side of a fork: run the connection's job and report back."""
+    with conn, conn.makefile("rw", encoding="utf-8") as stream:
+        line = stream.readline()
+        if not line:
+            return
+        job = json.loads(line)
+        if job.get("cgroup"):
+            # Join the execution's own cgroup before running anything of the script.
+            with open(os.path.join(job["cgroup"], "cgroup.procs"), "w") as procs:
+                procs.write("0")
+        stream.write(json.dumps({"pid": os.getpid()}) + "\n")
+        stream.flush()
+        result = run_job(job, permanent_limits=True)
+        stream.write(json.dumps(result) + "\n")
+        stream.flush()
+
+
+def _exit_status(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _rusage_fields(rusage: Any) -> Dict[str, Optional[float]]:
+    return {
+        "user_cpu_seconds": round(rusage.ru_utime, 4),
+        "system_cpu_seconds": round(rusage.ru_stime, 4),
+        "max_rss_kb": rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss,
+    }
+
+
+def serve_fork(channel_in: TextIO, channel_out: TextIO, socket_path: str, modules: List[str]) -> None:
+    """Preload modules, then fork one child per connection on a Unix socket.
+
+    Children that die without reporting a result (``os._exit``, signals) get
+    their exit status written to the connection by this server instead.
+    """
+    _preload(modules)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_read, False)
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    children: Dict[int, socket.socket] = {}
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(channel_in, selectors.EVENT_READ, "control")
+    selector.register(wakeup_read, selectors.EVENT_READ, "child")
+
+    channel_out.write("ready\n")
+    channel_out.flush()
+
+    while True:
+        for key, _ in selector.select():
+            if key.data == "control":
+                if not channel_in.readline():
+                    listener.close()
+                    os.unlink(socket_path)
+                    return
+            elif key.data == "accept":
+                conn, _ = listener.accept()
+                pid = os.fork()
+                if pid == 0:
+                    signal.set_wakeup_fd(-1)
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    selector.close()
+                    listener.close()
+                    for other in children.values():
+                        other.close()
+                    os.close(wakeup_read)
+                    os.close(wakeup_write)
+                    code = 0
+                    try:
+                        _serve_forked_child(conn)
+                    except BaseException:  # noqa: BLE001 - never return into the server loop
+                        code = 70
+                    finally:
+                        os._exit(code)
+                children[pid] = conn
+            else:
+                try:
+                    while os.read(wakeup_read, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+
+        while children:
+            try:
+                pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid not in children:
+                continue
+            conn = children.pop(pid)
+            try:
+                message = {"exit_status": _exit_status(status), "usage": _rusage_fields(rusage)}
+                conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+            except OSError:
+                pass
+            conn.close()
+
+
+def exec_limited(spec: Dict[str, Any], script: str) -> None:
+    """Join the script's cgroup and lower rlimits, then become ``python -c script``.
+
+    Cold starts apply their limits here rather than in a ``preexec_fn``,
+    which may deadlock a child forked from the threaded server.
+    """
+    procs_path = spec.get("procs_path")
+    if procs_path:
+        with open(procs_path, "w") as procs:
+            procs.write("0")
+    _apply_rlimits(spec.get("rlimits") or {}, permanent=True)
+    executable = spec.get("executable") or sys.executable
+    os.execv(executable, [executable, "-c", script])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    mode = args[0] if args else "pool"
+    if mode == "exec":
+        # The script keeps this process's stdio, so nothing is redirected.
+        exec_limited(json.loads(args[1]), args[2])
+        return
+
+    # Keep private copies of the protocol pipes and detach them from fds 0/1 so
+    # scripts cannot read jobs or corrupt results by writing to stdout.
+    channel_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    channel_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    if mode == "pool":
+        serve_pool(channel_in, channel_out)
+        return
+    if mode == "fork":
+        modules = [name for name in args[2].split(",") if name] if len(args) > 2 else []
+        serve_fork(channel_in, channel_out, args[1], modules)
+        return
+
+    raise SystemExit(f"Unknown worker mode: {mode}")
+
+
+if __name__ == "__main__":
+    main()
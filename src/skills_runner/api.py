@@ -1,37 +1,65 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
 import json
+import logging
 import os
-import queue
-import threading
 import time
 import uuid
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
 from pydantic import BaseModel
 import uvicorn
 
+from .artifacts import ArtifactStore
+from .cancellation import CancelToken
 from .config import Configuration
 from .conversation import Conversation
+from .exceptions import OperationCancelledError, ProvisioningBusyError
+from .http_session import close_shared_async_client
 from .llm_client import LLMClient
-from .skills_tool import confirm_create_skill
+from .provisioning_jobs import get_provisioning_jobs
+from .runtime import apply_configuration
+from .scheduler import get_scheduler
+from .session_store import Session, get_session_store
+from .skills_tool import start_create_skill
+from .summarizer import HistorySummarizer
+from .tokens import context_budget_for
 from .tools import SKILLS_TOOLS
 
+_logger = logging.getLogger(__name__)
+
+# Status logged for a turn abandoned because its client went away (as nginx does).
+_CLIENT_CLOSED_REQUEST = 499
+
 
 class ChatCompletionRequest(BaseModel):
     model: Optional[str] = None
     messages: List[Dict[str, Any]]
     stream: bool = False
+    # Session mode: the server keeps the history, so follow-up requests send
+    # only ``session_id`` and the new messages.
+    session: bool = False
+    session_id: Optional[str] = None
 
     class Config:
         extra = "allow"
 
 
-app = FastAPI(title="Skills Runner API", version="0.1.0")
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_shared_async_client()
+
+
+app = FastAPI(title="Skills Runner API", version="0.1.0", lifespan=_lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -40,6 +68,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@lru_cache(maxsize=1)
+def _get_config() -> Configuration:
+    """Load configuration once per process and apply its process-wide settings."""
+    config = Configuration.from_env()
+    apply_configuration(config)
+    return config
+
+
+@lru_cache(maxsize=32)
+def _get_client(model: str) -> LLMClient:
+    """Return the shared client for a model; all clients reuse one keep-alive session."""
+    config = _get_config()
+    return LLMClient(
+        api_key=config.api_key,
+        api_base_url=config.api_base_url,
+        model_name=model,
+        timeout_seconds=config.timeout_seconds,
+    )
+
+
+def _artifact_store(session_id: Optional[str] = None) -> ArtifactStore:
+    """Artifacts of a stored session persist with it; a stateless request's expire with the request.
+
+    Without ARTIFACTS_FOLDER, session artifacts live next to the session database.
+    """
+    config = _get_config()
+    if not session_id:
+        return ArtifactStore(None, config.tool_output_spill_bytes, expires_with_turn=True)
+    folder = config.artifacts_folder or config.session_db_path.with_name(f"{config.session_db_path.stem}-artifacts")
+    return ArtifactStore(folder / session_id, config.tool_output_spill_bytes)
+
+
+def _build_conversation(model: str, session_id: Optional[str] = None) -> Conversation:
+    config = _get_config()
+    return Conversation(
+        client=_get_client(model),
+        tools=SKILLS_TOOLS,
+        skills_folder=config.skills_folder,
+        routing_top_k=config.skill_routing_top_k,
+        context_budget=context_budget_for(model, config.context_tokens, config.context_tokens_by_model),
+        compaction_target=config.context_compaction_target,
+        summarizer=HistorySummarizer(_get_client(config.summary_model)) if config.summary_model else None,
+        artifacts=_artifact_store(session_id),
+        session_id=session_id,
+    )
+
+
+async def _open_session(request: ChatCompletionRequest, model: str) -> Session:
+    store = get_session_store()
+    if request.session_id:
+        session_id = request.session_id
+        session = await asyncio.to_thread(
+            store.get, session_id, lambda session_model: _build_conversation(session_model, session_id)
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session: {request.session_id}")
+        return session
+
+    session_id = uuid.uuid4().hex
+    conversation = _build_conversation(model, session_id)
+    # The latest message is added with the turn, so a routing note placed before it is stored in order.
+    conversation.load_messages(request.messages[:-1])
+    return await asyncio.to_thread(store.create, model, conversation, session_id)
+
+
+async def _save_session(session: Session) -> None:
+    """Persist the messages the last turn added and release the session."""
+    conversation = session.conversation
+    store = get_session_store()
+    try:
+        journal, conversation.journal = conversation.journal or [], None
+        await asyncio.to_thread(store.append, session, journal)
+    finally:
+        session.lock.release()
+        store.release(session)
+
+
 def _build_response(content: str, model: str, request_id: str) -> Dict[str, Any]:
     return {
         "id": request_id,
@@ -56,132 +161,240 @@ def _build_response(content: str, model: str, request_id: str) -> Dict[str, Any]
     }
 
 
-def _chunk_text(text: str, size: int = 24) -> List[str]:
-    return [text[i : i + size] for i in range(0, len(text), size)]
+async def _watch_disconnect(http_request: Request, cancel: CancelToken) -> None:
+    """Cancel the turn's token as soon as the client disconnects."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            cancel.cancel("client disconnected")
+            return
 
 
-def _stream_response(conversation: Conversation, model: str, request_id: str) -> StreamingResponse:
+async def _complete(conversation: Conversation, http_request: Request) -> Optional[str]:
+    """Run a non-streaming turn; ``None`` means the client left and the turn was cancelled."""
+    cancel = CancelToken()
+    watcher = asyncio.ensure_future(_watch_disconnect(http_request, cancel))
+    try:
+        return await conversation.arun(cancel=cancel)
+    except OperationCancelledError:
+        _logger.info("Cancelled a chat completion after the client disconnected")
+        return None
+    finally:
+        watcher.cancel()
+
+
+class _TurnStreamingResponse(StreamingResponse):
+    """A turn's event stream whose cleanup runs however the response ends.
+
+    The stream may be left suspended when the server cancels the response,
+    or never started when the client is gone before the first chunk; both
+    would otherwise skip releasing the session.
+    """
+    def __init__(self, content: AsyncIterator[str], on_close: Callable[[], Awaitable[None]], **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self._content = content
+        self._on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self._content, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            await self._on_close()
+
+
+def _stream_response(
+    conversation: Conversation,
+    model: str,
+    request_id: str,
+    http_request: Request,
+    finalize: Optional[Callable[[], Awaitable[None]]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> StreamingResponse:
     created = int(time.time())
-
-    def event_stream() -> Any:
-        event_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
-        done_signal = object()
-
-        def tool_event_handler(
-            phase: str, tool_call: Dict[str, Any], result: Optional[Dict[str, Any]]
-        ) -> None:
-            event_queue.put(
-                {
-                    "type": "tool",
-                    "phase": phase,
-                    "tool_call": tool_call,
-                    "result": result,
-                }
-            )
-
-        def run_conversation() -> None:
-            try:
-                content = conversation.run(tool_event_handler=tool_event_handler)
-                event_queue.put({"type": "final", "content": content})
-            except Exception as exc:
-                event_queue.put({"type": "error", "message": str(exc)})
-            finally:
-                event_queue.put({"type": "done", "signal": done_signal})
-
-        threading.Thread(target=run_conversation, daemon=True).start()
-
-        first_chunk = {
+    cancel = CancelToken()
+    finished = False
+
+    async def finish() -> None:
+        # Called by the stream, or by the response when the stream never ran; acts once.
+        nonlocal finished
+        if finished:
+            return
+        finished = True
+        if finalize is not None:
+            await finalize()
+
+    def chunk_payload(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        payload = {
             "id": request_id,
             "object": "chat.completion.chunk",
             "created": created,
             "model": model,
-            "choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
         }
-        yield f"data: {json.dumps(first_chunk)}\n\n"
-
-        while True:
-            event = event_queue.get()
-            if event.get("type") == "tool":
-                payload = {
-                    "type": "tool",
-                    "phase": event.get("phase"),
-                    "tool_call": event.get("tool_call"),
-                    "result": event.get("result"),
-                }
-                yield f"data: {json.dumps(payload)}\n\n"
-                continue
-
-            if event.get("type") == "error":
-                payload = {
-                    "type": "error",
-                    "message": event.get("message"),
-                }
-                yield f"data: {json.dumps(payload)}\n\n"
-                continue
-
-            if event.get("type") == "final":
-                content = event.get("content", "")
-                for chunk in _chunk_text(content):
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            watcher = asyncio.ensure_future(_watch_disconnect(http_request, cancel))
+            yield chunk_payload({"role": "assistant"})
+            async for event in conversation.astream(cancel):
+                if event["type"] == "content":
+                    yield chunk_payload({"content": event["delta"]})
+                elif event["type"] == "tool":
                     payload = {
-                        "id": request_id,
-                        "object": "chat.completion.chunk",
-                        "created": created,
-                        "model": model,
-                        "choices": [
-                            {"index": 0, "delta": {"content": chunk}, "finish_reason": None}
-                        ],
+                        "type": "tool",
+                        "phase": event["phase"],
+                        "tool_call": event["tool_call"],
+                        "result": event["result"],
                     }
                     yield f"data: {json.dumps(payload)}\n\n"
+        except OperationCancelledError:
+            _logger.info("Cancelled streaming %s after the client disconnected", request_id)
+            return
+        except Exception as exc:
+            payload = {
+                "type": "error",
+                "message": str(exc),
+            }
+            yield f"data: {json.dumps(payload)}\n\n"
+        except BaseException:
+            # The server cancelled or closed the response: stop scripts and LLM calls too.
+            cancel.cancel("response closed")
+            raise
+        finally:
+            watcher.cancel()
+            await finish()
 
-            if event.get("type") == "done":
-                done_payload = {
-                    "id": request_id,
-                    "object": "chat.completion.chunk",
-                    "created": created,
-                    "model": model,
-                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
-                }
-                yield f"data: {json.dumps(done_payload)}\n\n"
-                yield "data: [DONE]\n\n"
-                break
+        yield chunk_payload({}, "stop")
+        yield "data: [DONE]\n\n"
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return _TurnStreamingResponse(event_stream(), finish, media_type="text/event-stream", headers=headers)
 
 
 @app.post("/v1/chat/completions")
-def chat_completions(request: ChatCompletionRequest) -> Any:
-    config = Configuration.from_env()
+async def chat_completions(request: ChatCompletionRequest, http_request: Request) -> Any:
+    config = _get_config()
     model = request.model or config.model_name
-    client = LLMClient(
-        api_key=config.api_key,
-        api_base_url=config.api_base_url,
-        model_name=model,
-        timeout_seconds=config.timeout_seconds,
-    )
+    request_id = f"chatcmpl-{uuid.uuid4().hex}"
 
-    conversation = Conversation(client=client, tools=SKILLS_TOOLS, skills_folder=config.skills_folder)
-    conversation.load_messages(request.messages)
+    scheduler = get_scheduler()
+    if scheduler.saturated():
+        # Shed new turns while scripts already queue; they would only wait and time out.
+        raise HTTPException(
+            status_code=503,
+            detail="Script execution queue is full; retry later",
+            headers={"Retry-After": str(scheduler.retry_after())},
+        )
 
-    request_id = f"chatcmpl-{uuid.uuid4().hex}"
+    if request.session or request.session_id:
+        return await _session_completion(request, http_request, model, request_id)
+
+    conversation = _build_conversation(model)
+    conversation.load_messages(request.messages)
 
     if request.stream:
-        return _stream_response(conversation, model, request_id)
+        return _stream_response(conversation, model, request_id, http_request)
 
-    content = conversation.run()
+    content = await _complete(conversation, http_request)
+    if content is None:
+        return Response(status_code=_CLIENT_CLOSED_REQUEST)
 
     payload = _build_response(content, model, request_id)
     return JSONResponse(payload)
 
 
+async def _session_completion(
+    request: ChatCompletionRequest, http_request: Request, model: str, request_id: str
+) -> Any:
+    new_session = not request.session_id
+    session = await _open_session(request, model)
+    # One turn at a time per session; the lock is released by _save_session.
+    try:
+        await session.lock.acquire()
+    except BaseException:
+        get_session_store().release(session)
+        raise
+    conversation = session.conversation
+    conversation.journal = []
+    headers = {"X-Session-Id": session.id}
+    try:
+        conversation.add_messages(request.messages[-1:] if new_session else request.messages)
+        if request.stream:
+            return _stream_response(
+                conversation, session.model, request_id, http_request, lambda: _save_session(session), headers
+            )
+    except BaseException:
+        await _save_session(session)
+        raise
+
+    try:
+        content = await _complete(conversation, http_request)
+    finally:
+        await _save_session(session)
+    if content is None:
+        return Response(status_code=_CLIENT_CLOSED_REQUEST, headers=headers)
+
+    payload = _build_response(content, session.model, request_id)
+    payload["session_id"] = session.id
+    return JSONResponse(payload, headers=headers)
+
+
+@app.delete("/v1/sessions/{session_id}")
+async def delete_session(session_id: str) -> Any:
+    """Delete a stored conversation session."""
+    _get_config()
+    if not await asyncio.to_thread(get_session_store().delete, session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    await asyncio.to_thread(_artifact_store(session_id).delete)
+    return JSONResponse({"id": session_id, "deleted": True})
+
+
 class ConfirmCreateSkillRequest(BaseModel):
     confirmation_token: str
 
 
 @app.post("/v1/confirm_create_skill")
 def confirm_create_skill_endpoint(request: ConfirmCreateSkillRequest) -> Any:
-    """Execute a pending skill creation after user confirmation."""
-    result = confirm_create_skill(request.confirmation_token)
-    return JSONResponse(result)
+    """Start a pending skill creation after user confirmation; it runs as a background job."""
+    _get_config()
+    try:
+        result = start_create_skill(request.confirmation_token)
+    except ProvisioningBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "30"}) from exc
+    if "error" in result:
+        return JSONResponse(result)
+    job_id = result["job_id"]
+    result["status_url"] = f"/v1/provisioning_jobs/{job_id}"
+    result["events_url"] = f"/v1/provisioning_jobs/{job_id}/events"
+    return JSONResponse(result, status_code=202)
+
+
+@app.get("/v1/provisioning_jobs/{job_id}")
+async def provisioning_job_status(job_id: str) -> Any:
+    """Current status of a skill creation job, with its result once it has finished."""
+    job = get_provisioning_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown provisioning job: {job_id}")
+    return JSONResponse(job.snapshot())
+
+
+@app.get("/v1/provisioning_jobs/{job_id}/events")
+async def provisioning_job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)) -> Any:
+    """Stream a job's progress as server-sent events, from the start or after ``Last-Event-ID``."""
+    job = get_provisioning_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown provisioning job: {job_id}")
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream() -> AsyncIterator[str]:
+        async for index, event in job.aevents(start):
+            yield f"id: {index}\ndata: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
 def _read_server_host_port() -> tuple[str, int]:
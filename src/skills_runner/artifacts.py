@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple
+import logging
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SPILL_BYTES = 16384
+DEFAULT_READ_LINES = 200
+_ARTIFACT_PREFIX = "art_"
+_INDEX_CHUNK = 1024 * 1024
+
+
+def _align(data: bytes, index: int) -> int:
+    """Move a byte index back to the start of a UTF-8 character."""
+    while 0 < index < len(data) and data[index] & 0xC0 == 0x80:
+        index -= 1
+    return index
+
+
+def _read_at(handle: IO[bytes], start: int, length: int) -> bytes:
+    handle.seek(start)
+    return handle.read(max(length, 0))
+
+
+def _byte_range(handle: IO[bytes], size: int, offset: int, length: int) -> Tuple[int, int, bytes]:
+    """Read up to ``length`` bytes from ``offset``, both moved back to UTF-8 character starts."""
+    requested = min(offset, size)
+    # A character starts at most 3 bytes back; 4 bytes past the end fit one more whole character.
+    window_start = max(requested - 3, 0)
+    window = _read_at(handle, window_start, requested + length + 4 - window_start)
+    start = _align(window, requested - window_start)
+    end = _align(window, min(start + length, len(window)))
+    if end == start and start < len(window):
+        end = min(start + 4, len(window))
+    return window_start + start, window_start + end, window[start:end]
+
+
+class ArtifactStore:
+    """Files holding tool outputs too large to keep in the conversation history.
+
+    A spilled value is replaced by a preview (its head and tail) and the model
+    reads more with ``read_artifact`` only when it needs to. With ``root`` the
+    files persist, e.g. for a stored session; without it they live in a
+    temporary folder removed together with the store. A store made for a
+    single request sets ``expires_with_turn`` so each artifact says it is
+    gone once the turn ends.
+    """
+    def __init__(
+        self, root: Optional[Path] = None, spill_bytes: int = DEFAULT_SPILL_BYTES, expires_with_turn: bool = False
+    ) -> None:
+        self.spill_bytes = spill_bytes
+        self.expires_with_turn = expires_with_turn
+        self._root = Path(root) if root is not None else None
+        self._temporary = root is None
+        self._created = False
+        self._lock = threading.Lock()
+        # Newline offsets per artifact, computed on the first line-based read.
+        self._line_starts: Dict[str, List[int]] = {}
+
+    @property
+    def root(self) -> Path:
+        with self._lock:
+            if self._root is None:
+                self._root = Path(tempfile.mkdtemp(prefix="skills-runner-artifacts-"))
+                weakref.finalize(self, shutil.rmtree, str(self._root), True)
+            elif not self._created:
+                self._root.mkdir(parents=True, exist_ok=True)
+            self._created = True
+            return self._root
+
+    @property
+    def enabled(self) -> bool:
+        return self.spill_bytes > 0
+
+    def has_oversized(self, value: Any) -> bool:
+        """Whether any string in a tool result would be spilled (characters are a lower bound on bytes)."""
+        if not self.enabled:
+            return False
+        if isinstance(value, str):
+            return len(value) > self.spill_bytes or len(value.encode("utf-8")) > self.spill_bytes
+        if isinstance(value, dict):
+            return any(self.has_oversized(item) for item in value.values())
+        if isinstance(value, list):
+            return any(self.has_oversized(item) for item in value if isinstance(item, dict))
+        return False
+
+    def spill(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Return ``result`` with oversized string fields replaced by previews.
+
+        Each spilled field ``key`` gains a sibling ``key_artifact`` describing
+        the stored content.
+        """
+        spilled: Dict[str, Any] = {}
+        for key, value in result.items():
+            if isinstance(value, str) and self.has_oversized(value):
+                preview, artifact = self._store(value)
+                spilled[key] = preview
+                spilled[f"{key}_artifact"] = artifact
+            elif isinstance(value, dict):
+                spilled[key] = self.spill(value)
+            elif isinstance(value, list):
+                spilled[key] = [self.spill(item) if isinstance(item, dict) else item for item in value]
+            else:
+                spilled[key] = value
+        return spilled
+
+    def _store(self, text: str) -> Tuple[str, Dict[str, Any]]:
+        data = text.encode("utf-8")
+        artifact_id = f"{_ARTIFACT_PREFIX}{uuid.uuid4().hex[:16]}"
+        (self.root / artifact_id).write_bytes(data)
+
+        head_end = _align(data, self.spill_bytes * 3 // 4)
+        tail_start = _align(data, len(data) - self.spill_bytes // 4)
+        omitted = tail_start - head_end
+        preview = (
+            data[:head_end].decode("utf-8", errors="replace")
+            + f"\n...[{omitted} bytes omitted; call read_artifact with artifact_id '{artifact_id}' for more]...\n"
+            + data[tail_start:].decode("utf-8", errors="replace")
+        )
+        _logger.info("Spilled %d bytes of tool output to artifact %s", len(data), artifact_id)
+        artifact: Dict[str, Any] = {
+            "artifact_id": artifact_id,
+            "total_bytes": len(data),
+            "total_lines": data.count(b"\n") + (0 if data.endswith(b"\n") else 1),
+            "preview_bytes": [[0, head_end], [tail_start, len(data)]],
+        }
+        if self.expires_with_turn:
+            artifact["expires"] = "end of this turn; read what you need before answering"
+        return preview, artifact
+
+    def _path(self, artifact_id: str) -> Optional[Path]:
+        if not artifact_id.startswith(_ARTIFACT_PREFIX) or not artifact_id[len(_ARTIFACT_PREFIX):].isalnum():
+            return None
+        path = self.root / artifact_id
+        return path if path.is_file() else None
+
+    def read(
+        self,
+        artifact_id: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        unit: str = "lines",
+    ) -> Dict[str, Any]:
+        """Read part of an artifact by line or byte offset; results never exceed the spill size."""
+        if unit not in ("lines", "bytes"):
+            return {"error": "unit must be 'lines' or 'bytes'"}
+        if not isinstance(offset, int) or offset < 0:
+            return {"error": "offset must be a non-negative integer"}
+        if limit is not None and (not isinstance(limit, int) or limit <= 0):
+            return {"error": "limit must be a positive integer"}
+        path = self._path(str(artifact_id))
+        if path is None:
+            if self.expires_with_turn:
+                return {"error": f"Artifact '{artifact_id}' not found; artifacts expire at the end of their turn"}
+            return {"error": f"Artifact '{artifact_id}' not found"}
+
+        max_bytes = self.spill_bytes if self.enabled else DEFAULT_SPILL_BYTES
+        with open(path, "rb") as handle:
+            size = path.stat().st_size
+            if unit == "bytes":
+                start, end, chunk = _byte_range(handle, size, offset, min(limit or max_bytes, max_bytes))
+            else:
+                starts = self._lines(artifact_id, handle)
+                first = min(offset, len(starts))
+                last = min(first + (limit or DEFAULT_READ_LINES), len(starts))
+                start = starts[first] if first < len(starts) else size
+                end = starts[last] if last < len(starts) else size
+                if end - start > max_bytes:
+                    # Stop at the last whole line that fits, or cut a single long line.
+                    cut = bisect_right(starts, start + max_bytes) - 1
+                    if cut > first:
+                        end = starts[cut]
+                    else:
+                        end = start + _align(_read_at(handle, start, max_bytes + 1), max_bytes)
+                chunk = _read_at(handle, start, end - start)
+
+        result: Dict[str, Any] = {
+            "artifact_id": artifact_id,
+            "unit": unit,
+            "offset": offset,
+            "content": chunk.decode("utf-8", errors="replace"),
+            "total_bytes": size,
+        }
+        if unit == "bytes":
+            result["next_offset"] = end if end < size else None
+        else:
+            result["total_lines"] = len(starts)
+            next_line = bisect_right(starts, end - 1) if end > start else first
+            result["next_offset"] = next_line if end < size else None
+        return result
+
+    def _lines(self, artifact_id: str, handle: IO[bytes]) -> List[int]:
+        """Byte offsets of an artifact's lines, indexed once by streaming the file."""
+        with self._lock:
+            starts = self._line_starts.get(artifact_id)
+        if starts is not None:
+            return starts
+        starts = [0]
+        size = 0
+        handle.seek(0)
+        for data in iter(lambda: handle.read(_INDEX_CHUNK), b""):
+            index = data.find(b"\n")
+            while index != -1:
+                starts.append(size + index + 1)
+                index = data.find(b"\n", index + 1)
+            size += len(data)
+        if starts[-1] == size:
+            starts.pop()  # A final newline (or an empty file) does not start another line.
+        with self._lock:
+            return self._line_starts.setdefault(artifact_id, starts)
+
+    def delete(self) -> None:
+        """Remove all artifacts of this store."""
+        with self._lock:
+            root, self._root = self._root, (None if self._temporary else self._root)
+            self._created = False
+            self._line_starts.clear()
+        if root is not None:
+            shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+import asyncio
+import logging
+import threading
+
+from .exceptions import OperationCancelledError
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SCRIPT_CANCELLED = "Script execution was cancelled"
+
+
+class CancelToken:
+    """Signal that the caller no longer wants the result of some work.
+
+    The HTTP layer cancels a token when its client disconnects; code doing
+    the work checks ``cancelled`` between steps and registers callbacks that
+    abort what is in flight, such as killing a script's process. Callbacks
+    run on the thread that calls ``cancel`` and must not block.
+    """
+    def __init__(self) -> None:
+        self.reason = ""
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # noqa: BLE001 - one failing abort must not skip the others
+                _logger.exception("Cancellation callback failed")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelledError(f"Operation cancelled: {self.reason}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call ``callback`` on cancellation (now, if already cancelled); returns a function unregistering it."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def call(self, function: Callable[[], T]) -> T:
+        """Run a blocking call in a helper thread, abandoning it as soon as the token is cancelled."""
+        self.raise_if_cancelled()
+        outcome: "Future[T]" = Future()
+
+        def run() -> None:
+            try:
+                _settle(outcome, value=function())
+            except BaseException as exc:  # noqa: BLE001 - handed to the waiting caller
+                _settle(outcome, error=exc)
+
+        remove = self.on_cancel(
+            lambda: _settle(outcome, error=OperationCancelledError(f"Operation cancelled: {self.reason}"))
+        )
+        threading.Thread(target=run, name="cancellable-call", daemon=True).start()
+        try:
+            return outcome.result()
+        finally:
+            remove()
+
+    async def race(self, awaitable: Awaitable[T]) -> T:
+        """Await ``awaitable`` in the current task, cancelling it when the token is cancelled.
+
+        The task's ``CancelledError`` becomes ``OperationCancelledError``, so
+        cleanup that runs on cancellation (closing connections, killing a
+        child) has happened by the time the caller sees it.
+        """
+        if self.cancelled:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            self.raise_if_cancelled()
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        state = {"active": True, "fired": False}
+
+        def interrupt() -> None:
+            # Runs on the loop; the await may have finished since cancel() was called.
+            if state["active"] and task is not None:
+                state["fired"] = True
+                task.cancel()
+
+        remove = self.on_cancel(lambda: _call_soon(loop, interrupt))
+        try:
+            return await awaitable
+        except asyncio.CancelledError:
+            if not state["fired"]:
+                raise
+            if hasattr(task, "uncancel"):
+                task.uncancel()  # type: ignore[union-attr]
+            raise OperationCancelledError(f"Operation cancelled: {self.reason}") from None
+        finally:
+            state["active"] = False
+            remove()
+
+
+def _settle(outcome: "Future[Any]", value: Any = None, error: Optional[BaseException] = None) -> None:
+    try:
+        if error is not None:
+            outcome.set_exception(error)
+        else:
+            outcome.set_result(value)
+    except InvalidStateError:
+        pass  # Already settled by the other side.
+
+
+def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass  # The loop has closed; nothing is left to interrupt.
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from .executor import find_python_executable
+
+_logger = logging.getLogger(__name__)
+
+MAX_DOCUMENTATION_BYTES = 1024 * 1024
+MAX_MANIFEST_FILES = 1000
+_SNAPSHOT_VERSION = 1
+# Timestamps newer than this are not trusted: a second change within the
+# filesystem's timestamp granularity would leave the mtime unchanged.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def validate_skill_name(name: str) -> bool:
+    """Validate a skill name to prevent directory traversal."""
+    if not name:
+        return False
+    return "/" not in name and "\\" not in name and ".." not in name
+
+
+def find_skill_doc(skill_path: Path) -> Optional[Path]:
+    """Return the skill's documentation file, matching SKILL.md case-insensitively."""
+    exact = skill_path / "SKILL.md"
+    try:
+        candidates = sorted(
+            entry.name for entry in os.scandir(skill_path)
+            if entry.name.lower() == "skill.md" and entry.is_file()
+        )
+    except OSError:
+        return None
+    if not candidates:
+        return None
+    if exact.name in candidates:
+        return exact
+    return skill_path / candidates[0]
+
+
+def _stat_key(path: Optional[Path]) -> Tuple[int, int]:
+    """Return (mtime_ns, size) for a path, or (-1, -1) when it is missing."""
+    if path is None:
+        return (-1, -1)
+    try:
+        stat = path.stat()
+    except OSError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _is_racy(key: Tuple[int, int]) -> bool:
+    return key[0] >= 0 and time.time_ns() - key[0] < _RACY_WINDOW_NS
+
+
+def _build_manifest(skill_path: Path) -> List[str]:
+    """List files in a skill, skipping the venv, hidden entries and caches."""
+    files: List[str] = []
+    for root, dirs, filenames in os.walk(skill_path):
+        dirs[:] = sorted(
+            name for name in dirs
+            if name != "venv" and name != "__pycache__" and not name.startswith(".")
+        )
+        for filename in sorted(filenames):
+            if filename.startswith("."):
+                continue
+            files.append(Path(root, filename).relative_to(skill_path).as_posix())
+            if len(files) >= MAX_MANIFEST_FILES:
+                return files
+    return files
+
+
+@dataclass
+class SkillEntry:
+    """Cached view of one skill folder."""
+    name: str
+    path: Path
+    dir_key: Tuple[int, int]
+    doc_path: Optional[Path] = None
+    doc_key: Tuple[int, int] = (-1, -1)
+    documentation: Optional[str] = None
+    doc_error: Optional[str] = None
+    doc_hash: Optional[str] = None
+    python_executable: Optional[Path] = None
+    files: List[str] = field(default_factory=list)
+
+    @property
+    def has_venv(self) -> bool:
+        return self.python_executable is not None
+
+    def load_documentation(self) -> None:
+        """(Re)read SKILL.md into the entry, recording errors instead of raising."""
+        self.documentation = None
+        self.doc_error = None
+        self.doc_hash = None
+        self.doc_key = _stat_key(self.doc_path)
+        if self.doc_path is None:
+            return
+        if self.doc_key[1] > MAX_DOCUMENTATION_BYTES:
+            self.doc_error = "too_large"
+            return
+        try:
+            raw = self.doc_path.read_bytes()
+            self.documentation = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            self.doc_error = "invalid_utf8"
+            return
+        except OSError as exc:
+            self.doc_error = str(exc)
+            return
+        self.doc_hash = hashlib.sha256(raw).hexdigest()
+
+    def to_snapshot(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["path"] = str(self.path)
+        data["doc_path"] = str(self.doc_path) if self.doc_path else None
+        data["python_executable"] = str(self.python_executable) if self.python_executable else None
+        return data
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, object]) -> "SkillEntry":
+        doc_path = data.get("doc_path")
+        python_executable = data.get("python_executable")
+        return cls(
+            name=str(data["name"]),
+            path=Path(str(data["path"])),
+            dir_key=tuple(data["dir_key"]),  # type: ignore[arg-type]
+            doc_path=Path(str(doc_path)) if doc_path else None,
+            doc_key=tuple(data["doc_key"]),  # type: ignore[arg-type]
+            documentation=data.get("documentation"),  # type: ignore[arg-type]
+            doc_error=data.get("doc_error"),  # type: ignore[arg-type]
+            doc_hash=data.get("doc_hash"),  # type: ignore[arg-type]
+            python_executable=Path(str(python_executable)) if python_executable else None,
+            files=list(data.get("files") or []),  # type: ignore[call-overload]
+        )
+
+
+class SkillCatalog:
+    """In-memory index of a skills folder, kept fresh by mtime checks.
+
+    Without a watcher each lookup revalidates only what it touches with a
+    stat call. With ``start_watching`` a background thread polls the folder
+    and lookups are served from memory.
+    """
+    def __init__(self, skills_folder: Path, snapshot_path: Optional[Path] = None) -> None:
+        self.skills_folder = skills_folder.resolve()
+        self.snapshot_path = snapshot_path
+        self.error: Optional[str] = None
+        self.generation = 0
+        self._entries: Dict[str, SkillEntry] = {}
+        self._root_key: Tuple[int, int] = (-1, -1)
+        self._lock = threading.RLock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        if snapshot_path is not None:
+            self._load_snapshot(snapshot_path)
+        self.refresh()
+
+    @property
+    def watching(self) -> bool:
+        return self._watcher is not None
+
+    def names(self) -> List[str]:
+        """Sorted skill names."""
+        if not self.watching:
+            self._revalidate_root()
+        with self._lock:
+            return sorted(self._entries)
+
+    def entries(self) -> List[SkillEntry]:
+        """All entries, sorted by name."""
+        if not self.watching:
+            self.refresh()
+        with self._lock:
+            return [self._entries[name] for name in sorted(self._entries)]
+
+    def get(self, name: str) -> Optional[SkillEntry]:
+        """Return the entry for a skill, or ``None`` if it does not exist."""
+        if not validate_skill_name(name):
+            return None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                # A skill created since the last scan shows up here first.
+                self._revalidate_root()
+                return self._entries.get(name)
+            if self.watching:
+                return entry
+            return self._revalidate_entry(entry)
+
+    def invalidate(self, name: str) -> None:
+        """Re-index one skill now, e.g. after the runner itself changed it."""
+        with self._lock:
+            self._root_key = (-1, -1)
+            self._revalidate_root()
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._index_entry(entry)
+            self.generation += 1
+
+    def refresh(self) -> bool:
+        """Rescan changed skills; returns True when anything changed."""
+        with self._lock:
+            changed = self._revalidate_root()
+            for entry in list(self._entries.values()):
+                before = (entry.dir_key, entry.doc_key, entry.python_executable)
+                if self._revalidate_entry(entry) is None or before != (
+                    entry.dir_key, entry.doc_key, entry.python_executable
+                ):
+                    changed = True
+            if changed:
+                self.generation += 1
+            return changed
+
+    def _revalidate_root(self) -> bool:
+        root_key = _stat_key(self.skills_folder)
+        if root_key == self._root_key and not _is_racy(root_key):
+            return False
+        self._root_key = root_key
+
+        if root_key == (-1, -1):
+            self.error = f"Skills folder not found at path: {self.skills_folder}"
+            self._entries.clear()
+            return True
+        if not self.skills_folder.is_dir():
+            self.error = f"Skills folder path is not a directory: {self.skills_folder}"
+            self._entries.clear()
+            return True
+        self.error = None
+
+        found = set()
+        try:
+            with os.scandir(self.skills_folder) as scan:
+                for item in scan:
+                    if item.is_dir() and validate_skill_name(item.name):
+                        found.add(item.name)
+        except OSError as exc:
+            self.error = f"Cannot list skills folder {self.skills_folder}: {exc}"
+            return True
+
+        for name in set(self._entries) - found:
+            del self._entries[name]
+        for name in found - set(self._entries):
+            entry = SkillEntry(name=name, path=(self.skills_folder / name).resolve(), dir_key=(-1, -1))
+            self._index_entry(entry)
+            self._entries[name] = entry
+        return True
+
+    def _revalidate_entry(self, entry: SkillEntry) -> Optional[SkillEntry]:
+        dir_key = _stat_key(entry.path)
+        if dir_key == (-1, -1):
+            self._entries.pop(entry.name, None)
+            return None
+        if dir_key != entry.dir_key or _is_racy(dir_key):
+            self._index_entry(entry)
+        else:
+            doc_key = _stat_key(entry.doc_path)
+            if doc_key != entry.doc_key or _is_racy(doc_key):
+                entry.load_documentation()
+        return entry
+
+    def _index_entry(self, entry: SkillEntry) -> None:
+        entry.dir_key = _stat_key(entry.path)
+        entry.doc_path = find_skill_doc(entry.path)
+        entry.load_documentation()
+        entry.python_executable = find_python_executable(entry.path)
+        entry.files = _build_manifest(entry.path)
+
+    def start_watching(self, interval_seconds: float) -> None:
+        """Poll for changes in a background thread every ``interval_seconds``."""
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval_seconds,), name="skills-catalog-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.join(timeout=5)
+        self._stop.clear()
+
+    def _watch(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            try:
+                # Entry-level changes below the top level do not touch the
+                # folder mtime, so a full poll revalidates every entry.
+                if self.refresh() and self.snapshot_path is not None:
+                    self.save_snapshot(self.snapshot_path)
+            except Exception:  # noqa: BLE001 - keep watching after transient errors
+                _logger.exception("Skills catalog refresh failed for %s", self.skills_folder)
+
+    def save_snapshot(self, path: Path) -> None:
+        """Write the catalog to disk atomically for fast warm starts."""
+        start_time = time.perf_counter()
+        with self._lock:
+            entries = [entry.to_snapshot() for entry in self._entries.values()]
+        data = {
+            "version": _SNAPSHOT_VERSION,
+            "skills_folder": str(self.skills_folder),
+            "entries": entries,
+        }
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(temp_path, path)
+        _logger.info(
+            "Saved skills catalog snapshot (%d skills) in %.2fms",
+            len(entries),
+            (time.perf_counter() - start_time) * 1000,
+        )
+
+    def _load_snapshot(self, path: Path) -> None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != _SNAPSHOT_VERSION or data.get("skills_folder") != str(self.skills_folder):
+            return
+        try:
+            entries = [SkillEntry.from_snapshot(item) for item in data.get("entries", [])]
+        except (KeyError, TypeError, ValueError):
+            _logger.warning("Ignoring unreadable skills catalog snapshot at %s", path)
+            return
+        with self._lock:
+            self._entries = {entry.name: entry for entry in entries}
+            # Force one directory listing; unchanged entries are kept after a stat.
+            self._root_key = (-1, -1)
+
+
+_catalogs: Dict[str, SkillCatalog] = {}
+_catalogs_lock = threading.Lock()
+_poll_seconds = 0.0
+_snapshot_path: Optional[Path] = None
+
+
+def configure_catalog(poll_seconds: float, snapshot_path: Optional[Path]) -> None:
+    """Set polling and snapshot defaults for catalogs created afterwards."""
+    global _poll_seconds, _snapshot_path
+    _poll_seconds = poll_seconds
+    _snapshot_path = snapshot_path
+
+
+def get_catalog(skills_folder: Path) -> SkillCatalog:
+    """Return the shared catalog for a skills folder, building it on first use."""
+    key = os.path.abspath(skills_folder)
+    catalog = _catalogs.get(key)
+    if catalog is not None:
+        return catalog
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            start_time = time.perf_counter()
+            catalog = SkillCatalog(skills_folder, snapshot_path=_snapshot_path)
+            if _poll_seconds > 0:
+                catalog.start_watching(_poll_seconds)
+            if _snapshot_path is not None:
+                catalog.save_snapshot(_snapshot_path)
+            _catalogs[key] = catalog
+            _logger.info(
+                "Indexed %d skills in %s in %.2fms",
+                len(catalog._entries),
+                catalog.skills_folder,
+                (time.perf_counter() - start_time) * 1000,
+            )
+        return catalog
@@ -2,9 +2,13 @@ from typing import Optional
 
 import click
 
+from .artifacts import ArtifactStore
 from .config import Configuration
 from .conversation import Conversation
 from .llm_client import LLMClient
+from .runtime import apply_configuration
+from .summarizer import HistorySummarizer
+from .tokens import context_budget_for
 from .tools import SKILLS_TOOLS
 
 
@@ -17,13 +21,33 @@ def cli() -> None:
 @click.argument("prompt", required=False)
 def chat(prompt: Optional[str]) -> None:
     config = Configuration.from_env()
+    apply_configuration(config)
     client = LLMClient(
         api_key=config.api_key,
         api_base_url=config.api_base_url,
         model_name=config.model_name,
         timeout_seconds=config.timeout_seconds,
     )
-    conversation = Conversation(client=client, tools=SKILLS_TOOLS, skills_folder=config.skills_folder)
+    summarizer = None
+    if config.summary_model:
+        summarizer = HistorySummarizer(
+            LLMClient(
+                api_key=config.api_key,
+                api_base_url=config.api_base_url,
+                model_name=config.summary_model,
+                timeout_seconds=config.timeout_seconds,
+            )
+        )
+    conversation = Conversation(
+        client=client,
+        tools=SKILLS_TOOLS,
+        skills_folder=config.skills_folder,
+        routing_top_k=config.skill_routing_top_k,
+        context_budget=context_budget_for(config.model_name, config.context_tokens, config.context_tokens_by_model),
+        compaction_target=config.context_compaction_target,
+        summarizer=summarizer,
+        artifacts=ArtifactStore(spill_bytes=config.tool_output_spill_bytes),
+    )
 
     if prompt:
         response = conversation.send(prompt)
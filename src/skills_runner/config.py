@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import logging
 import os
 
@@ -19,6 +19,48 @@ class Configuration:
     model_name: str
     skills_folder: Path
     timeout_seconds: int
+    script_pool_size: int = 2
+    script_pool_idle_seconds: int = 300
+    script_pool_max_jobs: int = 100
+    llm_pool_connections: int = 10
+    llm_pool_maxsize: int = 20
+    llm_http2: bool = False
+    tool_max_parallel: int = 8
+    tool_concurrency_limits: Dict[str, int] = field(default_factory=dict)
+    skills_catalog_poll_seconds: int = 0
+    skills_catalog_snapshot: Optional[Path] = None
+    skill_routing_top_k: int = 0
+    context_tokens: int = 32000
+    context_tokens_by_model: Dict[str, int] = field(default_factory=dict)
+    context_compaction_target: int = 60
+    summary_model: Optional[str] = None
+    session_db_path: Path = Path("sessions.db")
+    session_cache_size: int = 256
+    tool_output_spill_bytes: int = 16384
+    artifacts_folder: Optional[Path] = None
+    script_output_max_bytes: int = 1048576
+    script_output_kill_on_overflow: bool = False
+    script_cpu_seconds: int = 0
+    script_memory_mb: int = 0
+    script_max_open_files: int = 0
+    script_max_processes: int = 0
+    script_cgroup_root: Optional[Path] = None
+    script_max_concurrent: int = 16
+    script_max_per_session: int = 4
+    script_max_per_skill: int = 0
+    script_queue_max: int = 64
+    script_queue_timeout_seconds: int = 60
+    venv_template_path: Optional[Path] = None
+    wheelhouse_path: Optional[Path] = None
+    pip_offline: bool = False
+    pip_timeout_seconds: int = 120
+    venv_store_path: Optional[Path] = None
+    provisioning_workers: int = 2
+    provisioning_queue_max: int = 16
+    provisioning_job_ttl_seconds: int = 3600
+    pending_db_path: Optional[Path] = None
+    pending_ttl_seconds: int = 900
+    pending_max_entries: int = 1024
 
     @classmethod
     def from_env(cls) -> "Configuration":
@@ -30,6 +72,48 @@ class Configuration:
         model_name = os.getenv("LLM_MODEL_NAME", "").strip()
         skills_folder_raw = os.getenv("SKILLS_FOLDER_PATH", "./skills").strip()
         timeout_raw = os.getenv("SCRIPT_TIMEOUT_SECONDS", "30").strip()
+        pool_size_raw = os.getenv("SCRIPT_POOL_SIZE", "2").strip()
+        pool_idle_raw = os.getenv("SCRIPT_POOL_IDLE_SECONDS", "300").strip()
+        pool_max_jobs_raw = os.getenv("SCRIPT_POOL_MAX_JOBS", "100").strip()
+        llm_pool_connections_raw = os.getenv("LLM_HTTP_POOL_CONNECTIONS", "10").strip()
+        llm_pool_maxsize_raw = os.getenv("LLM_HTTP_POOL_MAXSIZE", "20").strip()
+        llm_http2_raw = os.getenv("LLM_HTTP2", "false").strip()
+        tool_max_parallel_raw = os.getenv("TOOL_MAX_PARALLEL", "8").strip()
+        tool_limits_raw = os.getenv("TOOL_CONCURRENCY_LIMITS", "").strip()
+        catalog_poll_raw = os.getenv("SKILLS_CATALOG_POLL_SECONDS", "0").strip()
+        catalog_snapshot_raw = os.getenv("SKILLS_CATALOG_SNAPSHOT", "").strip()
+        routing_top_k_raw = os.getenv("SKILL_ROUTING_TOP_K", "0").strip()
+        context_tokens_raw = os.getenv("LLM_CONTEXT_TOKENS", "32000").strip()
+        context_by_model_raw = os.getenv("LLM_CONTEXT_TOKENS_BY_MODEL", "").strip()
+        compaction_target_raw = os.getenv("LLM_CONTEXT_COMPACTION_TARGET", "60").strip()
+        summary_model = os.getenv("LLM_SUMMARY_MODEL", "").strip() or None
+        session_db_raw = os.getenv("SESSION_DB_PATH", "sessions.db").strip() or "sessions.db"
+        session_cache_raw = os.getenv("SESSION_CACHE_SIZE", "256").strip()
+        spill_bytes_raw = os.getenv("TOOL_OUTPUT_SPILL_BYTES", "16384").strip()
+        artifacts_folder_raw = os.getenv("ARTIFACTS_FOLDER", "").strip()
+        output_max_raw = os.getenv("SCRIPT_OUTPUT_MAX_BYTES", "1048576").strip()
+        output_kill_raw = os.getenv("SCRIPT_OUTPUT_KILL_ON_OVERFLOW", "false").strip()
+        cpu_seconds_raw = os.getenv("SCRIPT_CPU_SECONDS", "0").strip()
+        memory_mb_raw = os.getenv("SCRIPT_MEMORY_MB", "0").strip()
+        open_files_raw = os.getenv("SCRIPT_MAX_OPEN_FILES", "0").strip()
+        processes_raw = os.getenv("SCRIPT_MAX_PROCESSES", "0").strip()
+        cgroup_root_raw = os.getenv("SCRIPT_CGROUP_ROOT", "").strip()
+        max_concurrent_raw = os.getenv("SCRIPT_MAX_CONCURRENT", "16").strip()
+        max_per_session_raw = os.getenv("SCRIPT_MAX_PER_SESSION", "4").strip()
+        max_per_skill_raw = os.getenv("SCRIPT_MAX_PER_SKILL", "0").strip()
+        queue_max_raw = os.getenv("SCRIPT_QUEUE_MAX", "64").strip()
+        queue_timeout_raw = os.getenv("SCRIPT_QUEUE_TIMEOUT_SECONDS", "60").strip()
+        venv_template_raw = os.getenv("SKILL_VENV_TEMPLATE", "").strip()
+        wheelhouse_raw = os.getenv("SKILL_WHEELHOUSE", "").strip()
+        pip_offline_raw = os.getenv("SKILL_PIP_OFFLINE", "false").strip()
+        pip_timeout_raw = os.getenv("SKILL_PIP_TIMEOUT_SECONDS", "120").strip()
+        venv_store_raw = os.getenv("SKILL_VENV_STORE", "").strip()
+        provisioning_workers_raw = os.getenv("SKILL_PROVISIONING_WORKERS", "2").strip()
+        provisioning_queue_raw = os.getenv("SKILL_PROVISIONING_QUEUE_MAX", "16").strip()
+        provisioning_ttl_raw = os.getenv("SKILL_PROVISIONING_JOB_TTL_SECONDS", "3600").strip()
+        pending_db_raw = os.getenv("PENDING_CREATION_DB", "").strip()
+        pending_ttl_raw = os.getenv("PENDING_CREATION_TTL_SECONDS", "900").strip()
+        pending_max_raw = os.getenv("PENDING_CREATION_MAX", "1024").strip()
 
         if not api_key:
             logging.warning("LLM_API_KEY is not set; requests may fail if the provider requires one")
@@ -40,6 +124,46 @@ class Configuration:
 
         skills_folder = Path(skills_folder_raw)
         timeout_seconds = _parse_positive_int(timeout_raw, "SCRIPT_TIMEOUT_SECONDS")
+        script_pool_size = _parse_non_negative_int(pool_size_raw, "SCRIPT_POOL_SIZE")
+        script_pool_idle_seconds = _parse_positive_int(pool_idle_raw, "SCRIPT_POOL_IDLE_SECONDS")
+        script_pool_max_jobs = _parse_positive_int(pool_max_jobs_raw, "SCRIPT_POOL_MAX_JOBS")
+        llm_pool_connections = _parse_positive_int(llm_pool_connections_raw, "LLM_HTTP_POOL_CONNECTIONS")
+        llm_pool_maxsize = _parse_positive_int(llm_pool_maxsize_raw, "LLM_HTTP_POOL_MAXSIZE")
+        llm_http2 = _parse_bool(llm_http2_raw, "LLM_HTTP2")
+        tool_max_parallel = _parse_positive_int(tool_max_parallel_raw, "TOOL_MAX_PARALLEL")
+        tool_concurrency_limits = _parse_limits(tool_limits_raw, "TOOL_CONCURRENCY_LIMITS")
+        skills_catalog_poll_seconds = _parse_non_negative_int(catalog_poll_raw, "SKILLS_CATALOG_POLL_SECONDS")
+        skills_catalog_snapshot = Path(catalog_snapshot_raw) if catalog_snapshot_raw else None
+        skill_routing_top_k = _parse_non_negative_int(routing_top_k_raw, "SKILL_ROUTING_TOP_K")
+        context_tokens = _parse_positive_int(context_tokens_raw, "LLM_CONTEXT_TOKENS")
+        context_tokens_by_model = _parse_limits(context_by_model_raw, "LLM_CONTEXT_TOKENS_BY_MODEL")
+        context_compaction_target = _parse_percent(compaction_target_raw, "LLM_CONTEXT_COMPACTION_TARGET")
+        session_cache_size = _parse_positive_int(session_cache_raw, "SESSION_CACHE_SIZE")
+        tool_output_spill_bytes = _parse_non_negative_int(spill_bytes_raw, "TOOL_OUTPUT_SPILL_BYTES")
+        artifacts_folder = Path(artifacts_folder_raw) if artifacts_folder_raw else None
+        script_output_max_bytes = _parse_positive_int(output_max_raw, "SCRIPT_OUTPUT_MAX_BYTES")
+        script_output_kill_on_overflow = _parse_bool(output_kill_raw, "SCRIPT_OUTPUT_KILL_ON_OVERFLOW")
+        script_cpu_seconds = _parse_non_negative_int(cpu_seconds_raw, "SCRIPT_CPU_SECONDS")
+        script_memory_mb = _parse_non_negative_int(memory_mb_raw, "SCRIPT_MEMORY_MB")
+        script_max_open_files = _parse_non_negative_int(open_files_raw, "SCRIPT_MAX_OPEN_FILES")
+        script_max_processes = _parse_non_negative_int(processes_raw, "SCRIPT_MAX_PROCESSES")
+        script_cgroup_root = Path(cgroup_root_raw) if cgroup_root_raw else None
+        script_max_concurrent = _parse_non_negative_int(max_concurrent_raw, "SCRIPT_MAX_CONCURRENT")
+        script_max_per_session = _parse_non_negative_int(max_per_session_raw, "SCRIPT_MAX_PER_SESSION")
+        script_max_per_skill = _parse_non_negative_int(max_per_skill_raw, "SCRIPT_MAX_PER_SKILL")
+        script_queue_max = _parse_non_negative_int(queue_max_raw, "SCRIPT_QUEUE_MAX")
+        script_queue_timeout_seconds = _parse_non_negative_int(queue_timeout_raw, "SCRIPT_QUEUE_TIMEOUT_SECONDS")
+        venv_template_path = Path(venv_template_raw) if venv_template_raw else None
+        wheelhouse_path = Path(wheelhouse_raw) if wheelhouse_raw else None
+        pip_offline = _parse_bool(pip_offline_raw, "SKILL_PIP_OFFLINE")
+        pip_timeout_seconds = _parse_positive_int(pip_timeout_raw, "SKILL_PIP_TIMEOUT_SECONDS")
+        venv_store_path = Path(venv_store_raw) if venv_store_raw else None
+        provisioning_workers = _parse_positive_int(provisioning_workers_raw, "SKILL_PROVISIONING_WORKERS")
+        provisioning_queue_max = _parse_non_negative_int(provisioning_queue_raw, "SKILL_PROVISIONING_QUEUE_MAX")
+        provisioning_job_ttl_seconds = _parse_positive_int(provisioning_ttl_raw, "SKILL_PROVISIONING_JOB_TTL_SECONDS")
+        pending_db_path = Path(pending_db_raw) if pending_db_raw else None
+        pending_ttl_seconds = _parse_positive_int(pending_ttl_raw, "PENDING_CREATION_TTL_SECONDS")
+        pending_max_entries = _parse_non_negative_int(pending_max_raw, "PENDING_CREATION_MAX")
 
         _ensure_skills_folder(skills_folder)
 
@@ -49,6 +173,48 @@ class Configuration:
             model_name=model_name,
             skills_folder=skills_folder,
             timeout_seconds=timeout_seconds,
+            script_pool_size=script_pool_size,
+            script_pool_idle_seconds=script_pool_idle_seconds,
+            script_pool_max_jobs=script_pool_max_jobs,
+            llm_pool_connections=llm_pool_connections,
+            llm_pool_maxsize=llm_pool_maxsize,
+            llm_http2=llm_http2,
+            tool_max_parallel=tool_max_parallel,
+            tool_concurrency_limits=tool_concurrency_limits,
+            skills_catalog_poll_seconds=skills_catalog_poll_seconds,
+            skills_catalog_snapshot=skills_catalog_snapshot,
+            skill_routing_top_k=skill_routing_top_k,
+            context_tokens=context_tokens,
+            context_tokens_by_model=context_tokens_by_model,
+            context_compaction_target=context_compaction_target,
+            summary_model=summary_model,
+            session_db_path=Path(session_db_raw),
+            session_cache_size=session_cache_size,
+            tool_output_spill_bytes=tool_output_spill_bytes,
+            artifacts_folder=artifacts_folder,
+            script_output_max_bytes=script_output_max_bytes,
+            script_output_kill_on_overflow=script_output_kill_on_overflow,
+            script_cpu_seconds=script_cpu_seconds,
+            script_memory_mb=script_memory_mb,
+            script_max_open_files=script_max_open_files,
+            script_max_processes=script_max_processes,
+            script_cgroup_root=script_cgroup_root,
+            script_max_concurrent=script_max_concurrent,
+            script_max_per_session=script_max_per_session,
+            script_max_per_skill=script_max_per_skill,
+            script_queue_max=script_queue_max,
+            script_queue_timeout_seconds=script_queue_timeout_seconds,
+            venv_template_path=venv_template_path,
+            wheelhouse_path=wheelhouse_path,
+            pip_offline=pip_offline,
+            pip_timeout_seconds=pip_timeout_seconds,
+            venv_store_path=venv_store_path,
+            provisioning_workers=provisioning_workers,
+            provisioning_queue_max=provisioning_queue_max,
+            provisioning_job_ttl_seconds=provisioning_job_ttl_seconds,
+            pending_db_path=pending_db_path,
+            pending_ttl_seconds=pending_ttl_seconds,
+            pending_max_entries=pending_max_entries,
         )
 
 
@@ -65,6 +231,56 @@ def _parse_positive_int(value: str, env_name: str) -> int:
     return parsed
 
 
+def _parse_non_negative_int(value: str, env_name: str) -> int:
+    """Parse and validate a non-negative integer from environment."""
+    try:
+        parsed = int(value)
+    except ValueError as exc:
+        raise ConfigError(f"{env_name} must be a non-negative integer") from exc
+
+    if parsed < 0:
+        raise ConfigError(f"{env_name} must be a non-negative integer")
+
+    return parsed
+
+
+def _parse_percent(value: str, env_name: str) -> int:
+    """Parse and validate a percentage between 1 and 100 from environment."""
+    try:
+        parsed = int(value)
+    except ValueError as exc:
+        raise ConfigError(f"{env_name} must be an integer between 1 and 100") from exc
+
+    if not 1 <= parsed <= 100:
+        raise ConfigError(f"{env_name} must be an integer between 1 and 100")
+
+    return parsed
+
+
+def _parse_bool(value: str, env_name: str) -> bool:
+    """Parse a boolean flag from environment."""
+    normalized = value.lower()
+    if normalized in ("1", "true", "yes", "on"):
+        return True
+    if normalized in ("", "0", "false", "no", "off"):
+        return False
+    raise ConfigError(f"{env_name} must be a boolean (true/false)")
+
+
+def _parse_limits(value: str, env_name: str) -> Dict[str, int]:
+    """Parse comma-separated ``name=limit`` pairs from environment."""
+    limits: Dict[str, int] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, raw_limit = item.partition("=")
+        if not sep or not name.strip():
+            raise ConfigError(f"{env_name} entries must look like name=limit")
+        limits[name.strip()] = _parse_positive_int(raw_limit.strip(), env_name)
+    return limits
+
+
 def _ensure_skills_folder(path: Path) -> None:
     """Ensure the skills folder exists and is a directory."""
     try:
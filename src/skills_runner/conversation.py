@@ -1,13 +1,47 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
+import asyncio
 import json
+import logging
+import queue
+import uuid
 
-from .exceptions import ToolExecutionError
+from .cancellation import CancelToken
+from .exceptions import OperationCancelledError, ToolExecutionError
 from .llm_client import LLMClient
+from .artifacts import ArtifactStore
+from .catalog import get_catalog
 from .models import Message
-from .skills_tool import create_skill, get_skill, list_skills, read_files_in_skill, run_python_script, write_file_in_skill
+from .output_capture import OutputCallback
+from .payload import EncodedMessages
+from .skill_router import ROUTING_NOTE_PREFIX, format_routing_note, route_skills
+from .summarizer import SUMMARY_PREFIX, HistorySummarizer, segment_key
+from .tokens import DEFAULT_CONTEXT_TOKENS, get_tokenizer, message_tokens, tools_tokens
+from .tool_concurrency import get_tool_executor, parallel_slots, plan_tool_batches, tool_name, tool_slots
+from .skills_tool import (
+    arun_python_script,
+    create_skill,
+    get_skill,
+    list_skills,
+    read_files_in_skill,
+    run_python_script,
+    search_skills,
+    write_file_in_skill,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Tools whose result only depends on their arguments and the skill files.
+_MEMOIZED_TOOLS = frozenset({"list_skills", "search_skills", "get_skill", "read_files_in_skill", "read_artifact"})
+# Tools that may change skill files; they clear the memo.
+_MUTATING_TOOLS = frozenset({"write_file_in_skill", "run_python_script"})
+# Tools that report output while they run.
+_PROGRESS_TOOLS = frozenset({"run_python_script"})
 
 _FALLBACK_SYSTEM_PROMPT = (
     "Before you think you cannot assist the user in doing something, e.g. access external websites, "
@@ -16,7 +50,38 @@ _FALLBACK_SYSTEM_PROMPT = (
     "Do not guess skill names."
 )
 
+_CONTEXT_NOTE = (
+    "[Context note: earlier messages were trimmed to save context space. "
+    "Focus on the recent conversation.]"
+)
+
+
+@dataclass
+class PrefixCacheStats:
+    """How much of each request repeated the previous request's prefix.
+
+    Providers with prompt caching can only reuse a cached prefix, so
+    ``reuse_ratio`` is an upper bound on the achievable cache-hit rate.
+    """
+    requests: int = 0
+    prompt_tokens: int = 0
+    reused_tokens: int = 0
+    last_prompt_tokens: int = 0
+    last_reused_tokens: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def record(self, prompt_tokens: int, reused_tokens: int) -> None:
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.reused_tokens += reused_tokens
+        self.last_prompt_tokens = prompt_tokens
+        self.last_reused_tokens = reused_tokens
 
+
+@lru_cache(maxsize=1)
 def _load_soul_prompt() -> str:
     """Load the system prompt from soul.md at the project root.
 
@@ -32,20 +97,76 @@ def _load_soul_prompt() -> str:
     return _FALLBACK_SYSTEM_PROMPT
 
 
+def _progress_callback(tool_call: Dict[str, Any], emit: Callable[[Dict[str, Any]], Any]) -> OutputCallback:
+    """Turn script output into ``"progress"`` tool events passed to ``emit``."""
+    def on_output(stream: str, text: str) -> None:
+        emit({"type": "tool", "phase": "progress", "tool_call": tool_call, "result": {"stream": stream, "text": text}})
+
+    return on_output
+
+
+def _cancel_kwargs(cancel: Optional[CancelToken]) -> Dict[str, Any]:
+    # Only pass a token when there is one, so clients without cancellation support keep working.
+    return {"cancel": cancel} if cancel is not None else {}
+
+
 class Conversation:
     """Manage chat history and tool execution loop."""
-    def __init__(self, client: LLMClient, tools: List[Dict[str, Any]], skills_folder: Path) -> None:
+    def __init__(
+        self,
+        client: LLMClient,
+        tools: List[Dict[str, Any]],
+        skills_folder: Path,
+        routing_top_k: int = 0,
+        context_budget: int = DEFAULT_CONTEXT_TOKENS,
+        compaction_target: int = 60,
+        summarizer: Optional[HistorySummarizer] = None,
+        artifacts: Optional[ArtifactStore] = None,
+        session_id: Optional[str] = None,
+    ) -> None:
         self.client = client
         self.tools = tools
         self.skills_folder = skills_folder
+        self.routing_top_k = routing_top_k
+        self.context_budget = context_budget
+        self.compaction_target = compaction_target
+        self.summarizer = summarizer
+        # Large tool outputs are stored here and replaced by a preview in the history.
+        self.artifacts = artifacts if artifacts is not None else ArtifactStore()
+        # Identifies this conversation to the script scheduler's per-session quota and fair share.
+        self.session_id = session_id or uuid.uuid4().hex
+        # When set, messages added to the history are also collected here,
+        # e.g. so a session store can persist just the new ones.
+        self.journal: Optional[List[Message]] = None
+        self.prefix_stats = PrefixCacheStats()
+        self._context_note = Message(role="system", content=_CONTEXT_NOTE)
+        self._last_fragments: List[bytes] = []
+        self.count_tokens = get_tokenizer(client.model_name)
+        self._tools_tokens = tools_tokens(tools, self.count_tokens)
         self.messages: List[Message] = [
             Message(role="system", content=_load_soul_prompt())
         ]
+        self._reset_window()
+
+    def _reset_window(self) -> None:
+        # messages[_window_start:] are sent after the pinned system prompt;
+        # messages[:_counted] have been added to _window_tokens.
+        self._window_start = 0
+        self._counted = 0
+        self._window_tokens = 0
+        self._evicted = 0
+        # Trimmed messages not yet covered by the summary, and the summary job.
+        self._summary: Optional[Message] = None
+        self._unsummarized: List[Message] = []
+        self._summary_job: Optional["Future[str]"] = None
+        # (tool, normalized arguments) -> (tool_call_id, catalog generation) of a result in the window.
+        self._tool_memo: Dict[Tuple[str, str], Tuple[str, int]] = {}
 
     def load_messages(self, messages: List[Dict[str, Any]]) -> None:
         """Replace the conversation history with OpenAI-format messages."""
         has_system = any(message.get("role") == "system" for message in messages)
         self.messages = []
+        self._reset_window()
         if not has_system:
             self.messages.append(
                 Message(role="system", content=_load_soul_prompt())
@@ -54,15 +175,18 @@ class Conversation:
         for message in messages:
             if not isinstance(message, dict):
                 continue
-            self.messages.append(
-                Message(
-                    role=message.get("role", "user"),
-                    content=message.get("content"),
-                    tool_calls=message.get("tool_calls"),
-                    tool_call_id=message.get("tool_call_id"),
-                    name=message.get("name"),
-                )
-            )
+            self.messages.append(Message.from_dict(message))
+
+    def add_messages(self, messages: List[Dict[str, Any]]) -> None:
+        """Append OpenAI-format messages to the existing history."""
+        for message in messages:
+            if isinstance(message, dict):
+                self._append(Message.from_dict(message))
+
+    def _append(self, message: Message) -> None:
+        self.messages.append(message)
+        if self.journal is not None:
+            self.journal.append(message)
 
     def send(
         self,
@@ -72,105 +196,478 @@ class Conversation:
         ] = None,
     ) -> str:
         """Send user input to the LLM and return the final assistant response."""
-        self.messages.append(Message(role="user", content=user_input))
+        self._append(Message(role="user", content=user_input))
         return self.run(tool_event_handler=tool_event_handler)
 
     _MAX_TOOL_ROUNDS = 15
-    _MAX_CONTEXT_MESSAGES = 50
+
+    def _route_skills(self) -> None:
+        """Insert a note naming the skills that best match a new user message.
+
+        Runs once per user message when ``routing_top_k`` is set, so the model
+        can go straight to ``get_skill`` instead of spending a round on
+        ``list_skills``. The note goes just before the user message, leaving
+        the earlier history untouched, and takes the same place in the
+        journal so a stored session keeps it.
+        """
+        if self.routing_top_k <= 0 or not self.messages:
+            return
+        latest = self.messages[-1]
+        if latest.role != "user" or not isinstance(latest.content, str):
+            return
+        previous = self.messages[-2] if len(self.messages) > 1 else None
+        if previous is not None and previous.role == "system" and (previous.content or "").startswith(ROUTING_NOTE_PREFIX):
+            return
+
+        note = format_routing_note(route_skills(self.skills_folder, latest.content, self.routing_top_k))
+        if note is not None:
+            index = len(self.messages) - 1
+            routing = Message(role="system", content=note)
+            self.messages.insert(index, routing)
+            if self.journal is not None:
+                position = next((i for i, message in enumerate(self.journal) if message is latest), None)
+                if position is not None:
+                    self.journal.insert(position, routing)
+                else:
+                    _logger.warning("Routing note not journaled: its user message was stored before the turn")
+            if index < self._counted:
+                self._counted += 1
+                self._window_tokens += message_tokens(self.messages[index], self.count_tokens)
+
+    _MAX_TOOL_RESULT_SHARE = 4
+    _MAX_SUMMARY_SHARE = 8
+    _TRUNCATION_MARKER = "\n... [truncated — result was too large]"
+
+    def _pinned_count(self) -> int:
+        return 1 if self.messages and self.messages[0].role == "system" else 0
 
     def _trim_context(self) -> None:
-        """Keep context window manageable by trimming old messages.
+        """Drop the oldest messages once the request exceeds ``context_budget`` tokens.
 
-        Preserves the system prompt (first message) and the most recent
-        _MAX_CONTEXT_MESSAGES messages. Tool results in trimmed messages
-        are summarized to reduce token usage.
+        The system prompt is always kept. When the budget is exceeded, the
+        oldest messages are dropped in one block until the request is back
+        under ``compaction_target`` percent of the budget; until the next
+        overflow, rounds only append, so the request prefix (system prompt,
+        the constant trim note and the surviving history) stays byte-identical
+        for provider prompt caching.
+
+        Token counts are cached on each message and the running total carries
+        over between rounds, so a call only counts messages appended since the
+        last one and each message is dropped at most once. Tool results larger
+        than a quarter of the budget are truncated when first counted, before
+        they are ever sent.
         """
-        if len(self.messages) <= self._MAX_CONTEXT_MESSAGES + 1:
+        if self._counted > len(self.messages):
+            # The history was replaced wholesale; recount from scratch.
+            self._reset_window()
+
+        pinned = self._pinned_count()
+        self._window_start = max(self._window_start, pinned)
+        for index in range(max(self._counted, self._window_start), len(self.messages)):
+            message = self.messages[index]
+            if message.role == "tool":
+                self._cap_tool_result(message)
+            self._window_tokens += message_tokens(message, self.count_tokens)
+        self._counted = len(self.messages)
+
+        fixed = self._tools_tokens + sum(message_tokens(message, self.count_tokens) for message in self.messages[:pinned])
+        if self._evicted:
+            fixed += message_tokens(self._history_note, self.count_tokens)
+        last = len(self.messages) - 1
+        if fixed + self._window_tokens > self.context_budget:
+            # Trim in one block down to the compaction target, so the following
+            # rounds only append and the request prefix stays cacheable.
+            if not self._evicted:
+                fixed += message_tokens(self._history_note, self.count_tokens)
+            target = self.context_budget * self.compaction_target // 100
+            while self._window_start < last and fixed + self._window_tokens > target:
+                self._drop_oldest()
+        # A tool result cannot lead the window once its tool call is gone.
+        while self._window_start < last and self.messages[self._window_start].role == "tool":
+            self._drop_oldest()
+        if self._unsummarized:
+            self._summarize_trimmed()
+
+        # Forget dropped messages once they are the majority, keeping the
+        # per-message cost of the list shift constant.
+        dropped = self._window_start - pinned
+        if dropped and dropped * 2 >= len(self.messages):
+            del self.messages[pinned:self._window_start]
+            self._counted -= dropped
+            self._window_start = pinned
+
+    def _drop_oldest(self) -> None:
+        message = self.messages[self._window_start]
+        self._window_tokens -= message_tokens(message, self.count_tokens)
+        self._window_start += 1
+        self._evicted += 1
+        # A trimmed result can no longer be referred to.
+        self._tool_memo.clear()
+        if self.summarizer is not None:
+            self._unsummarized.append(message)
+
+    @property
+    def _history_note(self) -> Message:
+        """What stands in for trimmed messages: their summary, or the fixed trim note."""
+        return self._summary if self._summary is not None else self._context_note
+
+    def _summarize_trimmed(self) -> None:
+        """Start summarizing trimmed messages, or reuse a cached summary at once."""
+        assert self.summarizer is not None
+        if self._summary_job is not None:
+            # One job at a time; these messages are picked up when it finishes.
+            return
+        previous = self._summary_text()
+        segment, self._unsummarized = self._unsummarized, []
+        cached = self.summarizer.cached(segment_key(previous, segment))
+        if cached is not None:
+            self._set_summary(cached)
             return
+        self._summary_job = self.summarizer.submit(previous, segment)
 
-        system_msg = self.messages[0] if self.messages[0].role == "system" else None
-        start = 1 if system_msg else 0
-
-        # Keep only the most recent messages
-        recent = self.messages[-(self._MAX_CONTEXT_MESSAGES):]
-
-        # Build trimmed list
-        trimmed: List[Message] = []
-        if system_msg:
-            trimmed.append(system_msg)
-
-        # Add a context note about trimmed history
-        trimmed_count = len(self.messages) - len(recent) - start
-        if trimmed_count > 0:
-            trimmed.append(Message(
-                role="system",
-                content=f"[Context note: {trimmed_count} earlier messages were trimmed to save context space. Focus on the recent conversation.]",
-            ))
-
-        # Summarize large tool results in recent messages
-        for msg in recent:
-            if msg.role == "tool" and msg.content and len(msg.content) > 2000:
-                trimmed.append(Message(
-                    role=msg.role,
-                    content=msg.content[:1500] + "\n... [truncated — result was too large]",
-                    tool_call_id=msg.tool_call_id,
-                    name=msg.name,
-                ))
-            else:
-                trimmed.append(msg)
+    def _collect_summary(self) -> None:
+        """Adopt a finished background summary; called between turns, never blocks."""
+        job = self._summary_job
+        if job is None or not job.done():
+            return
+        self._summary_job = None
+        try:
+            self._set_summary(job.result())
+        except Exception as exc:  # noqa: BLE001 - those messages stay covered by the trim note only
+            _logger.warning("History summarization failed: %s", exc)
+        if self._unsummarized:
+            self._summarize_trimmed()
+
+    def _summary_text(self) -> Optional[str]:
+        if self._summary is None or self._summary.content is None:
+            return None
+        return self._summary.content[len(SUMMARY_PREFIX):].strip()
+
+    def _set_summary(self, text: str) -> None:
+        summary = Message(role="system", content=f"{SUMMARY_PREFIX}\n{text}")
+        self._cap_message(summary, max(self.context_budget // self._MAX_SUMMARY_SHARE, 1))
+        self._summary = summary
 
-        self.messages = trimmed
+    def _cap_tool_result(self, message: Message) -> None:
+        self._cap_message(message, max(self.context_budget // self._MAX_TOOL_RESULT_SHARE, 1))
+
+    def _cap_message(self, message: Message, limit: int) -> None:
+        if not message.content or message_tokens(message, self.count_tokens) <= limit:
+            return
+        ratio = limit / message_tokens(message, self.count_tokens)
+        keep = max(int(len(message.content) * ratio) - len(self._TRUNCATION_MARKER), 0)
+        message.content = message.content[:keep] + self._TRUNCATION_MARKER
+        message.invalidate()
 
     def run(
         self,
         tool_event_handler: Optional[
             Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], None]
         ] = None,
+        cancel: Optional[CancelToken] = None,
     ) -> str:
-        """Run a conversation turn using the current message history."""
+        """Run a conversation turn using the current message history.
+
+        ``tool_event_handler`` is called with the phase (``"start"``,
+        ``"progress"`` for live script output, ``"end"``), the tool call and
+        the result, or ``{"stream", "text"}`` for progress.
+
+        Cancelling ``cancel`` aborts the LLM request in flight and kills
+        running scripts; the turn then raises ``OperationCancelledError``.
+        """
+        for event in self._turn_events(streaming=False, progress=tool_event_handler is not None, cancel=cancel):
+            if event["type"] == "tool":
+                if tool_event_handler:
+                    tool_event_handler(event["phase"], event["tool_call"], event["result"])
+                elif event["phase"] == "end":
+                    self._display_tool_event(event["tool_call"], event["result"])
+            elif event["type"] == "final":
+                return str(event["content"])
+        raise ToolExecutionError("Conversation ended without a final response")
+
+    def stream(self, cancel: Optional[CancelToken] = None) -> Iterator[Dict[str, Any]]:
+        """Run a conversation turn, yielding events as they happen.
+
+        Events are ``{"type": "content", "delta": ...}`` for tokens streamed
+        from the LLM, ``{"type": "tool", "phase": "start" | "end", ...}`` around
+        each tool call, ``"progress"`` tool events carrying script output as it
+        is printed, and a closing ``{"type": "final", "content": ...}``.
+        """
+        return self._turn_events(streaming=True, progress=True, cancel=cancel)
+
+    def _turn_events(
+        self, streaming: bool, progress: bool = False, cancel: Optional[CancelToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        # Files may have been edited between turns; memoize within a turn only.
+        self._tool_memo.clear()
+        self._route_skills()
+        self._collect_summary()
         rounds = 0
         while rounds < self._MAX_TOOL_ROUNDS:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
             self._trim_context()
-            response_message = self.client.chat(self._serialize_messages(), self.tools)
-            tool_calls = response_message.get("tool_calls")
-            content = response_message.get("content")
+            if streaming:
+                response_message: Dict[str, Any] = {}
+                chunks = self.client.stream_chat(self._serialize_messages(), self.tools, **_cancel_kwargs(cancel))
+                for chunk in chunks:
+                    if chunk["type"] == "content":
+                        yield chunk
+                    elif chunk["type"] == "message":
+                        response_message = chunk["message"]
+            else:
+                response_message = self.client.chat(self._serialize_messages(), self.tools, **_cancel_kwargs(cancel))
+            tool_calls, content = self._record_response(response_message)
 
-            self.messages.append(
-                Message(role="assistant", content=content, tool_calls=tool_calls)
-            )
+            if tool_calls:
+                rounds += 1
+                try:
+                    yield from self._tool_events(tool_calls, progress, cancel)
+                except OperationCancelledError:
+                    self._record_cancelled_tools(tool_calls)
+                    raise
+                continue
+
+            yield {"type": "final", "content": content}
+            return
+
+        notice = f"Reached maximum tool rounds ({self._MAX_TOOL_ROUNDS}). Stopping to prevent infinite loop."
+        if streaming:
+            yield {"type": "content", "delta": notice}
+        yield {"type": "final", "content": notice}
+
+    async def arun(
+        self,
+        tool_event_handler: Optional[
+            Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], None]
+        ] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """Async counterpart of ``run``; tools run without blocking the event loop."""
+        async for event in self._aturn_events(
+            streaming=False, progress=tool_event_handler is not None, cancel=cancel
+        ):
+            if event["type"] == "tool":
+                if tool_event_handler:
+                    tool_event_handler(event["phase"], event["tool_call"], event["result"])
+            elif event["type"] == "final":
+                return str(event["content"])
+        raise ToolExecutionError("Conversation ended without a final response")
+
+    def astream(self, cancel: Optional[CancelToken] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of ``stream``, yielding the same events."""
+        return self._aturn_events(streaming=True, progress=True, cancel=cancel)
+
+    async def _aturn_events(
+        self, streaming: bool, progress: bool = False, cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        self._tool_memo.clear()
+        if self.routing_top_k > 0:
+            await asyncio.to_thread(self._route_skills)
+        self._collect_summary()
+        rounds = 0
+        while rounds < self._MAX_TOOL_ROUNDS:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            self._trim_context()
+            if streaming:
+                response_message: Dict[str, Any] = {}
+                async for chunk in self.client.astream_chat(
+                    self._serialize_messages(), self.tools, **_cancel_kwargs(cancel)
+                ):
+                    if chunk["type"] == "content":
+                        yield chunk
+                    elif chunk["type"] == "message":
+                        response_message = chunk["message"]
+            else:
+                response_message = await self.client.achat(
+                    self._serialize_messages(), self.tools, **_cancel_kwargs(cancel)
+                )
+            tool_calls, content = self._record_response(response_message)
 
             if tool_calls:
                 rounds += 1
-                for tool_call in tool_calls:
-                    if tool_event_handler:
-                        tool_event_handler("start", tool_call, None)
-                    result = self._execute_tool(tool_call)
-                    if tool_event_handler:
-                        tool_event_handler("end", tool_call, result)
-                    else:
-                        self._display_tool_event(tool_call, result)
-                    self.messages.append(
-                        Message(
-                            role="tool",
-                            tool_call_id=tool_call.get("id"),
-                            name=tool_call.get("function", {}).get("name"),
-                            content=json.dumps(result),
-                        )
-                    )
+                try:
+                    async for event in self._atool_events(tool_calls, progress, cancel):
+                        yield event
+                except OperationCancelledError:
+                    self._record_cancelled_tools(tool_calls)
+                    raise
                 continue
 
-            if not isinstance(content, str):
-                raise ToolExecutionError("LLM response missing content")
-            return content
+            yield {"type": "final", "content": content}
+            return
 
-        return f"Reached maximum tool rounds ({self._MAX_TOOL_ROUNDS}). Stopping to prevent infinite loop."
+        notice = f"Reached maximum tool rounds ({self._MAX_TOOL_ROUNDS}). Stopping to prevent infinite loop."
+        if streaming:
+            yield {"type": "content", "delta": notice}
+        yield {"type": "final", "content": notice}
 
-    def _serialize_messages(self) -> List[Dict[str, Any]]:
-        """Convert Message objects to API payload dictionaries."""
-        return [message.to_dict() for message in self.messages]
+    def _tool_events(
+        self, tool_calls: List[Dict[str, Any]], progress: bool = False, cancel: Optional[CancelToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Execute a round's tool calls, yielding start/end events as they happen.
 
-    def _execute_tool(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
-        """Dispatch a tool call and return its result payload."""
+        Independent calls run concurrently on the shared tool executor; results
+        are appended to the history in the original ``tool_calls`` order. With
+        ``progress``, script output is yielded as ``"progress"`` events too.
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        for batch in plan_tool_batches(tool_calls):
+            # A script reporting progress runs on the executor so its events can be yielded meanwhile.
+            if len(batch) == 1 and not (progress and tool_name(tool_calls[batch[0]]) in _PROGRESS_TOOLS):
+                tool_call = tool_calls[batch[0]]
+                yield {"type": "tool", "phase": "start", "tool_call": tool_call, "result": None}
+                with parallel_slots(), tool_slots(tool_name(tool_call)):
+                    results[batch[0]] = self._execute_tool(tool_call, cancel=cancel)
+                yield {"type": "tool", "phase": "end", "tool_call": tool_call, "result": results[batch[0]]}
+                continue
+
+            events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+
+            def work(index: int) -> None:
+                tool_call = tool_calls[index]
+                with parallel_slots(), tool_slots(tool_name(tool_call)):
+                    events.put({"type": "tool", "phase": "start", "tool_call": tool_call, "result": None})
+                    on_output = _progress_callback(tool_call, events.put) if progress else None
+                    try:
+                        results[index] = self._execute_tool(tool_call, on_output, cancel)
+                    except Exception as exc:  # noqa: BLE001 - re-raised on the caller's thread
+                        events.put({"type": "failed", "error": exc})
+                        return
+                    events.put({"type": "tool", "phase": "end", "tool_call": tool_call, "result": results[index]})
+
+            executor = get_tool_executor()
+            for index in batch:
+                executor.submit(work, index)
+
+            failure: Optional[BaseException] = None
+            pending = len(batch)
+            while pending:
+                event = events.get()
+                if event["type"] == "failed":
+                    failure = failure or event["error"]
+                    pending -= 1
+                    continue
+                if event["phase"] == "end":
+                    pending -= 1
+                yield event
+            if failure is not None:
+                raise failure
+
+        for index, tool_call in enumerate(tool_calls):
+            self._record_tool_result(tool_call, results[index])
+
+    async def _atool_events(
+        self, tool_calls: List[Dict[str, Any]], progress: bool = False, cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of ``_tool_events`` using tasks and the shared tool limiters."""
+        loop = asyncio.get_running_loop()
+        results: Dict[int, Dict[str, Any]] = {}
+        for batch in plan_tool_batches(tool_calls):
+            events: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+            async def work(index: int) -> None:
+                tool_call = tool_calls[index]
+                async with parallel_slots(), tool_slots(tool_name(tool_call)):
+                    await events.put({"type": "tool", "phase": "start", "tool_call": tool_call, "result": None})
+                    on_output = None
+                    if progress:
+                        # Output may be reported from a worker thread.
+                        on_output = _progress_callback(
+                            tool_call, lambda event: loop.call_soon_threadsafe(events.put_nowait, event)
+                        )
+                    try:
+                        results[index] = await self._aexecute_tool(tool_call, on_output, cancel)
+                    except Exception as exc:  # noqa: BLE001 - re-raised by the consumer below
+                        await events.put({"type": "failed", "error": exc})
+                        return
+                    await events.put({"type": "tool", "phase": "end", "tool_call": tool_call, "result": results[index]})
+
+            tasks = [asyncio.ensure_future(work(index)) for index in batch]
+            failure: Optional[BaseException] = None
+            try:
+                pending = len(batch)
+                while pending:
+                    event = await events.get()
+                    if event["type"] == "failed":
+                        failure = failure or event["error"]
+                        pending -= 1
+                        continue
+                    if event["phase"] == "end":
+                        pending -= 1
+                    yield event
+            finally:
+                for task in tasks:
+                    task.cancel()
+            if failure is not None:
+                raise failure
+
+        for index, tool_call in enumerate(tool_calls):
+            self._record_tool_result(tool_call, results[index])
+
+    def _record_response(self, response_message: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """Append the assistant message; returns its tool calls and text content."""
+        tool_calls = response_message.get("tool_calls")
+        content = response_message.get("content")
+
+        self._append(Message(role="assistant", content=content, tool_calls=tool_calls))
+
+        if not tool_calls and not isinstance(content, str):
+            raise ToolExecutionError("LLM response missing content")
+        return tool_calls, content if isinstance(content, str) else ""
+
+    def _record_cancelled_tools(self, tool_calls: List[Dict[str, Any]]) -> None:
+        """Answer a round's tool calls as cancelled, so the stored history stays a valid request."""
+        for tool_call in tool_calls:
+            self._record_tool_result(tool_call, {"error": "Tool call cancelled"})
+
+    def _record_tool_result(self, tool_call: Dict[str, Any], result: Dict[str, Any]) -> None:
+        self._append(
+            Message(
+                role="tool",
+                tool_call_id=tool_call.get("id"),
+                name=tool_call.get("function", {}).get("name"),
+                content=json.dumps(result),
+            )
+        )
+
+    def _context_messages(self) -> List[Message]:
+        """Messages to send: the system prompt, a trim note if needed, then the window."""
+        pinned = self._pinned_count()
+        context = self.messages[:pinned]
+        if self._evicted:
+            context.append(self._history_note)
+        context.extend(self.messages[max(self._window_start, pinned):])
+        return context
+
+    def _serialize_messages(self) -> EncodedMessages:
+        """Convert Message objects to API payload dictionaries with their cached JSON."""
+        context = self._context_messages()
+        fragments = [message.encoded() for message in context]
+        self._record_prefix_reuse(context, fragments)
+        return EncodedMessages([message.to_dict() for message in context], fragments)
+
+    def _record_prefix_reuse(self, context: List[Message], fragments: List[bytes]) -> None:
+        """Update ``prefix_stats`` with the tokens shared with the previous request."""
+        reused = self._tools_tokens if self._last_fragments else 0
+        total = self._tools_tokens
+        matching = bool(self._last_fragments)
+        for index, (message, fragment) in enumerate(zip(context, fragments)):
+            tokens = message_tokens(message, self.count_tokens)
+            total += tokens
+            if matching and index < len(self._last_fragments) and (
+                fragment is self._last_fragments[index] or fragment == self._last_fragments[index]
+            ):
+                reused += tokens
+            else:
+                matching = False
+        self._last_fragments = fragments
+        self.prefix_stats.record(total, reused)
+        _logger.debug("Request prefix reuse: %d of %d tokens", reused, total)
+
+    def _parse_tool_call(self, tool_call: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any], Optional[str]]:
+        """Return (name, params, error) for a tool call."""
         function = tool_call.get("function", {})
         name = function.get("name")
         arguments = function.get("arguments", "{}")
@@ -178,10 +675,111 @@ class Conversation:
         try:
             params = json.loads(arguments)
         except json.JSONDecodeError as exc:
-            return {"error": f"Invalid tool arguments: {exc}"}
+            return name, {}, f"Invalid tool arguments: {exc}"
+        return name, params, None
+
+    def _execute_tool(
+        self,
+        tool_call: Dict[str, Any],
+        on_output: Optional[OutputCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Dict[str, Any]:
+        """Dispatch a tool call and return its result payload."""
+        name, params, error = self._parse_tool_call(tool_call)
+        if error is not None:
+            return {"error": error}
+        memo_key, reference = self._memoized_result(name, params)
+        if reference is not None:
+            return reference
+        result = self._dispatch_tool(name, params, on_output, cancel)
+        if self.artifacts.has_oversized(result):
+            result = self.artifacts.spill(result)
+        self._remember_result(memo_key, name, tool_call, result)
+        return result
 
+    async def _aexecute_tool(
+        self,
+        tool_call: Dict[str, Any],
+        on_output: Optional[OutputCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Dict[str, Any]:
+        """Async dispatch: scripts run as asyncio subprocesses, file tools in a thread."""
+        name, params, error = self._parse_tool_call(tool_call)
+        if error is not None:
+            return {"error": error}
+        memo_key, reference = self._memoized_result(name, params)
+        if reference is not None:
+            return reference
+        if name == "run_python_script":
+            result = await arun_python_script(
+                params.get("skill_name", ""),
+                params.get("script", ""),
+                self.skills_folder,
+                self.client.timeout_seconds,
+                on_output,
+                self.session_id,
+                cancel,
+            )
+        else:
+            result = await asyncio.to_thread(self._dispatch_tool, name, params)
+        if self.artifacts.has_oversized(result):
+            result = await asyncio.to_thread(self.artifacts.spill, result)
+        self._remember_result(memo_key, name, tool_call, result)
+        return result
+
+    def _memoized_result(
+        self, name: Optional[str], params: Dict[str, Any]
+    ) -> Tuple[Optional[Tuple[str, str, int]], Optional[Dict[str, Any]]]:
+        """Return (memo key, reference) where reference points to an identical earlier result.
+
+        The key carries the catalog generation seen before the call runs.
+        """
+        if name in _MUTATING_TOOLS:
+            self._tool_memo.clear()
+            return None, None
+        if name not in _MEMOIZED_TOOLS:
+            return None, None
+        arguments = json.dumps(params, sort_keys=True)
+        generation = get_catalog(self.skills_folder).generation
+        key = (name, arguments, generation)
+        cached = self._tool_memo.get((name, arguments))
+        if cached is None:
+            return key, None
+        call_id, cached_generation = cached
+        if cached_generation != generation:
+            # Skills changed outside this conversation, e.g. a confirmed create_skill.
+            self._tool_memo.clear()
+            return key, None
+        return key, {
+            "unchanged": True,
+            "same_as_call": call_id,
+            "note": f"Same arguments as tool call {call_id} and nothing changed since; reuse that result.",
+        }
+
+    def _remember_result(
+        self,
+        key: Optional[Tuple[str, str, int]],
+        name: Optional[str],
+        tool_call: Dict[str, Any],
+        result: Dict[str, Any],
+    ) -> None:
+        if name in _MUTATING_TOOLS:
+            # Clear again: a call that started before the write may have finished during it.
+            self._tool_memo.clear()
+        elif key is not None and tool_call.get("id") and "error" not in result:
+            self._tool_memo[key[:2]] = (tool_call["id"], key[2])
+
+    def _dispatch_tool(
+        self,
+        name: Optional[str],
+        params: Dict[str, Any],
+        on_output: Optional[OutputCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Dict[str, Any]:
         if name == "list_skills":
             return list_skills(self.skills_folder)
+        if name == "search_skills":
+            return search_skills(params.get("query", ""), self.skills_folder, params.get("limit", 5))
         if name == "get_skill":
             return get_skill(params.get("skill_name", ""), self.skills_folder)
         if name == "read_files_in_skill":
@@ -190,12 +788,22 @@ class Conversation:
                 params.get("file_paths", []),
                 self.skills_folder,
             )
+        if name == "read_artifact":
+            return self.artifacts.read(
+                params.get("artifact_id", ""),
+                params.get("offset", 0),
+                params.get("limit"),
+                params.get("unit", "lines"),
+            )
         if name == "run_python_script":
             return run_python_script(
                 params.get("skill_name", ""),
                 params.get("script", ""),
                 self.skills_folder,
                 self.client.timeout_seconds,
+                on_output,
+                self.session_id,
+                cancel,
             )
         if name == "write_file_in_skill":
             return write_file_in_skill(
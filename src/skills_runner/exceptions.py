@@ -12,3 +12,19 @@ class SkillNotFoundError(SkillsRunnerError):
 
 class ToolExecutionError(SkillsRunnerError):
     """Raised when a tool fails to execute."""
+
+
+class SchedulerBusyError(SkillsRunnerError):
+    """Raised when a script cannot be scheduled because the execution queue is saturated."""
+
+    def __init__(self, message: str, retry_after: int) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ProvisioningBusyError(SkillsRunnerError):
+    """Raised when a skill provisioning job cannot be queued because too many are waiting."""
+
+
+class OperationCancelledError(SkillsRunnerError):
+    """Raised when work is abandoned because its cancellation token was cancelled."""
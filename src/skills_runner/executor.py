@@ -1,12 +1,58 @@
 from __future__ import annotations
 
 from pathlib import Path
+import asyncio
+import concurrent.futures
+import json
+import os
+import re
+import signal
 import subprocess
-from typing import Dict
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from .cancellation import SCRIPT_CANCELLED, CancelToken
+from .exceptions import OperationCancelledError, SchedulerBusyError
+from .fork_server import get_fork_server
+from .output_capture import (
+    BoundedBuffer,
+    OutputCallback,
+    OutputForwarder,
+    capture_settings,
+    output_fields,
+    overflow_error,
+)
+from .resource_limits import (
+    CgroupScope,
+    ResourceLimits,
+    limits_spec,
+    record_usage,
+    resource_limits,
+    usage_from_rusage,
+)
+from .scheduler import get_scheduler
+from .venv_store import get_venv_store, skill_venv_key
+from .worker_pool import get_pool, worker_source
+
+PRELOAD_MANIFEST = "preload.txt"
+_READ_CHUNK = 65536
+_READER_JOIN_SECONDS = 5
+_REAP_POLL_SECONDS = 0.05
+# Scheduler session for callers that do not name one, e.g. the CLI.
+_DEFAULT_SESSION = "default"
+
+_MODULE_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+_preload_cache: Dict[Path, Tuple[Tuple[float, ...], List[str]]] = {}
 
 
 def find_python_executable(skill_path: Path) -> Path | None:
-    """Locate the venv Python interpreter for a skill folder."""
+    """Locate the venv Python interpreter for a skill folder.
+
+    A skill's own ``venv`` wins; otherwise the shared venv its
+    ``.skills-venv`` file names is resolved through the venv store, so
+    skills sharing an environment also share its worker pool.
+    """
     venv_path = skill_path / "venv"
     unix_python = venv_path / "bin" / "python"
     windows_python = venv_path / "Scripts" / "python.exe"
@@ -16,38 +62,489 @@ def find_python_executable(skill_path: Path) -> Path | None:
     if windows_python.exists():
         return windows_python
 
+    store = get_venv_store()
+    key = skill_venv_key(skill_path) if store is not None else None
+    if store is not None and key is not None:
+        return store.python_for(key)
     return None
 
 
-def run_script(python_executable: Path, script: str, cwd: Path, timeout: int) -> Dict[str, object]:
-    """Run a Python script with timeout and capture output."""
+def _split_module_names(text: str) -> List[str]:
+    names: List[str] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for part in line.replace(",", " ").split():
+            part = part.strip().strip("'\"[]-")
+            if _MODULE_NAME.match(part) and part not in names:
+                names.append(part)
+    return names
+
+
+def _front_matter_preload(doc_text: str) -> List[str]:
+    """Read ``preload`` from SKILL.md front matter (inline or as a list)."""
+    lines = doc_text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return []
+
+    collected: List[str] = []
+    in_preload = False
+    for line in lines[1:]:
+        if line.strip() == "---":
+            break
+        if in_preload and line.lstrip().startswith("-"):
+            collected.append(line.lstrip()[1:])
+            continue
+        in_preload = False
+        key, sep, value = line.partition(":")
+        if sep and key.strip() == "preload":
+            in_preload = True
+            collected.append(value)
+    return _split_module_names("\n".join(collected))
+
+
+def load_preload_modules(skill_path: Path) -> List[str]:
+    """Return modules a skill asks to preload, from preload.txt or SKILL.md front matter."""
+    sources = [skill_path / PRELOAD_MANIFEST, skill_path / "SKILL.md", skill_path / "SKILL.MD"]
+    stamps: List[float] = []
+    for source in sources:
+        try:
+            stamps.append(source.stat().st_mtime)
+        except OSError:
+            stamps.append(-1.0)
+
+    cached = _preload_cache.get(skill_path)
+    if cached is not None and cached[0] == tuple(stamps):
+        return cached[1]
+
+    modules: List[str] = []
+    for source, stamp in zip(sources, stamps):
+        if stamp < 0:
+            continue
+        try:
+            text = source.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            continue
+        modules = _split_module_names(text) if source.name == PRELOAD_MANIFEST else _front_matter_preload(text)
+        if modules:
+            break
+
+    _preload_cache[skill_path] = (tuple(stamps), modules)
+    return modules
+
+
+def run_script(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    timeout: int,
+    on_output: Optional[OutputCallback] = None,
+    session: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    """Run a Python script with timeout and capture output.
+
+    ``on_output`` receives stdout and stderr text as the script produces it;
+    scripts then run line buffered so output arrives promptly.
+
+    The script first waits for an execution slot from the shared scheduler,
+    where ``session`` identifies the conversation for its quota and fair
+    share. The result's ``queue_wait_seconds`` is how long that took.
+
+    Skills that declare preload modules run in a child forked from a server
+    that already imported them. Otherwise a warm worker from the venv's pool
+    is used when pooling is configured, and a fresh interpreter process when
+    it is not.
+
+    Cancelling ``cancel`` kills the script's process; the result then
+    carries a cancellation error.
+    """
+    if cancel is not None and cancel.cancelled:
+        return _cancelled_result()
+    try:
+        slot = get_scheduler().acquire(session or _DEFAULT_SESSION, cwd.name)
+    except SchedulerBusyError as exc:
+        return _busy_result(exc)
+    with slot:
+        result = _run_script(python_executable, script, cwd, timeout, on_output, cancel)
+    result["queue_wait_seconds"] = slot.queue_wait_seconds
+    return result
+
+
+def _busy_result(exc: SchedulerBusyError) -> Dict[str, object]:
+    return {
+        "stdout": "",
+        "stderr": "",
+        "returncode": -1,
+        "timed_out": False,
+        "error": str(exc),
+        "retry_after_seconds": exc.retry_after,
+    }
+
+
+def _cancelled_result() -> Dict[str, object]:
+    return {"stdout": "", "stderr": "", "returncode": -1, "timed_out": False, "error": SCRIPT_CANCELLED}
+
+
+def _run_script(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    timeout: int,
+    on_output: Optional[OutputCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    modules = load_preload_modules(cwd)
+    if modules:
+        server = get_fork_server(python_executable, modules)
+        if server is not None:
+            return server.run(script, cwd, timeout, on_output, cancel)
+
+    pool = get_pool(python_executable)
+    if pool is not None:
+        return pool.run(script, cwd, timeout, on_output, cancel)
+    return _run_cold(python_executable, script, cwd, timeout, on_output, cancel)
+
+
+def _cold_env(on_output: Optional[OutputCallback]) -> Optional[Dict[str, str]]:
+    # The child inherits our environment either way; only force unbuffered output for live forwarding.
+    return {**os.environ, "PYTHONUNBUFFERED": "1"} if on_output is not None else None
+
+
+def _forwarders(on_output: Optional[OutputCallback], max_bytes: int) -> List[Optional[OutputForwarder]]:
+    if on_output is None:
+        return [None, None]
+    return [OutputForwarder("stdout", on_output, max_bytes), OutputForwarder("stderr", on_output, max_bytes)]
+
+
+class _Reaper:
+    """Wait for a child in a thread with ``wait4`` so its resource usage can be read.
+
+    The child is only reaped while holding the lock, so ``kill`` never
+    signals a pid that may already belong to another process. The child
+    leads its own process group, and ``kill`` takes down the whole group so
+    processes the script started do not outlive it.
+    """
+    def __init__(self, process: subprocess.Popen[bytes]) -> None:
+        self.process = process
+        self.rusage: Any = None
+        self.exited: "concurrent.futures.Future[int]" = concurrent.futures.Future()
+        self._lock = threading.Lock()
+        self._reaped = False
+        threading.Thread(target=self._wait, name=f"reaper-{process.pid}", daemon=True).start()
+
+    def _wait(self) -> None:
+        try:
+            returncode = self._reap()
+        except ChildProcessError:
+            returncode = self.process.returncode if self.process.returncode is not None else -1
+        except BaseException as exc:  # noqa: BLE001 - handed to the waiting caller, which must not hang
+            self.exited.set_exception(exc)
+            return
+        self.exited.set_result(returncode)
+
+    def _reap(self) -> int:
+        if not hasattr(os, "wait4"):
+            return self.process.wait()
+        blocking = hasattr(os, "waitid")
+        while True:
+            if blocking:
+                # Block until exit without reaping, then reap under the lock.
+                os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOWAIT)
+            else:
+                # e.g. macOS has wait4 but no waitid: poll so the lock is never held while waiting.
+                time.sleep(_REAP_POLL_SECONDS)
+            with self._lock:
+                pid, status, rusage = os.wait4(self.process.pid, 0 if blocking else os.WNOHANG)
+                if pid == 0:
+                    continue
+                self.rusage = rusage
+                self._reaped = True
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+                return self.process.returncode
+
+    def kill(self) -> None:
+        if not hasattr(os, "wait4"):
+            self.process.kill()
+            return
+        with self._lock:
+            if not self._reaped:
+                try:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                except OSError:
+                    os.kill(self.process.pid, signal.SIGKILL)
+
+
+def _spawn_cold(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    on_output: Optional[OutputCallback],
+    limits: ResourceLimits,
+    scope: Optional[CgroupScope],
+) -> subprocess.Popen[bytes]:
+    return subprocess.Popen(
+        _cold_command(python_executable, script, limits, scope),
+        cwd=str(cwd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=_cold_env(on_output),
+        start_new_session=os.name == "posix",
+    )
+
+
+def _cold_command(
+    python_executable: Path, script: str, limits: ResourceLimits, scope: Optional[CgroupScope]
+) -> List[str]:
+    """``python -c script``, started through the worker's exec bootstrap when limits apply.
+
+    The bootstrap sets the limits in the new process itself and then execs
+    the script, keeping its pid, so no ``preexec_fn`` runs between fork and
+    exec in the threaded server.
+    """
+    spec = limits_spec(limits, scope)
+    if spec is None:
+        return [str(python_executable), "-c", script]
+    spec["executable"] = str(python_executable)
+    return [str(python_executable), "-c", worker_source(), "exec", json.dumps(spec), script]
+
+
+def _spawn_error(exc: OSError, scope: Optional[CgroupScope]) -> Dict[str, object]:
+    if scope is not None:
+        scope.remove()
+    return {
+        "stdout": "",
+        "stderr": "",
+        "returncode": -1,
+        "timed_out": False,
+        "error": f"Error executing script: {exc}",
+    }
+
+
+def _run_cold(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    timeout: int,
+    on_output: Optional[OutputCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    """Run a script in a newly started interpreter process.
+
+    Both pipes are drained as the script runs into bounded buffers, so a
+    script printing without end cannot exhaust the server's memory.
+    """
+    settings = capture_settings()
+    limits = resource_limits()
+    scope = CgroupScope.create(limits)
+    started = time.perf_counter()
+    try:
+        process = _spawn_cold(python_executable, script, cwd, on_output, limits, scope)
+    except (OSError, subprocess.SubprocessError) as exc:
+        return _spawn_error(OSError(str(exc)), scope)
+
+    reaper = _Reaper(process)
+    stop_watching = cancel.on_cancel(reaper.kill) if cancel is not None else None
+    stdout = BoundedBuffer(settings.max_bytes)
+    stderr = BoundedBuffer(settings.max_bytes)
+    overflow = threading.Event()
+    forward_stdout, forward_stderr = _forwarders(on_output, settings.max_bytes)
+
+    def drain(stream: IO[bytes], buffer: BoundedBuffer, forwarder: Optional[OutputForwarder]) -> None:
+        with stream:
+            for chunk in iter(lambda: stream.read1(_READ_CHUNK), b""):  # type: ignore[attr-defined]
+                buffer.feed(chunk)
+                if forwarder is not None:
+                    forwarder.feed(chunk)
+                if settings.kill_on_overflow and buffer.overflowed and not overflow.is_set():
+                    overflow.set()
+                    reaper.kill()
+
+    readers = [
+        threading.Thread(target=drain, args=(process.stdout, stdout, forward_stdout), daemon=True),
+        threading.Thread(target=drain, args=(process.stderr, stderr, forward_stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        returncode = reaper.exited.result(timeout)
+    except concurrent.futures.TimeoutError:
+        reaper.kill()
+        returncode = reaper.exited.result()
+        timed_out = True
+    except BaseException:
+        reaper.kill()
+        reaper.exited.result()
+        raise
+    finally:
+        wall_seconds = time.perf_counter() - started
+        if stop_watching is not None:
+            stop_watching()
+        for reader in readers:
+            # A grandchild may still hold the pipes open; do not wait on it forever.
+            reader.join(_READER_JOIN_SECONDS)
+
+    result = _cold_result(stdout, stderr, returncode, timed_out, overflow.is_set(), timeout, settings.max_bytes)
+    return _finish_cold(_mark_cancelled(result, cancel), reaper, wall_seconds, limits, scope)
+
+
+async def _settle_readers(readers: "asyncio.Future[Any]") -> None:
+    # A process that left the script's group may still hold the pipes open; do not wait on it forever.
+    done, _ = await asyncio.wait([readers], timeout=_READER_JOIN_SECONDS)
+    if done:
+        readers.result()
+        return
+    readers.cancel()
+    await asyncio.wait([readers])  # Lets each reader close its transport.
+
+
+def _finish_cold(
+    result: Dict[str, object],
+    reaper: _Reaper,
+    wall_seconds: float,
+    limits: ResourceLimits,
+    scope: Optional[CgroupScope],
+) -> Dict[str, object]:
+    record_usage(result, usage_from_rusage(reaper.rusage, wall_seconds), limits, scope)
+    if scope is not None:
+        scope.remove()
+    return result
+
+
+def _mark_cancelled(result: Dict[str, object], cancel: Optional[CancelToken]) -> Dict[str, object]:
+    """Report a script killed because its caller went away as cancelled rather than failed."""
+    if cancel is not None and cancel.cancelled and "error" not in result and result["returncode"] != 0:
+        result["returncode"] = -1
+        result["error"] = SCRIPT_CANCELLED
+    return result
+
+
+def _cold_result(
+    stdout: BoundedBuffer,
+    stderr: BoundedBuffer,
+    returncode: int,
+    timed_out: bool,
+    overflowed: bool,
+    timeout: int,
+    max_bytes: int,
+) -> Dict[str, object]:
+    result: Dict[str, object] = {
+        **output_fields(stdout, stderr),
+        "returncode": -1 if timed_out or overflowed else returncode,
+        "timed_out": timed_out,
+    }
+    if overflowed:
+        result["error"] = overflow_error(max_bytes)
+    elif timed_out:
+        result["error"] = f"Script execution exceeded timeout of {timeout} seconds"
+    return result
+
+
+async def arun_script(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    timeout: int,
+    on_output: Optional[OutputCallback] = None,
+    session: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    """Async counterpart of ``run_script``.
+
+    Waiting for an execution slot does not hold a thread. Cold starts read
+    their pipes on the event loop. Fork servers and pooled workers speak a
+    blocking protocol, so those paths run in a worker thread.
+    """
+    if cancel is not None and cancel.cancelled:
+        return _cancelled_result()
+    acquire = get_scheduler().aacquire(session or _DEFAULT_SESSION, cwd.name)
     try:
-        result = subprocess.run(
-            [str(python_executable), "-c", script],
-            cwd=str(cwd),
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-            "timed_out": False,
-        }
-    except subprocess.TimeoutExpired as exc:
-        return {
-            "stdout": exc.stdout or "",
-            "stderr": exc.stderr or "",
-            "returncode": -1,
-            "timed_out": True,
-            "error": f"Script execution exceeded timeout of {timeout} seconds",
-        }
-    except OSError as exc:
-        return {
-            "stdout": "",
-            "stderr": "",
-            "returncode": -1,
-            "timed_out": False,
-            "error": f"Error executing script: {exc}",
-        }
+        slot = await (cancel.race(acquire) if cancel is not None else acquire)
+    except SchedulerBusyError as exc:
+        return _busy_result(exc)
+    except OperationCancelledError:
+        return _cancelled_result()
+    with slot:
+        if load_preload_modules(cwd) or get_pool(python_executable) is not None:
+            result = await asyncio.to_thread(
+                _run_script, python_executable, script, cwd, timeout, on_output, cancel
+            )
+        else:
+            result = await _arun_cold(python_executable, script, cwd, timeout, on_output, cancel)
+    result["queue_wait_seconds"] = slot.queue_wait_seconds
+    return result
+
+
+async def _arun_cold(
+    python_executable: Path,
+    script: str,
+    cwd: Path,
+    timeout: int,
+    on_output: Optional[OutputCallback] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    settings = capture_settings()
+    limits = resource_limits()
+    scope = CgroupScope.create(limits)
+    started = time.perf_counter()
+    try:
+        process = _spawn_cold(python_executable, script, cwd, on_output, limits, scope)
+    except (OSError, subprocess.SubprocessError) as exc:
+        return _spawn_error(OSError(str(exc)), scope)
+
+    # The child is reaped by our own thread rather than asyncio's child watcher,
+    # which would discard its resource usage; only the pipes live on the loop.
+    reaper = _Reaper(process)
+    exited = asyncio.wrap_future(reaper.exited)
+    stop_watching = cancel.on_cancel(reaper.kill) if cancel is not None else None
+    loop = asyncio.get_running_loop()
+    stdout = BoundedBuffer(settings.max_bytes)
+    stderr = BoundedBuffer(settings.max_bytes)
+    overflow = asyncio.Event()
+    forward_stdout, forward_stderr = _forwarders(on_output, settings.max_bytes)
+
+    async def drain(pipe: Optional[IO[bytes]], buffer: BoundedBuffer, forwarder: Optional[OutputForwarder]) -> None:
+        if pipe is None:
+            return
+        stream = asyncio.StreamReader()
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), pipe)
+        try:
+            while True:
+                chunk = await stream.read(_READ_CHUNK)
+                if not chunk:
+                    return
+                buffer.feed(chunk)
+                if forwarder is not None:
+                    forwarder.feed(chunk)
+                if settings.kill_on_overflow and buffer.overflowed and not overflow.is_set():
+                    overflow.set()
+                    reaper.kill()
+        finally:
+            transport.close()
+
+    readers = asyncio.gather(
+        drain(process.stdout, stdout, forward_stdout), drain(process.stderr, stderr, forward_stderr)
+    )
+    timed_out = False
+    try:
+        returncode = await asyncio.wait_for(asyncio.shield(exited), timeout)
+    except asyncio.TimeoutError:
+        reaper.kill()
+        returncode = await exited
+        timed_out = True
+    except asyncio.CancelledError:
+        reaper.kill()
+        readers.cancel()
+        await exited
+        if scope is not None:
+            scope.remove()
+        raise
+    finally:
+        if stop_watching is not None:
+            stop_watching()
+    wall_seconds = time.perf_counter() - started
+    await _settle_readers(readers)
+
+    result = _cold_result(stdout, stderr, returncode, timed_out, overflow.is_set(), timeout, settings.max_bytes)
+    return _finish_cold(_mark_cancelled(result, cancel), reaper, wall_seconds, limits, scope)
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import atexit
+import json
+import logging
+import os
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+from .cancellation import SCRIPT_CANCELLED, CancelToken
+from .output_capture import FileTailer, OutputCallback, output_file_cap, overflow_error
+from .resource_limits import CgroupScope, record_usage, resource_limits
+from .worker_pool import (
+    job_output_fields,
+    job_overflowed,
+    job_tailer,
+    reply_usage,
+    wait_slices,
+    worker_source,
+)
+
+_logger = logging.getLogger(__name__)
+
+_READY_TIMEOUT_SECONDS = 60
+
+
+class ForkServer:
+    """A venv interpreter with preloaded modules that forks one child per script."""
+    def __init__(self, python_executable: Path, modules: List[str]) -> None:
+        self.python_executable = python_executable
+        self.modules = list(modules)
+        self._active = 0
+        self._retired = False
+        self._state_lock = threading.Lock()
+        self._scratch = Path(tempfile.mkdtemp(prefix="skills-runner-fork-"))
+        self.socket_path = self._scratch / "server.sock"
+        self._process = subprocess.Popen(
+            [
+                str(python_executable),
+                "-c",
+                worker_source(),
+                "fork",
+                str(self.socket_path),
+                ",".join(self.modules),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        start_time = time.perf_counter()
+        if not self._wait_ready():
+            self.close()
+            raise OSError(f"Fork server for {python_executable} did not become ready")
+        _logger.info(
+            "Fork server %s for %s preloaded %s in %.2fms",
+            self._process.pid,
+            python_executable,
+            ", ".join(self.modules),
+            (time.perf_counter() - start_time) * 1000,
+        )
+
+    def _wait_ready(self) -> bool:
+        assert self._process.stdout is not None
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._process.stdout, selectors.EVENT_READ)
+            if not selector.select(_READY_TIMEOUT_SECONDS):
+                return False
+        return self._process.stdout.readline().strip() == "ready"
+
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def run(
+        self,
+        script: str,
+        cwd: Path,
+        timeout: int,
+        on_output: Optional[OutputCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Dict[str, object]:
+        """Run a script in a child forked from the preloaded server.
+
+        With a cgroup root configured the child joins a cgroup of its own
+        before it runs the script.
+        """
+        with self._state_lock:
+            self._active += 1
+        try:
+            limits = resource_limits()
+            scope = CgroupScope.create(limits)
+            started = time.perf_counter()
+            try:
+                result, reply = self._run(
+                    script, cwd, timeout, on_output, limits.rlimits(scope is not None), scope, cancel
+                )
+                return record_usage(result, reply_usage(reply, started), limits, scope)
+            finally:
+                if scope is not None:
+                    scope.remove()
+        finally:
+            with self._state_lock:
+                self._active -= 1
+                idle_retired = self._retired and self._active == 0
+            if idle_retired:
+                self.close()
+
+    def _run(
+        self,
+        script: str,
+        cwd: Path,
+        timeout: int,
+        on_output: Optional[OutputCallback],
+        rlimits: Dict[str, int],
+        scope: Optional[CgroupScope],
+        cancel: Optional[CancelToken] = None,
+    ) -> Tuple[Dict[str, object], Optional[Dict[str, object]]]:
+        with tempfile.TemporaryDirectory(prefix="skills-runner-") as scratch:
+            stdout_path = Path(scratch) / "stdout"
+            stderr_path = Path(scratch) / "stderr"
+            job: Dict[str, object] = {
+                "script": script,
+                "cwd": str(cwd),
+                "stdout_path": str(stdout_path),
+                "stderr_path": str(stderr_path),
+                "line_buffered": on_output is not None,
+                "rlimits": rlimits,
+            }
+            if scope is not None:
+                job["cgroup"] = str(scope.path)
+            tailer = job_tailer(job, on_output)
+            try:
+                reply, failure = self._exchange(job, timeout, tailer, cancel)
+            except OSError as exc:
+                return {
+                    "stdout": "",
+                    "stderr": "",
+                    "returncode": -1,
+                    "timed_out": False,
+                    "error": f"Error executing script: {exc}",
+                }, None
+
+            if tailer is not None:
+                tailer.poll()
+            if failure is not None:
+                if failure == "timeout":
+                    error = f"Script execution exceeded timeout of {timeout} seconds"
+                elif failure == "overflow":
+                    error = overflow_error(output_file_cap())
+                else:
+                    error = SCRIPT_CANCELLED
+                return {
+                    **job_output_fields(stdout_path, stderr_path),
+                    "returncode": -1,
+                    "timed_out": failure == "timeout",
+                    "error": error,
+                }, None
+
+            returncode = reply.get("returncode", reply.get("exit_status", -1))
+            return {
+                **job_output_fields(stdout_path, stderr_path),
+                "returncode": int(returncode),  # type: ignore[call-overload]
+                "timed_out": False,
+            }, reply
+
+    def _exchange(
+        self,
+        job: Dict[str, object],
+        timeout: int,
+        tailer: Optional[FileTailer] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Tuple[Dict[str, object], Optional[str]]:
+        """Send a job and wait for its reply.
+
+        The failure is ``"timeout"``, ``"overflow"``, ``"cancelled"`` or ``None``.
+        """
+        pid: Optional[int] = None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(str(self.socket_path))
+            conn.sendall((json.dumps(job) + "\n").encode("utf-8"))
+            # Raw recv rather than a file wrapper: a timed-out wrapper cannot be read again.
+            pending = b""
+            slices = wait_slices(timeout)
+            while True:
+                newline = pending.find(b"\n")
+                if newline >= 0:
+                    line, pending = pending[:newline], pending[newline + 1:]
+                    reply: Dict[str, object] = json.loads(line)
+                    if "pid" in reply:
+                        pid = int(reply["pid"])  # type: ignore[call-overload]
+                        continue
+                    return reply, None
+
+                wait = next(slices, None)
+                if wait is None:
+                    if pid is not None:
+                        _kill_quietly(pid)
+                    return {}, "timeout"
+                conn.settimeout(max(wait, 0.001))
+                try:
+                    chunk = conn.recv(65536)
+                except socket.timeout:
+                    if tailer is not None:
+                        tailer.poll()
+                    if job_overflowed(job):
+                        if pid is not None:
+                            _kill_quietly(pid)
+                        return {}, "overflow"
+                    if cancel is not None and cancel.cancelled:
+                        if pid is not None:
+                            _kill_quietly(pid)
+                        return {}, "cancelled"
+                    continue
+                if not chunk:
+                    return {}, None
+                pending += chunk
+
+    def retire(self) -> None:
+        """Close the server now if it is idle, otherwise once its last job finishes."""
+        with self._state_lock:
+            self._retired = True
+            idle = self._active == 0
+        if idle:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the server by closing its control pipe."""
+        if self._process.stdin is not None and not self._process.stdin.closed:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+        shutil.rmtree(self._scratch, ignore_errors=True)
+
+
+def _kill_quietly(pid: int) -> None:
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+# Keyed by venv Python and preload list, so skills sharing a venv keep their own servers.
+_servers: Dict[Tuple[Path, Tuple[str, ...]], ForkServer] = {}
+_servers_lock = threading.Lock()
+
+
+def fork_supported() -> bool:
+    return hasattr(os, "fork") and hasattr(socket, "AF_UNIX")
+
+
+def get_fork_server(python_executable: Path, modules: List[str]) -> Optional[ForkServer]:
+    """Return a running fork server for a venv and preload list, starting one if needed.
+
+    Returns ``None`` when forking is unsupported or the server fails to start,
+    so callers can fall back to the regular execution path.
+    """
+    if not fork_supported():
+        return None
+
+    key = (python_executable, tuple(modules))
+    with _servers_lock:
+        server = _servers.get(key)
+        if server is not None and server.alive():
+            return server
+        if server is not None:
+            server.retire()
+            del _servers[key]
+        try:
+            server = ForkServer(python_executable, modules)
+        except OSError as exc:
+            _logger.warning("Falling back from fork server for %s: %s", python_executable, exc)
+            return None
+        _servers[key] = server
+        return server
+
+
+def shutdown_fork_servers() -> None:
+    """Stop every fork server, letting running jobs finish first."""
+    with _servers_lock:
+        servers = list(_servers.values())
+        _servers.clear()
+    for server in servers:
+        server.retire()
+
+
+atexit.register(shutdown_fork_servers)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Union
+import asyncio
+import logging
+import threading
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .exceptions import ConfigError
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HttpPoolSettings:
+    """Keep-alive pool limits for the process-wide LLM HTTP session."""
+    pool_connections: int = 10
+    pool_maxsize: int = 20
+    http2: bool = False
+
+
+class _Http2Response:
+    """Adapt an ``httpx.Response`` to the subset of ``requests.Response`` LLMClient uses."""
+    def __init__(self, response: Any, stream: Any = None) -> None:
+        self._response = response
+        self._stream = stream
+
+    def raise_for_status(self) -> None:
+        try:
+            self._response.raise_for_status()
+        except httpx.HTTPError as exc:
+            self.close()
+            raise requests.HTTPError(str(exc)) from exc
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    def iter_lines(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        try:
+            for line in self._response.iter_lines():
+                yield line.encode("utf-8")
+        except httpx.HTTPError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.__exit__(None, None, None)
+            self._stream = None
+
+    def __enter__(self) -> "_Http2Response":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class Http2Session:
+    """HTTP/2 transport backed by httpx, exposing ``post`` like ``requests.Session``."""
+    def __init__(self, settings: HttpPoolSettings) -> None:
+        try:
+            self._client = httpx.Client(http2=True, limits=_httpx_limits(settings))
+        except ImportError as exc:
+            raise ConfigError("LLM_HTTP2 requires the 'h2' package: pip install 'skills-runner[http2]'") from exc
+
+    def post(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json: Any = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+    ) -> _Http2Response:
+        try:
+            if stream:
+                context = self._client.stream("POST", url, headers=headers, json=json, content=data, timeout=timeout)
+                return _Http2Response(context.__enter__(), context)
+            return _Http2Response(
+                self._client.post(url, headers=headers, json=json, content=data, timeout=timeout)
+            )
+        except httpx.TimeoutException as exc:
+            raise requests.Timeout(str(exc)) from exc
+        except httpx.HTTPError as exc:
+            raise requests.ConnectionError(str(exc)) from exc
+
+    def close(self) -> None:
+        self._client.close()
+
+
+HttpSession = Union[requests.Session, Http2Session]
+
+_settings = HttpPoolSettings()
+_shared_session: Optional[HttpSession] = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _httpx_limits(settings: HttpPoolSettings) -> httpx.Limits:
+    # httpx pools are not partitioned per host, so size the pool for every host.
+    total = settings.pool_connections * settings.pool_maxsize
+    return httpx.Limits(max_connections=total, max_keepalive_connections=total)
+
+
+def _build_session(settings: HttpPoolSettings) -> HttpSession:
+    if settings.http2:
+        return Http2Session(settings)
+
+    session = requests.Session()
+    # Not ``pool_block``: requests gives urllib3 no pool timeout, so a leaked connection
+    # would block every later request. A full pool opens a connection it does not keep.
+    adapter = HTTPAdapter(pool_connections=settings.pool_connections, pool_maxsize=settings.pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure_http_pool(pool_connections: int, pool_maxsize: int, http2: bool = False) -> None:
+    """Set limits for the shared session; an existing session is rebuilt only if they change."""
+    global _settings, _shared_session
+    settings = HttpPoolSettings(pool_connections=pool_connections, pool_maxsize=pool_maxsize, http2=http2)
+    with _session_lock:
+        if settings == _settings:
+            return
+        if settings.http2:
+            # Fail at configuration time rather than on the first LLM request.
+            _build_session(settings).close()
+        _settings = settings
+        previous, _shared_session = _shared_session, None
+    if previous is not None:
+        previous.close()
+
+
+def get_shared_session() -> HttpSession:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = _build_session(_settings)
+            _logger.info(
+                "Created shared LLM HTTP session (hosts=%d, per-host=%d, http2=%s)",
+                _settings.pool_connections,
+                _settings.pool_maxsize,
+                _settings.http2,
+            )
+        return _shared_session
+
+
+def get_shared_async_client() -> httpx.AsyncClient:
+    """Return the keep-alive async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        try:
+            client = httpx.AsyncClient(http2=_settings.http2, limits=_httpx_limits(_settings))
+        except ImportError as exc:
+            raise ConfigError("LLM_HTTP2 requires the 'h2' package: pip install 'skills-runner[http2]'") from exc
+        _async_clients[loop] = client
+    return client
+
+
+async def close_shared_async_client() -> None:
+    """Close the running loop's async client, e.g. on application shutdown."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,37 +1,73 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Optional, TypeVar
+import json
+
+import httpx
 import requests
 
-from .exceptions import ToolExecutionError
+from .cancellation import CancelToken
+from .exceptions import OperationCancelledError, ToolExecutionError
+from .http_session import HttpSession, get_shared_async_client, get_shared_session
+from .payload import build_chat_body
+
+T = TypeVar("T")
 
 
 class LLMClient:
     """OpenAI-compatible chat client for LLM interactions."""
-    def __init__(self, api_key: str, api_base_url: str, model_name: str, timeout_seconds: int = 30) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        api_base_url: str,
+        model_name: str,
+        timeout_seconds: int = 30,
+        session: Optional[HttpSession] = None,
+        async_client: Optional[httpx.AsyncClient] = None,
+    ) -> None:
         self.api_key = api_key
         self.api_base_url = api_base_url.rstrip("/")
         self.model_name = model_name
         self.timeout_seconds = timeout_seconds
+        self._session = session
+        self._async_client = async_client
 
-    def chat(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Send a chat completion request and return the assistant message."""
-        url = f"{self.api_base_url}/chat/completions"
-        headers = {
+    @property
+    def session(self) -> HttpSession:
+        """HTTP session used for requests; the process-wide keep-alive pool by default."""
+        return self._session if self._session is not None else get_shared_session()
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Async HTTP client used by ``achat``; shared per event loop by default."""
+        return self._async_client if self._async_client is not None else get_shared_async_client()
+
+    def _headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
-        payload = {
-            "model": self.model_name,
-            "messages": messages,
-            "tools": tools,
-            "tool_choice": "auto",
-        }
-        
-        print(payload)
+
+    def _body(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], stream: bool = False) -> bytes:
+        return build_chat_body(self.model_name, messages, tools, stream=stream)
+
+    def chat(
+        self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], cancel: Optional[CancelToken] = None
+    ) -> Dict[str, Any]:
+        """Send a chat completion request and return the assistant message.
+
+        When ``cancel`` is cancelled the call stops waiting for the response
+        and raises ``OperationCancelledError``.
+        """
+        url = f"{self.api_base_url}/chat/completions"
+        body = self._body(messages, tools)
+
+        def post() -> Any:
+            return self.session.post(url, headers=self._headers(), data=body, timeout=self.timeout_seconds)
 
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=self.timeout_seconds)
+            response = cancel.call(post) if cancel is not None else post()
             response.raise_for_status()
             data = response.json()
         except requests.RequestException as exc:
@@ -39,19 +75,221 @@ class LLMClient:
         except ValueError as exc:
             raise ToolExecutionError("LLM API returned invalid JSON") from exc
 
-        if not isinstance(data, dict):
-            raise ToolExecutionError("LLM API response is not a JSON object")
+        return _extract_message(data)
+
+    async def achat(
+        self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], cancel: Optional[CancelToken] = None
+    ) -> Dict[str, Any]:
+        """Async counterpart of ``chat`` using the shared ``httpx.AsyncClient``.
+
+        Cancelling ``cancel`` aborts the request and closes its connection.
+        """
+        url = f"{self.api_base_url}/chat/completions"
+        body = self._body(messages, tools)
+
+        try:
+            response = await _guarded(
+                self.async_client.post(url, headers=self._headers(), content=body, timeout=self.timeout_seconds),
+                cancel,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as exc:
+            raise ToolExecutionError(f"LLM API request failed: {exc}") from exc
+        except ValueError as exc:
+            raise ToolExecutionError("LLM API returned invalid JSON") from exc
+
+        return _extract_message(data)
+
+    def stream_chat(
+        self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], cancel: Optional[CancelToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream a chat completion from the upstream SSE response.
 
-        choices = data.get("choices")
-        if not isinstance(choices, list) or not choices:
-            raise ToolExecutionError("LLM API response missing choices")
+        Yields ``{"type": "content", "delta": ...}`` events as tokens arrive and
+        finishes with ``{"type": "message", "message": ...}`` holding the
+        assembled assistant message, including tool calls.
+
+        Cancelling ``cancel`` closes the upstream response; the stream then
+        raises ``OperationCancelledError``.
+        """
+        url = f"{self.api_base_url}/chat/completions"
+        body = self._body(messages, tools, stream=True)
 
-        first_choice = choices[0]
-        if not isinstance(first_choice, dict):
-            raise ToolExecutionError("LLM API response has invalid choice format")
+        def post() -> Any:
+            return self.session.post(
+                url, headers=self._headers(), data=body, timeout=self.timeout_seconds, stream=True
+            )
 
-        message = first_choice.get("message")
-        if not isinstance(message, dict):
-            raise ToolExecutionError("LLM API response missing message")
+        try:
+            response = cancel.call(post) if cancel is not None else post()
+        except requests.RequestException as exc:
+            raise ToolExecutionError(f"LLM API request failed: {exc}") from exc
 
+        assembler = StreamAssembler()
+        with response:
+            # Checked inside ``with`` so an error reply still hands its connection back to the pool.
+            try:
+                response.raise_for_status()
+            except requests.RequestException as exc:
+                raise ToolExecutionError(f"LLM API request failed: {exc}") from exc
+            stop_watching = cancel.on_cancel(response.close) if cancel is not None else None
+            try:
+                for line in response.iter_lines(chunk_size=None):
+                    if cancel is not None:
+                        cancel.raise_if_cancelled()
+                    data = _sse_data(line)
+                    if data is None:
+                        continue
+                    if data == "[DONE]":
+                        break
+                    delta = assembler.feed(_parse_stream_chunk(data))
+                    if delta:
+                        yield {"type": "content", "delta": delta}
+            except OperationCancelledError:
+                raise
+            except Exception as exc:
+                # Reading a response closed by cancellation fails in transport-specific ways.
+                if cancel is not None and cancel.cancelled:
+                    raise OperationCancelledError(f"Operation cancelled: {cancel.reason}") from exc
+                if isinstance(exc, requests.RequestException):
+                    raise ToolExecutionError(f"LLM API stream failed: {exc}") from exc
+                raise
+            finally:
+                if stop_watching is not None:
+                    stop_watching()
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        yield {"type": "message", "message": assembler.message()}
+
+    async def astream_chat(
+        self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of ``stream_chat``, yielding the same events."""
+        url = f"{self.api_base_url}/chat/completions"
+        body = self._body(messages, tools, stream=True)
+
+        assembler = StreamAssembler()
+        try:
+            async with AsyncExitStack() as stack:
+                response = await _guarded(
+                    stack.enter_async_context(
+                        self.async_client.stream(
+                            "POST", url, headers=self._headers(), content=body, timeout=self.timeout_seconds
+                        )
+                    ),
+                    cancel,
+                )
+                response.raise_for_status()
+                lines = response.aiter_lines()
+                while True:
+                    try:
+                        line = await _guarded(lines.__anext__(), cancel)
+                    except StopAsyncIteration:
+                        break
+                    data = _sse_data(line)
+                    if data is None:
+                        continue
+                    if data == "[DONE]":
+                        break
+                    delta = assembler.feed(_parse_stream_chunk(data))
+                    if delta:
+                        yield {"type": "content", "delta": delta}
+        except httpx.HTTPError as exc:
+            raise ToolExecutionError(f"LLM API request failed: {exc}") from exc
+
+        yield {"type": "message", "message": assembler.message()}
+
+
+async def _guarded(awaitable: Awaitable[T], cancel: Optional[CancelToken]) -> T:
+    return await (cancel.race(awaitable) if cancel is not None else awaitable)
+
+
+def _extract_message(data: Any) -> Dict[str, Any]:
+    """Validate a chat completion response and return its first message."""
+    if not isinstance(data, dict):
+        raise ToolExecutionError("LLM API response is not a JSON object")
+
+    choices = data.get("choices")
+    if not isinstance(choices, list) or not choices:
+        raise ToolExecutionError("LLM API response missing choices")
+
+    first_choice = choices[0]
+    if not isinstance(first_choice, dict):
+        raise ToolExecutionError("LLM API response has invalid choice format")
+
+    message = first_choice.get("message")
+    if not isinstance(message, dict):
+        raise ToolExecutionError("LLM API response missing message")
+
+    return message
+
+
+class StreamAssembler:
+    """Rebuild an assistant message from streamed chat completion chunks."""
+    def __init__(self) -> None:
+        self._content: List[str] = []
+        self._tool_calls: Dict[int, Dict[str, Any]] = {}
+
+    def feed(self, chunk: Dict[str, Any]) -> str:
+        """Merge one chunk and return its content delta (empty if none)."""
+        choices = chunk.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return ""
+        delta = choices[0].get("delta")
+        if not isinstance(delta, dict):
+            return ""
+
+        for fragment in delta.get("tool_calls") or []:
+            if isinstance(fragment, dict):
+                self._merge_tool_call(fragment)
+
+        content = delta.get("content")
+        if isinstance(content, str) and content:
+            self._content.append(content)
+            return content
+        return ""
+
+    def _merge_tool_call(self, fragment: Dict[str, Any]) -> None:
+        index = fragment.get("index", len(self._tool_calls))
+        call = self._tool_calls.setdefault(
+            index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+        )
+        if fragment.get("id"):
+            call["id"] = fragment["id"]
+        if fragment.get("type"):
+            call["type"] = fragment["type"]
+        function = fragment.get("function")
+        if isinstance(function, dict):
+            call["function"]["name"] += function.get("name") or ""
+            call["function"]["arguments"] += function.get("arguments") or ""
+
+    def message(self) -> Dict[str, Any]:
+        message: Dict[str, Any] = {
+            "role": "assistant",
+            "content": "".join(self._content) if self._content else None,
+        }
+        if self._tool_calls:
+            message["tool_calls"] = [self._tool_calls[index] for index in sorted(self._tool_calls)]
         return message
+
+
+def _sse_data(line: "bytes | str") -> Optional[str]:
+    """Return the payload of an SSE ``data:`` line, or ``None`` for other lines."""
+    text = line.decode("utf-8").strip() if isinstance(line, bytes) else str(line).strip()
+    if not text.startswith("data:"):
+        return None
+    return text[len("data:"):].strip()
+
+
+def _parse_stream_chunk(data: str) -> Dict[str, Any]:
+    try:
+        chunk = json.loads(data)
+    except ValueError as exc:
+        raise ToolExecutionError("LLM API stream returned invalid JSON") from exc
+    if not isinstance(chunk, dict):
+        raise ToolExecutionError("LLM API stream chunk is not a JSON object")
+    if "error" in chunk:
+        raise ToolExecutionError(f"LLM API stream error: {chunk['error']}")
+    return chunk
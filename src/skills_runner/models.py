@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .payload import dumps
+
 
 @dataclass
 class Message:
@@ -13,6 +15,31 @@ class Message:
     tool_calls: Optional[List[Dict[str, Any]]] = None
     tool_call_id: Optional[str] = None
     name: Optional[str] = None
+    # Cached by the conversation's tokenizer; call invalidate() after changing the message.
+    token_count: Optional[int] = field(default=None, repr=False, compare=False)
+    _encoded: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
+
+    def invalidate(self) -> None:
+        """Drop cached token counts and encodings after the message was edited."""
+        self.token_count = None
+        self._encoded = None
+
+    def encoded(self) -> bytes:
+        """JSON encoding of ``to_dict()``, computed once per message."""
+        if self._encoded is None:
+            self._encoded = dumps(self.to_dict())
+        return self._encoded
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Message":
+        """Build a message from an OpenAI-format dict."""
+        return cls(
+            role=data.get("role", "user"),
+            content=data.get("content"),
+            tool_calls=data.get("tool_calls"),
+            tool_call_id=data.get("tool_call_id"),
+            name=data.get("name"),
+        )
 
     def to_dict(self) -> Dict[str, Any]:
         payload: Dict[str, Any] = {"role": self.role}
@@ -51,3 +78,7 @@ class ScriptExecution:
     returncode: int
     timed_out: bool
     error: Optional[str] = None
+    # Byte counts per stream when the middle of the output was dropped.
+    output_truncated: Optional[Dict[str, int]] = None
+    # CPU seconds (user/system), peak RSS in KB and wall seconds measured for the run.
+    usage: Optional[Dict[str, Optional[float]]] = None
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+import codecs
+import os
+
+DEFAULT_OUTPUT_MAX_BYTES = 1024 * 1024
+# Output files of pooled and forked jobs are killed at this multiple of the
+# limit even when overflowing scripts are otherwise left to run.
+OUTPUT_FILE_CAP_FACTOR = 16
+_TRIM_SLACK = 2
+
+# Receives ("stdout" | "stderr", text) as a running script produces output.
+OutputCallback = Callable[[str, str], None]
+
+
+@dataclass
+class CaptureSettings:
+    """Per-stream limit on captured script output."""
+    max_bytes: int = DEFAULT_OUTPUT_MAX_BYTES
+    kill_on_overflow: bool = False
+
+
+_settings = CaptureSettings()
+
+
+def configure_output_capture(max_bytes: int, kill_on_overflow: bool) -> None:
+    """Set how much of each output stream is kept and whether overflowing scripts are killed."""
+    _settings.max_bytes = max_bytes
+    _settings.kill_on_overflow = kill_on_overflow
+
+
+def capture_settings() -> CaptureSettings:
+    return _settings
+
+
+def output_file_cap() -> int:
+    """Size at which a job's output file gets the job killed."""
+    if _settings.kill_on_overflow:
+        return _settings.max_bytes
+    return _settings.max_bytes * OUTPUT_FILE_CAP_FACTOR
+
+
+class BoundedBuffer:
+    """Keep the first and last bytes of a stream, counting what is dropped between.
+
+    Half of ``max_bytes`` goes to the head and half to a tail that only ever
+    holds the most recent bytes, so memory stays bounded however much a
+    script prints. Bytes are decoded once, when ``text()`` is first called.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.total = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._text: Optional[str] = None
+
+    @property
+    def overflowed(self) -> bool:
+        return self.total > self.max_bytes
+
+    @property
+    def omitted(self) -> int:
+        return max(self.total - self.max_bytes, 0)
+
+    def feed(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+        self._text = None
+        room = self.head_limit - len(self._head)
+        if room > 0:
+            self._head.extend(chunk[:room])
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        if len(chunk) >= self.tail_limit:
+            self._tail = bytearray(chunk[len(chunk) - self.tail_limit:])
+            return
+        self._tail.extend(chunk)
+        # Trim in batches so a stream of small chunks does not shift the buffer every time.
+        if len(self._tail) > self.tail_limit * _TRIM_SLACK:
+            del self._tail[: len(self._tail) - self.tail_limit]
+
+    def text(self) -> str:
+        if self._text is None:
+            tail = bytes(self._tail[-self.tail_limit:]) if self.tail_limit else b""
+            if self.overflowed:
+                self._text = (
+                    _decode(bytes(self._head))
+                    + f"\n...[{self.omitted} bytes of output omitted]...\n"
+                    + _decode(tail)
+                )
+            else:
+                self._text = _decode(bytes(self._head) + tail)
+        return self._text
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def read_bounded_file(path: Path, max_bytes: int) -> BoundedBuffer:
+    """Read a job output file into a ``BoundedBuffer`` without loading the middle of it."""
+    buffer = BoundedBuffer(max_bytes)
+    try:
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size <= max_bytes:
+                buffer.feed(handle.read())
+                return buffer
+            buffer.feed(handle.read(buffer.head_limit))
+            handle.seek(size - buffer.tail_limit)
+            buffer.feed(handle.read(buffer.tail_limit))
+            buffer.total = size
+    except OSError:
+        pass
+    return buffer
+
+
+class OutputForwarder:
+    """Pass one stream's chunks to an ``OutputCallback`` as text, up to a byte limit.
+
+    Chunks are decoded incrementally, so a character split across two reads
+    is delivered whole. Output beyond the limit is still captured, just not
+    forwarded live.
+    """
+    def __init__(self, stream: str, callback: OutputCallback, max_bytes: int) -> None:
+        self.stream = stream
+        self.callback = callback
+        self.max_bytes = max_bytes
+        self.sent = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk: bytes) -> None:
+        if self.sent >= self.max_bytes or not chunk:
+            return
+        chunk = chunk[: self.max_bytes - self.sent]
+        self.sent += len(chunk)
+        text = self._decoder.decode(chunk)
+        if text:
+            self.callback(self.stream, text)
+
+
+class FileTailer:
+    """Forward what job output files gained since the last ``poll``."""
+    def __init__(self, paths: Dict[str, Path], callback: OutputCallback, max_bytes: int) -> None:
+        self._offsets = {name: 0 for name in paths}
+        self._paths = paths
+        self._forwarders = {name: OutputForwarder(name, callback, max_bytes) for name in paths}
+
+    def poll(self) -> None:
+        for name, path in self._paths.items():
+            forwarder = self._forwarders[name]
+            if forwarder.sent >= forwarder.max_bytes:
+                continue
+            try:
+                with open(path, "rb") as handle:
+                    handle.seek(self._offsets[name])
+                    chunk = handle.read(forwarder.max_bytes - forwarder.sent)
+            except OSError:
+                continue
+            self._offsets[name] += len(chunk)
+            forwarder.feed(chunk)
+
+
+def files_overflowed(paths: Iterable[Path], max_bytes: int) -> bool:
+    """Whether any job output file has grown beyond ``max_bytes``."""
+    for path in paths:
+        try:
+            if path.stat().st_size > max_bytes:
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def output_fields(stdout: BoundedBuffer, stderr: BoundedBuffer) -> Dict[str, object]:
+    """``stdout``/``stderr`` result fields, plus truncation stats when output was dropped."""
+    fields: Dict[str, object] = {"stdout": stdout.text(), "stderr": stderr.text()}
+    if stdout.overflowed or stderr.overflowed:
+        fields["output_truncated"] = {
+            "stdout_bytes": stdout.total,
+            "stdout_omitted": stdout.omitted,
+            "stderr_bytes": stderr.total,
+            "stderr_omitted": stderr.omitted,
+        }
+    return fields
+
+
+def overflow_error(max_bytes: int) -> str:
+    return f"Script output exceeded {max_bytes} bytes; the process was killed"
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Tuple
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when the extra is not installed
+    orjson = None  # type: ignore[assignment]
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # orjson rejects a few inputs json accepts (e.g. integers beyond 64 bits).
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedMessages(List[Dict[str, Any]]):
+    """Message dicts that also carry each message's pre-encoded JSON.
+
+    ``LLMClient`` joins ``fragments`` into the request body instead of
+    encoding the whole history again; other callers see a plain list.
+    """
+    def __init__(self, messages: Sequence[Dict[str, Any]], fragments: Sequence[bytes]) -> None:
+        super().__init__(messages)
+        self.fragments = list(fragments)
+
+
+_tools_cache: Dict[int, Tuple[List[Dict[str, Any]], bytes]] = {}
+_tools_lock = threading.Lock()
+
+
+def encode_tools(tools: List[Dict[str, Any]]) -> bytes:
+    """Encode a tool definition list once per process and reuse the bytes."""
+    with _tools_lock:
+        cached = _tools_cache.get(id(tools))
+        # Keep the list itself so its id cannot be reused by another object.
+        if cached is not None and cached[0] is tools:
+            return cached[1]
+        encoded = dumps(tools)
+        _tools_cache[id(tools)] = (tools, encoded)
+        return encoded
+
+
+def build_chat_body(
+    model: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    stream: bool = False,
+) -> bytes:
+    """Assemble a chat completion request body from cached JSON fragments."""
+    if isinstance(messages, EncodedMessages):
+        fragments = messages.fragments
+    else:
+        fragments = [dumps(message) for message in messages]
+
+    parts = [b'{"model":', dumps(model), b',"messages":[', b",".join(fragments), b"]"]
+    if tools:
+        # Providers reject tool_choice without tools, so both are left out together.
+        parts.extend((b',"tools":', encode_tools(tools), b',"tool_choice":"auto"'))
+    if stream:
+        parts.append(b',"stream":true')
+    parts.append(b"}")
+    return b"".join(parts)
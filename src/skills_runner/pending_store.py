@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PENDING_TTL_SECONDS = 900
+DEFAULT_PENDING_MAX_ENTRIES = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_actions (
+    token TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pending_actions_expires ON pending_actions (expires);
+"""
+
+
+class PendingStore:
+    """Proposed actions awaiting user confirmation, keyed by their confirmation token.
+
+    Entries expire ``ttl_seconds`` after they are stored, and beyond
+    ``max_entries`` the oldest are dropped. ``take`` removes an entry as it
+    returns it, so a token confirms at most once.
+    """
+    def __init__(self, ttl_seconds: int, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def put(self, token: str, payload: Dict[str, object]) -> None:
+        raise NotImplementedError
+
+    def take(self, token: str) -> Optional[Dict[str, object]]:
+        """Remove and return an unexpired entry, or ``None``."""
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Drop expired entries and return how many there were."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryPendingStore(PendingStore):
+    """Pending actions of this process, in insertion order.
+
+    Every entry lives equally long, so insertion order is also expiry order:
+    purging and evicting only ever look at the oldest end.
+    """
+    def __init__(
+        self, ttl_seconds: int = DEFAULT_PENDING_TTL_SECONDS, max_entries: int = DEFAULT_PENDING_MAX_ENTRIES
+    ) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, object]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, token: str, payload: Dict[str, object]) -> None:
+        with self._lock:
+            self._entries[token] = (time.monotonic() + self.ttl_seconds, payload)
+            self._entries.move_to_end(token)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def take(self, token: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        purged = 0
+        with self._lock:
+            while self._entries:
+                token, (expires, _) = next(iter(self._entries.items()))
+                if expires > now:
+                    break
+                del self._entries[token]
+                purged += 1
+        return purged
+
+
+class SqlitePendingStore(PendingStore):
+    """Pending actions in a SQLite file shared by every server process on the host.
+
+    A confirmation may reach a different uvicorn worker than the proposal;
+    ``take`` deletes the row in the same write transaction that reads it, so
+    two workers cannot both confirm one token.
+    """
+    def __init__(
+        self,
+        db_path: Path,
+        ttl_seconds: int = DEFAULT_PENDING_TTL_SECONDS,
+        max_entries: int = DEFAULT_PENDING_MAX_ENTRIES,
+    ) -> None:
+        super().__init__(ttl_seconds, max_entries)
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with self._lock held.
+        if self._db is None:
+            if self.db_path.parent != Path(""):
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def put(self, token: str, payload: Dict[str, object]) -> None:
+        encoded = json.dumps(payload)
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO pending_actions (token, payload, expires) VALUES (?, ?, ?)",
+                    (token, encoded, time.time() + self.ttl_seconds),
+                )
+                if self.max_entries:
+                    db.execute(
+                        "DELETE FROM pending_actions WHERE token IN ("
+                        "SELECT token FROM pending_actions ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def take(self, token: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            db = self._connection()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT payload, expires FROM pending_actions WHERE token = ?", (token,)
+                ).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM pending_actions WHERE token = ?", (token,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if row is None or row[1] <= time.time():
+            return None
+        payload: Dict[str, object] = json.loads(row[0])
+        return payload
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            db = self._connection()
+            return db.execute("DELETE FROM pending_actions WHERE expires <= ?", (time.time(),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+_store: Optional[PendingStore] = None
+_store_settings: Dict[str, object] = {
+    "db_path": None,
+    "ttl_seconds": DEFAULT_PENDING_TTL_SECONDS,
+    "max_entries": DEFAULT_PENDING_MAX_ENTRIES,
+}
+_store_lock = threading.Lock()
+_expirer: Optional[threading.Thread] = None
+
+
+def configure_pending_store(db_path: Optional[Path], ttl_seconds: int, max_entries: int) -> None:
+    """Keep pending actions in memory, or in SQLite at ``db_path`` to share them between workers."""
+    global _store
+    with _store_lock:
+        _store_settings["db_path"] = Path(db_path) if db_path is not None else None
+        _store_settings["ttl_seconds"] = ttl_seconds
+        _store_settings["max_entries"] = max_entries
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def get_pending_store() -> PendingStore:
+    """Return the process-wide pending action store, starting its background expiry."""
+    global _store, _expirer
+    with _store_lock:
+        if _store is None:
+            db_path = _store_settings["db_path"]
+            ttl_seconds = int(_store_settings["ttl_seconds"])  # type: ignore[call-overload]
+            max_entries = int(_store_settings["max_entries"])  # type: ignore[call-overload]
+            if db_path is None:
+                _store = MemoryPendingStore(ttl_seconds, max_entries)
+            else:
+                _store = SqlitePendingStore(db_path, ttl_seconds, max_entries)  # type: ignore[arg-type]
+        if _expirer is None:
+            _expirer = threading.Thread(target=_expire_pending, name="pending-store-expiry", daemon=True)
+            _expirer.start()
+        return _store
+
+
+def _expire_pending() -> None:
+    while True:
+        time.sleep(min(max(int(_store_settings["ttl_seconds"]) / 4, 1), 60))  # type: ignore[call-overload]
+        with _store_lock:
+            store = _store
+        if store is None:
+            continue
+        try:
+            purged = store.purge_expired()
+        except sqlite3.Error as exc:
+            _logger.warning("Cannot purge expired pending actions: %s", exc)
+            continue
+        if purged:
+            _logger.info("Expired %d pending action(s)", purged)
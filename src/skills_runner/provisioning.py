@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import venv
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+_logger = logging.getLogger(__name__)
+
+TEMPLATE_MARKER = "skills-runner-template.json"
+# ioctl cloning a file's extents on copy-on-write filesystems (btrfs, XFS, ...).
+_FICLONE = 0x40049409
+_SCRIPT_DIRS = ("bin", "Scripts")
+
+ProgressListener = Callable[[Dict[str, object]], None]
+
+
+@dataclass
+class ProvisioningSettings:
+    """Where the base venv template and the wheel cache live, and how pip may reach packages."""
+    template_path: Optional[Path] = None
+    wheelhouse: Optional[Path] = None
+    offline: bool = False
+    pip_timeout_seconds: int = 120
+
+
+_settings = ProvisioningSettings()
+_template_lock = threading.Lock()
+
+
+def configure_provisioning(
+    template_path: Optional[Path],
+    wheelhouse: Optional[Path],
+    offline: bool,
+    pip_timeout_seconds: int,
+) -> None:
+    """Set the venv template, wheelhouse and pip limits used for new skills."""
+    _settings.template_path = template_path
+    _settings.wheelhouse = wheelhouse
+    _settings.offline = offline
+    _settings.pip_timeout_seconds = pip_timeout_seconds
+
+
+def provisioning_settings() -> ProvisioningSettings:
+    return _settings
+
+
+def default_template_path() -> Path:
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    return Path.home() / ".cache" / "skills-runner" / f"venv-template-py{version}"
+
+
+@dataclass
+class ProvisionReport:
+    """Outcome of provisioning one venv, with the seconds spent in each step."""
+    timings: Dict[str, float] = field(default_factory=dict)
+    method: str = ""
+    venv_created: bool = False
+    requirements_installed: bool = False
+    pip_output: str = ""
+    pip_stderr: str = ""
+    error: Optional[str] = None
+    # Told about each step as it starts and ends, and about every line pip prints.
+    listener: Optional[ProgressListener] = field(default=None, repr=False, compare=False)
+
+    def emit(self, event: Dict[str, object]) -> None:
+        if self.listener is not None:
+            self.listener(event)
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        self.emit({"type": "step", "step": name, "phase": "start"})
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + time.perf_counter() - started, 4)
+            self.emit({"type": "step", "step": name, "phase": "end", "seconds": self.timings[name]})
+
+
+def provision_venv(
+    target: Path, requirements: Optional[Path] = None, report: Optional[ProvisionReport] = None
+) -> ProvisionReport:
+    """Create a venv at ``target`` and install ``requirements`` into it.
+
+    The venv is cloned from a prebuilt template, file by file as reflinks
+    where the filesystem supports them, else hardlinks, else copies; only
+    files that embed the template's path are rewritten. Packages come from
+    the wheelhouse when one is configured.
+    """
+    report = report if report is not None else ProvisionReport()
+    template: Optional[Path] = None
+    if os.name == "posix":
+        with report.step("prepare_template"):
+            try:
+                template = ensure_template()
+            except (OSError, subprocess.SubprocessError) as exc:
+                _logger.warning("Cannot build venv template, creating venvs directly: %s", exc)
+
+    with report.step("create_venv"):
+        try:
+            if template is not None:
+                report.method = clone_venv(template, target)
+            else:
+                venv.create(str(target), with_pip=True)
+                report.method = "venv"
+        except Exception as exc:  # noqa: BLE001 - reported to the caller like before
+            shutil.rmtree(target, ignore_errors=True)
+            report.error = f"venv creation failed: {exc}"
+            return report
+    report.venv_created = True
+
+    if requirements is not None:
+        with report.step("install_requirements"):
+            install_requirements(target, requirements, report)
+    return report
+
+
+def ensure_template() -> Path:
+    """Return the base venv template, building it on first use or after an interpreter change."""
+    path = _settings.template_path or default_template_path()
+    with _template_lock:
+        if _template_matches(path):
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        building = path.with_name(f"{path.name}.build-{uuid.uuid4().hex[:8]}")
+        try:
+            venv.create(str(building), with_pip=True, symlinks=True)
+            marker = {"origin": str(building), "executable": sys.executable, "version": sys.version}
+            (building / TEMPLATE_MARKER).write_text(json.dumps(marker), encoding="utf-8")
+            if path.exists():
+                shutil.rmtree(path)
+            os.rename(building, path)
+        except BaseException:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+        _logger.info("Built venv template at %s", path)
+        return path
+
+
+def _template_marker(path: Path) -> Optional[Dict[str, str]]:
+    try:
+        marker = json.loads((path / TEMPLATE_MARKER).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return marker if isinstance(marker, dict) else None
+
+
+def _template_matches(path: Path) -> bool:
+    marker = _template_marker(path)
+    return marker is not None and marker.get("executable") == sys.executable and marker.get("version") == sys.version
+
+
+def clone_venv(template: Path, target: Path) -> str:
+    """Clone a template venv to ``target`` and return how its files were cloned."""
+    marker = _template_marker(template)
+    if marker is None:
+        raise OSError(f"{template} is not a venv template")
+    origin = str(marker["origin"]).encode()
+    replacement = str(target.resolve()).encode()
+    method: Optional[str] = None
+
+    target.mkdir(parents=True)
+    for root, dirs, files in os.walk(template):
+        relative = Path(root).relative_to(template)
+        top = relative.parts[0] if relative.parts else ""
+        destination = target / relative
+        for name in list(dirs):
+            source = Path(root) / name
+            if source.is_symlink():
+                # e.g. lib64 -> lib; recreate the link rather than descending into it.
+                dirs.remove(name)
+                os.symlink(os.readlink(source), destination / name)
+            else:
+                (destination / name).mkdir()
+        for name in files:
+            if name == TEMPLATE_MARKER and not top:
+                continue
+            source = Path(root) / name
+            if source.is_symlink():
+                os.symlink(os.readlink(source), destination / name)
+            elif name == "pyvenv.cfg" or top in _SCRIPT_DIRS:
+                # Activation scripts and entry point shebangs name the venv's own path.
+                data = source.read_bytes()
+                (destination / name).write_bytes(data.replace(origin, replacement))
+                shutil.copymode(source, destination / name)
+            else:
+                method = _clone_file(source, destination / name, method)
+    return method or "copy"
+
+
+def _clone_file(source: Path, destination: Path, preferred: Optional[str]) -> str:
+    """Clone one file with the preferred method, falling back to the next one that works."""
+    order = ["reflink", "hardlink", "copy"]
+    for method in order[order.index(preferred) if preferred else 0:]:
+        try:
+            if method == "reflink":
+                _reflink(source, destination)
+            elif method == "hardlink":
+                os.link(source, destination)
+            else:
+                shutil.copy2(source, destination)
+            return method
+        except OSError:
+            if method == "copy":
+                raise
+            try:
+                destination.unlink()
+            except FileNotFoundError:
+                pass
+    return "copy"
+
+
+def _reflink(source: Path, destination: Path) -> None:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError("reflinks are not supported on this platform")
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, destination)
+
+
+def venv_python(venv_path: Path) -> Path:
+    unix_python = venv_path / "bin" / "python"
+    return unix_python if unix_python.exists() else venv_path / "Scripts" / "python.exe"
+
+
+def install_requirements(venv_path: Path, requirements: Path, report: ProvisionReport) -> None:
+    """Install requirements with the venv's pip, through the wheelhouse when one is configured.
+
+    Packages missing from the wheelhouse are built into it once with
+    ``pip wheel`` (unless offline) and every install then runs with
+    ``--no-index`` against it.
+    """
+    settings = _settings
+    python = str(venv_python(venv_path))
+    install = [python, "-m", "pip", "install", "--disable-pip-version-check", "-r", str(requirements)]
+    wheelhouse = settings.wheelhouse
+    try:
+        if wheelhouse is None:
+            if settings.offline:
+                install.append("--no-index")
+            proc = _pip(install, venv_path.parent, report)
+        else:
+            wheelhouse.mkdir(parents=True, exist_ok=True)
+            offline_install = install + ["--no-index", "--find-links", str(wheelhouse)]
+            proc = _pip(offline_install, venv_path.parent, report)
+            if proc.returncode != 0 and not settings.offline:
+                with report.step("build_wheels"):
+                    wheel = [
+                        python, "-m", "pip", "wheel", "--disable-pip-version-check",
+                        "--wheel-dir", str(wheelhouse), "--find-links", str(wheelhouse), "-r", str(requirements),
+                    ]
+                    built = _pip(wheel, venv_path.parent, report)
+                if built.returncode == 0:
+                    proc = _pip(offline_install, venv_path.parent, report)
+                else:
+                    proc = built
+    except subprocess.TimeoutExpired:
+        report.error = f"pip install timed out ({settings.pip_timeout_seconds}s)"
+        return
+
+    report.pip_output = proc.stdout
+    if proc.returncode != 0:
+        report.pip_stderr = proc.stderr
+        report.error = "pip install failed"
+        return
+    report.requirements_installed = True
+
+
+def _pip(command: List[str], cwd: Path, report: ProvisionReport) -> "subprocess.CompletedProcess[str]":
+    """Run pip, forwarding each output line to the report's listener when it has one."""
+    timeout = _settings.pip_timeout_seconds
+    if report.listener is None:
+        return subprocess.run(command, cwd=str(cwd), capture_output=True, text=True, timeout=timeout)
+
+    process = subprocess.Popen(
+        command, cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1
+    )
+    lines: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+
+    def forward(name: str, stream: IO[str]) -> None:
+        for line in stream:
+            lines[name].append(line)
+            report.emit({"type": "pip", "stream": name, "line": line.rstrip("\n")})
+        stream.close()
+
+    readers = [
+        threading.Thread(target=forward, args=(name, stream), name=f"pip-{name}", daemon=True)
+        for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join()
+    return subprocess.CompletedProcess(command, returncode, "".join(lines["stdout"]), "".join(lines["stderr"]))
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+import uuid
+
+from .exceptions import ProvisioningBusyError
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobSettings:
+    """Worker count, queue bound and retention of background skill provisioning jobs."""
+    workers: int = 2
+    max_queue: int = 16
+    retention_seconds: int = 3600
+
+
+class ProvisioningJob:
+    """One background skill creation: its status, progress events and final result.
+
+    Events are kept in order for the life of the job, so a progress stream
+    can start or resume at any index and still see every step.
+    """
+    def __init__(self, skill_name: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.skill_name = skill_name
+        self.status = "queued"
+        self.step: Optional[str] = None
+        self.result: Optional[Dict[str, object]] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._events: List[Dict[str, object]] = []
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, object], final: bool = False) -> None:
+        """Record a progress event and wake the streams waiting for one."""
+        with self._lock:
+            if final:
+                # Set together with the last event so a stream never ends before seeing it.
+                self.finished = time.time()
+            if event.get("type") == "step":
+                self.step = str(event["step"]) if event.get("phase") == "start" else None
+            self._events.append({**event, "time": round(time.time(), 3)})
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # The stream's event loop has closed.
+
+    def start(self) -> None:
+        self.started = time.time()
+        self.status = "running"
+        self.emit({"type": "status", "status": self.status})
+
+    def finish(self, result: Dict[str, object]) -> None:
+        self.result = result
+        self.status = "failed" if "error" in result else "succeeded"
+        self.emit({"type": "status", "status": self.status, "result": result}, final=True)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            events = len(self._events)
+        return {
+            "job_id": self.id,
+            "skill_name": self.skill_name,
+            "status": self.status,
+            "step": self.step,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "events": events,
+            "result": self.result,
+        }
+
+    async def aevents(self, start: int = 0) -> AsyncIterator[Tuple[int, Dict[str, object]]]:
+        """Yield ``(index, event)`` from ``start`` on, waiting for new ones until the job ends."""
+        loop = asyncio.get_running_loop()
+        index = max(start, 0)
+        while True:
+            future: Optional["asyncio.Future[None]"] = None
+            with self._lock:
+                events = self._events[index:]
+                done = self.finished is not None
+                if not events and not done:
+                    future = loop.create_future()
+                    self._waiters.append((loop, future))
+            for event in events:
+                yield index, event
+                index += 1
+            if future is not None:
+                await future
+            elif done and not events:
+                return
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ProvisioningJobs:
+    """Run skill creations on a bounded pool of threads and keep their jobs for polling.
+
+    At most ``workers`` creations run at once; beyond ``max_queue`` waiting
+    jobs, new ones are refused with ``ProvisioningBusyError``. Finished jobs
+    are forgotten ``retention_seconds`` after they end.
+    """
+    def __init__(self, settings: JobSettings) -> None:
+        self.settings = settings
+        self._jobs: Dict[str, ProvisioningJob] = {}
+        self._lock = threading.Lock()
+        self._workers = settings.workers
+        self._executor = ThreadPoolExecutor(max_workers=settings.workers, thread_name_prefix="skill-provisioning")
+
+    def submit(self, skill_name: str, work: Callable[[ProvisioningJob], Dict[str, object]]) -> ProvisioningJob:
+        """Queue ``work`` to run as a new job and return the job at once."""
+        with self._lock:
+            self._expire()
+            queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if self.settings.max_queue and queued >= self.settings.max_queue:
+                raise ProvisioningBusyError(f"Skill provisioning queue is full ({queued} waiting); retry later")
+            job = ProvisioningJob(skill_name)
+            self._jobs[job.id] = job
+            job.emit({"type": "status", "status": job.status})
+            if self._workers != self.settings.workers:
+                # Jobs already handed to the old pool still run to completion.
+                self._executor.shutdown(wait=False)
+                self._workers = self.settings.workers
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="skill-provisioning"
+                )
+            self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id: str) -> Optional[ProvisioningJob]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ProvisioningJob, work: Callable[[ProvisioningJob], Dict[str, object]]) -> None:
+        job.start()
+        try:
+            result = work(job)
+        except Exception as exc:  # noqa: BLE001 - reported through the job
+            _logger.exception("Provisioning job %s failed", job.id)
+            result = {"error": f"Skill creation failed: {exc}"}
+        job.finish(result)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.settings.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished is not None and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_settings = JobSettings()
+_jobs: Optional[ProvisioningJobs] = None
+_jobs_lock = threading.Lock()
+
+
+def configure_provisioning_jobs(workers: int, max_queue: int, retention_seconds: int) -> None:
+    """Set how many skill creations run at once, how many may wait and how long results are kept."""
+    _settings.workers = workers
+    _settings.max_queue = max_queue
+    _settings.retention_seconds = retention_seconds
+
+
+def get_provisioning_jobs() -> ProvisioningJobs:
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = ProvisioningJobs(_settings)
+        return _jobs
+
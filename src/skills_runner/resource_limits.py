@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+import logging
+import os
+import signal
+import sys
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+_SIGXCPU = int(getattr(signal, "SIGXCPU", 24))
+
+# Measured for every run; None where a path cannot measure a value.
+ResourceUsage = Dict[str, Optional[float]]
+
+
+@dataclass
+class ResourceLimits:
+    """Per-execution limits for scripts; 0 leaves a resource unlimited.
+
+    With ``cgroup_root`` (a cgroups v2 folder the server may create children
+    in) memory and process count are enforced by a cgroup per execution;
+    otherwise by the address space and process rlimits.
+    """
+    cpu_seconds: int = 0
+    memory_bytes: int = 0
+    open_files: int = 0
+    processes: int = 0
+    cgroup_root: Optional[Path] = None
+
+    def rlimits(self, cgroup: bool = False) -> Dict[str, int]:
+        """``resource.RLIMIT_*`` names and values to apply, as carried in worker jobs."""
+        limits = {"RLIMIT_CPU": self.cpu_seconds, "RLIMIT_NOFILE": self.open_files}
+        if not cgroup:
+            limits["RLIMIT_AS"] = self.memory_bytes
+            limits["RLIMIT_NPROC"] = self.processes
+        return {name: value for name, value in limits.items() if value > 0}
+
+
+_limits = ResourceLimits()
+
+
+def configure_resource_limits(
+    cpu_seconds: int,
+    memory_mb: int,
+    open_files: int,
+    processes: int,
+    cgroup_root: Optional[Path] = None,
+) -> None:
+    """Set the limits applied to every script execution."""
+    _limits.cpu_seconds = cpu_seconds
+    _limits.memory_bytes = memory_mb * 1024 * 1024
+    _limits.open_files = open_files
+    _limits.processes = processes
+    _limits.cgroup_root = cgroup_root
+
+
+def resource_limits() -> ResourceLimits:
+    return _limits
+
+
+def _max_rss_kb(max_rss: int) -> int:
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+def usage_from_rusage(rusage: Any, wall_seconds: float) -> ResourceUsage:
+    """Usage fields from a ``struct rusage`` (``None`` when the platform has none)."""
+    if rusage is None:
+        return usage_fields(None, None, None, wall_seconds)
+    return usage_fields(rusage.ru_utime, rusage.ru_stime, _max_rss_kb(rusage.ru_maxrss), wall_seconds)
+
+
+def usage_fields(
+    user_cpu: Optional[float], system_cpu: Optional[float], max_rss_kb: Optional[float], wall_seconds: float
+) -> ResourceUsage:
+    return {
+        "user_cpu_seconds": None if user_cpu is None else round(user_cpu, 4),
+        "system_cpu_seconds": None if system_cpu is None else round(system_cpu, 4),
+        "max_rss_kb": max_rss_kb,
+        "wall_seconds": round(wall_seconds, 4),
+    }
+
+
+class CgroupScope:
+    """A cgroups v2 child group holding the processes of one script execution."""
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @classmethod
+    def create(cls, limits: ResourceLimits) -> Optional["CgroupScope"]:
+        """Create a group under ``cgroup_root`` with the memory and process limits, or ``None``."""
+        if limits.cgroup_root is None or os.name != "posix":
+            return None
+        path = limits.cgroup_root / f"run-{uuid.uuid4().hex[:12]}"
+        try:
+            path.mkdir()
+        except OSError as exc:
+            _logger.warning("Cannot create cgroup under %s: %s", limits.cgroup_root, exc)
+            return None
+        scope = cls(path)
+        try:
+            if limits.memory_bytes:
+                (path / "memory.max").write_text(str(limits.memory_bytes))
+                if (path / "memory.swap.max").exists():
+                    (path / "memory.swap.max").write_text("0")
+            if limits.processes:
+                (path / "pids.max").write_text(str(limits.processes))
+        except OSError as exc:
+            _logger.warning("Cannot set limits on cgroup %s: %s", path, exc)
+            scope.remove()
+            return None
+        return scope
+
+    @property
+    def procs_path(self) -> str:
+        return str(self.path / "cgroup.procs")
+
+    def _read(self, name: str) -> Dict[str, int]:
+        try:
+            lines = (self.path / name).read_text().split("\n")
+        except OSError:
+            return {}
+        values: Dict[str, int] = {}
+        for line in lines:
+            key, _, value = line.partition(" ")
+            if value.strip().isdigit():
+                values[key] = int(value)
+        return values
+
+    def usage(self) -> Dict[str, Optional[float]]:
+        """CPU time and peak memory of every process that ran in the group."""
+        fields: Dict[str, Optional[float]] = {}
+        stat = self._read("cpu.stat")
+        if "user_usec" in stat:
+            fields["user_cpu_seconds"] = round(stat["user_usec"] / 1_000_000, 4)
+            fields["system_cpu_seconds"] = round(stat.get("system_usec", 0) / 1_000_000, 4)
+        try:
+            fields["max_rss_kb"] = int((self.path / "memory.peak").read_text()) // 1024
+        except (OSError, ValueError):
+            pass
+        return fields
+
+    def oom_killed(self) -> bool:
+        return self._read("memory.events").get("oom_kill", 0) > 0
+
+    def remove(self) -> None:
+        """Kill anything left in the group and delete it."""
+        kill_file = self.path / "cgroup.kill"
+        try:
+            if kill_file.exists():
+                kill_file.write_text("1")
+            self.path.rmdir()
+        except OSError as exc:
+            _logger.debug("Cannot remove cgroup %s: %s", self.path, exc)
+
+
+def limits_spec(limits: ResourceLimits, scope: Optional[CgroupScope]) -> Optional[Dict[str, object]]:
+    """Cgroup and rlimits a new script process applies to itself, or ``None`` if there are none."""
+    rlimits = limits.rlimits(cgroup=scope is not None)
+    if os.name != "posix" or (not rlimits and scope is None):
+        return None
+    return {"rlimits": rlimits, "procs_path": str(scope.procs_path) if scope is not None else None}
+
+
+def record_usage(
+    result: Dict[str, object],
+    usage: ResourceUsage,
+    limits: ResourceLimits,
+    scope: Optional[CgroupScope] = None,
+) -> Dict[str, object]:
+    """Add measured usage to a script result and explain kills caused by a limit."""
+    oom_killed = False
+    if scope is not None:
+        usage = {**usage, **scope.usage()}
+        oom_killed = scope.oom_killed()
+    result["usage"] = usage
+    if "error" in result:
+        return result
+
+    returncode = result.get("returncode")
+    cpu_used = (usage.get("user_cpu_seconds") or 0) + (usage.get("system_cpu_seconds") or 0)
+    if limits.cpu_seconds and (
+        returncode == -_SIGXCPU or (returncode == -signal.SIGKILL and cpu_used >= limits.cpu_seconds)
+    ):
+        result["error"] = f"Script exceeded the CPU time limit of {limits.cpu_seconds} seconds"
+    elif oom_killed:
+        result["error"] = f"Script exceeded the memory limit of {limits.memory_bytes // (1024 * 1024)} MB"
+    return result
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from .catalog import configure_catalog, get_catalog
+from .config import Configuration
+from .http_session import configure_http_pool
+from .output_capture import configure_output_capture
+from .pending_store import configure_pending_store
+from .provisioning import configure_provisioning
+from .provisioning_jobs import configure_provisioning_jobs
+from .resource_limits import configure_resource_limits
+from .scheduler import configure_scheduler
+from .session_store import configure_sessions
+from .tool_concurrency import configure_tool_concurrency
+from .venv_store import configure_venv_store
+from .worker_pool import configure_pools
+
+
+def apply_configuration(config: Configuration) -> None:
+    """Push process-wide settings from the configuration into shared resources."""
+    configure_pools(config.script_pool_size, config.script_pool_idle_seconds, config.script_pool_max_jobs)
+    configure_output_capture(config.script_output_max_bytes, config.script_output_kill_on_overflow)
+    configure_resource_limits(
+        config.script_cpu_seconds,
+        config.script_memory_mb,
+        config.script_max_open_files,
+        config.script_max_processes,
+        config.script_cgroup_root,
+    )
+    configure_scheduler(
+        config.script_max_concurrent,
+        config.script_max_per_session,
+        config.script_max_per_skill,
+        config.script_queue_max,
+        config.script_queue_timeout_seconds,
+    )
+    configure_provisioning(
+        config.venv_template_path, config.wheelhouse_path, config.pip_offline, config.pip_timeout_seconds
+    )
+    configure_venv_store(config.venv_store_path)
+    configure_provisioning_jobs(
+        config.provisioning_workers, config.provisioning_queue_max, config.provisioning_job_ttl_seconds
+    )
+    configure_pending_store(config.pending_db_path, config.pending_ttl_seconds, config.pending_max_entries)
+    configure_http_pool(config.llm_pool_connections, config.llm_pool_maxsize, config.llm_http2)
+    configure_tool_concurrency(config.tool_max_parallel, config.tool_concurrency_limits)
+    configure_sessions(config.session_db_path, config.session_cache_size)
+    configure_catalog(config.skills_catalog_poll_seconds, config.skills_catalog_snapshot)
+    # Build the catalog now so the first tool call does not pay for the scan.
+    get_catalog(config.skills_folder)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Optional
+import asyncio
+import math
+import threading
+import time
+
+from .exceptions import SchedulerBusyError
+
+# Weight of the newest run in the moving average of slot hold times.
+_HOLD_SMOOTHING = 0.2
+
+
+@dataclass
+class SchedulerSettings:
+    """Limits on script executions running at once across the whole process; 0 disables a limit."""
+    max_concurrent: int = 16
+    per_session: int = 4
+    per_skill: int = 0
+    max_queue: int = 64
+    queue_timeout_seconds: int = 60
+
+
+class _Waiter:
+    """A queued request for a slot, woken by a thread event or an event loop future."""
+    def __init__(self, session: str, skill: str, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.session = session
+        self.skill = skill
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future: Optional["asyncio.Future[None]"] = loop.create_future() if loop is not None else None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif self.loop is not None and self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ExecutionSlot:
+    """Permission to run one script; release it when the script has finished."""
+    def __init__(self, scheduler: "ExecutionScheduler", session: str, skill: str, waited: float) -> None:
+        self.queue_wait_seconds = round(waited, 4)
+        self._scheduler = scheduler
+        self._session = session
+        self._skill = skill
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self._session, self._skill, time.monotonic() - self._started)
+
+    def __enter__(self) -> "ExecutionSlot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+class ExecutionScheduler:
+    """Admit script executions under a global cap with per-session and per-skill quotas.
+
+    Waiting requests queue per session, and a freed slot goes to the next
+    session in round-robin order whose head request fits its quotas, so one
+    busy conversation cannot starve the others. When the queue is full, or
+    a request waits longer than the queue timeout, ``SchedulerBusyError``
+    tells the caller to back off.
+    """
+    def __init__(self, settings: SchedulerSettings) -> None:
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._running = 0
+        self._by_session: Counter[str] = Counter()
+        self._by_skill: Counter[str] = Counter()
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self._average_hold = 1.0
+
+    def acquire(self, session: str, skill: str) -> ExecutionSlot:
+        """Block until a slot is free for this session and skill."""
+        started = time.monotonic()
+        waiter = self._enqueue(session, skill, None)
+        if not waiter.granted:
+            assert waiter.event is not None
+            waiter.event.wait(self._timeout())
+            self._give_up(waiter)
+        return ExecutionSlot(self, session, skill, time.monotonic() - started)
+
+    async def aacquire(self, session: str, skill: str) -> ExecutionSlot:
+        """Async counterpart of ``acquire``; waiting does not hold a thread."""
+        started = time.monotonic()
+        waiter = self._enqueue(session, skill, asyncio.get_running_loop())
+        if not waiter.granted:
+            assert waiter.future is not None
+            try:
+                await asyncio.wait_for(waiter.future, self._timeout())
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                with self._lock:
+                    if not waiter.granted:
+                        self._remove(waiter)
+                        raise
+                self._release(session, skill, 0.0)
+                raise
+            self._give_up(waiter)
+        return ExecutionSlot(self, session, skill, time.monotonic() - started)
+
+    def saturated(self) -> bool:
+        """Whether new executions would be turned away right now."""
+        with self._lock:
+            return bool(self.settings.max_queue) and self._queued >= self.settings.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds after which a rejected caller may reasonably try again."""
+        with self._lock:
+            return self._retry_after()
+
+    def _timeout(self) -> Optional[float]:
+        return self.settings.queue_timeout_seconds or None
+
+    def _retry_after(self) -> int:
+        lanes = self.settings.max_concurrent or max(self._running, 1)
+        return max(1, math.ceil(self._average_hold * (self._queued + 1) / lanes))
+
+    def _enqueue(self, session: str, skill: str, loop: Optional[asyncio.AbstractEventLoop]) -> _Waiter:
+        waiter = _Waiter(session, skill, loop)
+        with self._lock:
+            if self.settings.max_queue and self._queued >= self.settings.max_queue and not self._fits(waiter):
+                raise SchedulerBusyError(
+                    f"Script execution queue is full ({self._queued} waiting); retry later",
+                    self._retry_after(),
+                )
+            self._queues.setdefault(session, deque()).append(waiter)
+            self._queued += 1
+            self._dispatch()
+        return waiter
+
+    def _give_up(self, waiter: _Waiter) -> None:
+        """Leave the queue after the wait ended; raise unless the slot was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return
+            self._remove(waiter)
+            raise SchedulerBusyError(
+                f"No script execution slot became free within {self.settings.queue_timeout_seconds} seconds",
+                self._retry_after(),
+            )
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.session)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.session]
+            # The head of this session may have been the only blocked request.
+            self._dispatch()
+
+    def _fits(self, waiter: _Waiter) -> bool:
+        settings = self.settings
+        return (
+            (not settings.max_concurrent or self._running < settings.max_concurrent)
+            and (not settings.per_session or self._by_session[waiter.session] < settings.per_session)
+            and (not settings.per_skill or self._by_skill[waiter.skill] < settings.per_skill)
+        )
+
+    def _dispatch(self) -> None:
+        """Grant free slots to queued requests, one session at a time in round-robin order."""
+        granted = True
+        while granted and self._queues:
+            granted = False
+            for session, queue in self._queues.items():
+                waiter = queue[0]
+                if not self._fits(waiter):
+                    continue
+                queue.popleft()
+                self._queued -= 1
+                if queue:
+                    self._queues.move_to_end(session)
+                else:
+                    del self._queues[session]
+                self._running += 1
+                self._by_session[waiter.session] += 1
+                self._by_skill[waiter.skill] += 1
+                waiter.granted = True
+                waiter.wake()
+                granted = True
+                break
+
+    def _release(self, session: str, skill: str, held: float) -> None:
+        with self._lock:
+            self._running -= 1
+            self._by_session[session] -= 1
+            if self._by_session[session] <= 0:
+                del self._by_session[session]
+            self._by_skill[skill] -= 1
+            if self._by_skill[skill] <= 0:
+                del self._by_skill[skill]
+            if held > 0:
+                self._average_hold += _HOLD_SMOOTHING * (held - self._average_hold)
+            self._dispatch()
+
+
+_settings = SchedulerSettings()
+_scheduler = ExecutionScheduler(_settings)
+
+
+def configure_scheduler(
+    max_concurrent: int,
+    per_session: int,
+    per_skill: int,
+    max_queue: int,
+    queue_timeout_seconds: int,
+) -> None:
+    """Set the process-wide execution limits; waiting requests see them on the next dispatch."""
+    _settings.max_concurrent = max_concurrent
+    _settings.per_session = per_session
+    _settings.per_skill = per_skill
+    _settings.max_queue = max_queue
+    _settings.queue_timeout_seconds = queue_timeout_seconds
+
+
+def get_scheduler() -> ExecutionScheduler:
+    return _scheduler
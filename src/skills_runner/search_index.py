@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import math
+import os
+import re
+import threading
+
+from .catalog import SkillCatalog, SkillEntry, get_catalog
+
+TEXT_SUFFIXES = frozenset(
+    {".md", ".txt", ".rst", ".py", ".json", ".yaml", ".yml", ".toml", ".cfg", ".ini", ".csv"}
+)
+MAX_INDEXED_FILE_BYTES = 256 * 1024
+SNIPPET_CHARS = 160
+
+# Common BM25 defaults.
+_K1 = 1.2
+_B = 0.75
+# Terms in the skill name count this many times, so "weather" ranks the weather skill first.
+_NAME_WEIGHT = 3
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric terms (underscores separate words)."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class _IndexedSkill:
+    signature: Tuple[object, ...]
+    terms: Counter[str]
+    length: int
+    lines: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class SearchHit:
+    skill_name: str
+    score: float
+    snippet: str
+    file: Optional[str]
+
+
+def _file_key(path: Path) -> Tuple[int, int]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _indexed_files(entry: SkillEntry) -> List[str]:
+    """Text files worth indexing besides SKILL.md."""
+    doc_name = entry.doc_path.name if entry.doc_path is not None else None
+    return [name for name in entry.files if name != doc_name and Path(name).suffix.lower() in TEXT_SUFFIXES]
+
+
+def _signature(entry: SkillEntry, files: List[str]) -> Tuple[object, ...]:
+    # Edits to existing files do not change the folder mtime, so stat each indexed file.
+    return (entry.doc_hash, tuple((name, _file_key(entry.path / name)) for name in files))
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        if path.stat().st_size > MAX_INDEXED_FILE_BYTES:
+            return None
+        return path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+class SkillSearchIndex:
+    """BM25 inverted index over each skill's SKILL.md and text files.
+
+    The index follows a ``SkillCatalog``: before each search it re-indexes only
+    skills whose documentation or files changed and drops removed skills.
+    """
+    def __init__(self, catalog: SkillCatalog) -> None:
+        self.catalog = catalog
+        self._skills: Dict[str, _IndexedSkill] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._skills)
+
+    def sync(self) -> int:
+        """Bring the index up to date with the catalog; returns skills re-indexed."""
+        entries = self.catalog.entries()
+        updated = 0
+        with self._lock:
+            live: Set[str] = set()
+            for entry in entries:
+                live.add(entry.name)
+                files = _indexed_files(entry)
+                signature = _signature(entry, files)
+                current = self._skills.get(entry.name)
+                if current is not None and current.signature == signature:
+                    continue
+                self._remove(entry.name)
+                self._add(entry, files, signature)
+                updated += 1
+            for name in set(self._skills) - live:
+                self._remove(name)
+        return updated
+
+    def _add(self, entry: SkillEntry, files: List[str], signature: Tuple[object, ...]) -> None:
+        terms: Counter[str] = Counter()
+        lines: List[Tuple[str, str]] = []
+        for _ in range(_NAME_WEIGHT):
+            terms.update(tokenize(entry.name))
+
+        sources: List[Tuple[str, Optional[str]]] = []
+        if entry.doc_path is not None:
+            sources.append((entry.doc_path.name, entry.documentation))
+        sources.extend((name, _read_text(entry.path / name)) for name in files)
+        for name, text in sources:
+            if not text:
+                continue
+            terms.update(tokenize(text))
+            lines.extend((name, line.strip()) for line in text.splitlines() if line.strip())
+
+        length = sum(terms.values())
+        self._skills[entry.name] = _IndexedSkill(signature=signature, terms=terms, length=length, lines=lines)
+        self._total_length += length
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[entry.name] = count
+
+    def _remove(self, name: str) -> None:
+        skill = self._skills.pop(name, None)
+        if skill is None:
+            return
+        self._total_length -= skill.length
+        for term in skill.terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, limit: int = 5) -> List[SearchHit]:
+        """Return up to ``limit`` skills ranked by BM25 score for the query."""
+        self.sync()
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            count = len(self._skills)
+            if not query_terms or count == 0:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for name, frequency in postings.items():
+                    length = self._skills[name].length
+                    norm = frequency + _K1 * (1 - _B + _B * length / average_length)
+                    scores[name] = scores.get(name, 0.0) + idf * frequency * (_K1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            hits = []
+            for name, score in ranked:
+                file, snippet = self._snippet(self._skills[name], set(query_terms))
+                hits.append(SearchHit(skill_name=name, score=round(score, 4), snippet=snippet, file=file))
+            return hits
+
+    @staticmethod
+    def _snippet(skill: _IndexedSkill, query_terms: Set[str]) -> Tuple[Optional[str], str]:
+        best: Optional[Tuple[str, str]] = None
+        best_matches = 0
+        for file, line in skill.lines:
+            matches = len(query_terms.intersection(tokenize(line)))
+            if matches > best_matches:
+                best, best_matches = (file, line), matches
+                if matches == len(query_terms):
+                    break
+        if best is None:
+            if not skill.lines:
+                return None, ""
+            best = skill.lines[0]
+        file, line = best
+        if len(line) > SNIPPET_CHARS:
+            line = line[: SNIPPET_CHARS - 3].rstrip() + "..."
+        return file, line
+
+
+_indexes: Dict[str, SkillSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(skills_folder: Path) -> SkillSearchIndex:
+    """Return the shared search index for a skills folder."""
+    key = os.path.abspath(skills_folder)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = SkillSearchIndex(get_catalog(skills_folder))
+            _indexes[key] = index
+        return index
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from .conversation import Conversation
+from .models import Message
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_DB = Path("sessions.db")
+DEFAULT_SESSION_CACHE_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message BLOB NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+"""
+
+
+@dataclass
+class Session:
+    """A stored conversation; ``lock`` serializes turns on it."""
+    id: str
+    model: str
+    conversation: Conversation
+    stored: int
+    # Requests holding the session between ``get``/``create`` and ``release``.
+    users: int = field(default=0, repr=False)
+    _lock: Optional[asyncio.Lock] = field(default=None, repr=False)
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created on the event loop at first use: sessions are loaded in worker
+        # threads, where Python 3.9 cannot create an asyncio.Lock.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+class SessionStore:
+    """Conversation histories kept server-side, so clients only send new messages.
+
+    Every message is written to SQLite once, as its cached JSON encoding. Hot
+    sessions stay in an in-memory LRU with their live ``Conversation``; an
+    evicted or restarted session is rebuilt from its rows on the next request.
+    Sessions in use are never evicted, so a request never works on a copy of
+    a session another request is still holding.
+    """
+    def __init__(self, db_path: Path, cache_size: int = DEFAULT_SESSION_CACHE_SIZE) -> None:
+        self.db_path = Path(db_path)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Guards Session.users, so release() never waits on a database write.
+        self._users_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with self._lock held; the database is only opened once a session is used.
+        if self._db is None:
+            if self.db_path.parent != Path(""):
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def create(self, model: str, conversation: Conversation, session_id: Optional[str] = None) -> Session:
+        """Store a new session holding the conversation's current messages.
+
+        The caller holds the session until it calls ``release``.
+        """
+        session = Session(id=session_id or uuid.uuid4().hex, model=model, conversation=conversation, stored=0)
+        now = time.time()
+        with self._lock:
+            db = self._connection()
+            with db:
+                db.execute(
+                    "INSERT INTO sessions (id, model, created, updated) VALUES (?, ?, ?, ?)",
+                    (session.id, model, now, now),
+                )
+                self._insert(db, session, conversation.messages)
+            self._use(session)
+            self._remember(session)
+        return session
+
+    def get(self, session_id: str, build: Callable[[str], Conversation]) -> Optional[Session]:
+        """Return a session, rebuilding it with ``build(model)`` if it is not cached.
+
+        The caller holds the session until it calls ``release``.
+        """
+        with self._lock:
+            session = self._cache.get(session_id)
+            if session is not None:
+                self._cache.move_to_end(session_id)
+                self._use(session)
+                return session
+
+            db = self._connection()
+            row = db.execute("SELECT model FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            rows = db.execute(
+                "SELECT message FROM session_messages WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+
+        start_time = time.perf_counter()
+        conversation = build(row[0])
+        conversation.load_messages([json.loads(message) for (message,) in rows])
+        session = Session(id=session_id, model=row[0], conversation=conversation, stored=len(rows))
+        _logger.info(
+            "Loaded session %s with %d messages in %.2fms",
+            session_id,
+            len(rows),
+            (time.perf_counter() - start_time) * 1000,
+        )
+        with self._lock:
+            # Another request may have loaded it meanwhile; keep the first copy.
+            existing = self._cache.get(session_id)
+            if existing is not None:
+                self._use(existing)
+                return existing
+            self._use(session)
+            self._remember(session)
+        return session
+
+    def release(self, session: Session) -> None:
+        """Let the LRU evict a session again once no request holds it."""
+        with self._users_lock:
+            session.users -= 1
+
+    def append(self, session: Session, messages: List[Message]) -> None:
+        """Persist messages added to a session since it was last stored."""
+        if not messages:
+            return
+        with self._lock:
+            db = self._connection()
+            with db:
+                self._insert(db, session, messages)
+                db.execute("UPDATE sessions SET updated = ? WHERE id = ?", (time.time(), session.id))
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+            db = self._connection()
+            with db:
+                db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+                deleted = db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+        return deleted > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _insert(self, db: sqlite3.Connection, session: Session, messages: List[Message]) -> None:
+        db.executemany(
+            "INSERT INTO session_messages (session_id, seq, message) VALUES (?, ?, ?)",
+            [(session.id, session.stored + offset, message.encoded()) for offset, message in enumerate(messages)],
+        )
+        session.stored += len(messages)
+
+    def _use(self, session: Session) -> None:
+        with self._users_lock:
+            session.users += 1
+
+    def _remember(self, session: Session) -> None:
+        self._cache[session.id] = session
+        self._cache.move_to_end(session.id)
+        excess = len(self._cache) - self.cache_size
+        if excess <= 0:
+            return
+        # The cache may stay over size while every older session is in use.
+        with self._users_lock:
+            idle = [key for key, cached in self._cache.items() if cached.users == 0][:excess]
+        for key in idle:
+            del self._cache[key]
+
+
+_store: Optional[SessionStore] = None
+_store_settings: Dict[str, object] = {"db_path": DEFAULT_SESSION_DB, "cache_size": DEFAULT_SESSION_CACHE_SIZE}
+_store_lock = threading.Lock()
+
+
+def configure_sessions(db_path: Path, cache_size: int) -> None:
+    """Set where sessions are stored and how many stay in memory."""
+    global _store
+    with _store_lock:
+        _store_settings["db_path"] = Path(db_path)
+        _store_settings["cache_size"] = cache_size
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(_store_settings["db_path"], _store_settings["cache_size"])  # type: ignore[arg-type]
+        return _store
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+import logging
+import time
+
+from .catalog import get_catalog
+from .search_index import get_search_index
+
+_logger = logging.getLogger(__name__)
+
+ROUTING_NOTE_PREFIX = "[Skill routing]"
+SUMMARY_CHARS = 200
+
+
+@dataclass
+class SkillRoute:
+    skill_name: str
+    score: float
+    summary: str
+
+
+@lru_cache(maxsize=1024)
+def summarize_documentation(doc_text: str) -> str:
+    """One-line summary of a SKILL.md: its front matter ``description`` or first prose line."""
+    lines = doc_text.splitlines()
+    body_start = 0
+    if lines and lines[0].strip() == "---":
+        for index, line in enumerate(lines[1:], start=1):
+            if line.strip() == "---":
+                body_start = index + 1
+                break
+            key, sep, value = line.partition(":")
+            if sep and key.strip() == "description" and value.strip():
+                return _clip(value.strip().strip("'\""))
+
+    heading = ""
+    for line in lines[body_start:]:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("```"):
+            continue
+        if stripped.startswith("#"):
+            heading = heading or stripped.lstrip("#").strip()
+            continue
+        return _clip(stripped)
+    return _clip(heading)
+
+
+def _clip(text: str) -> str:
+    if len(text) <= SUMMARY_CHARS:
+        return text
+    return text[: SUMMARY_CHARS - 3].rstrip() + "..."
+
+
+def route_skills(skills_folder: Path, query: str, top_k: int) -> List[SkillRoute]:
+    """Score every skill against a user message and return the ``top_k`` best matches."""
+    start_time = time.perf_counter()
+    catalog = get_catalog(skills_folder)
+    routes: List[SkillRoute] = []
+    for hit in get_search_index(skills_folder).search(query, top_k):
+        entry = catalog.get(hit.skill_name)
+        summary = summarize_documentation(entry.documentation) if entry and entry.documentation else ""
+        routes.append(SkillRoute(skill_name=hit.skill_name, score=hit.score, summary=summary or hit.snippet))
+    _logger.info(
+        "Routed message to %d skill(s) in %.2fms", len(routes), (time.perf_counter() - start_time) * 1000
+    )
+    return routes
+
+
+def format_routing_note(routes: List[SkillRoute]) -> Optional[str]:
+    """Render routes as a compact system note, or ``None`` when nothing matched."""
+    if not routes:
+        return None
+    lines = [
+        f"{ROUTING_NOTE_PREFIX} Skills most relevant to the next user message, found by local search. "
+        "These names are real; use get_skill on one that fits instead of calling list_skills first. "
+        "If none fit, use search_skills or list_skills."
+    ]
+    for route in routes:
+        lines.append(f"- {route.skill_name}: {route.summary}" if route.summary else f"- {route.skill_name}")
+    return "\n".join(lines)
@@ -1,18 +1,21 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-import subprocess
-import sys
 import time
 import uuid
-import venv
 
-from .executor import find_python_executable, run_script
-
-# In-memory store for pending skill creation requests awaiting user confirmation
-_pending_creations: Dict[str, Dict[str, object]] = {}
+from .cancellation import CancelToken
+from .catalog import MAX_DOCUMENTATION_BYTES, get_catalog, validate_skill_name
+from .exceptions import ProvisioningBusyError
+from .executor import arun_script, run_script
+from .output_capture import OutputCallback
+from .pending_store import get_pending_store
+from .provisioning import ProvisionReport, provision_venv
+from .provisioning_jobs import ProvisioningJob, get_provisioning_jobs
+from .search_index import get_search_index
+from .venv_store import get_venv_store, skill_venv_key
 
 _logger = logging.getLogger(__name__)
 
@@ -22,39 +25,46 @@ def _log_duration(operation: str, start_time: float) -> None:
     _logger.info("%s completed in %.2fms", operation, elapsed_ms)
 
 
-def validate_skill_name(name: str) -> bool:
-    """Validate a skill name to prevent directory traversal."""
-    if not name:
-        return False
-    return "/" not in name and "\\" not in name and ".." not in name
-
-
 def list_skills(skills_folder: Path) -> Dict[str, object]:
     """List available skills under the configured skills folder."""
     start_time = time.perf_counter()
-    skills_folder = skills_folder.resolve()
-    if not skills_folder.exists():
-        return {"error": f"Skills folder not found at path: {skills_folder}"}
-    if not skills_folder.is_dir():
-        return {"error": f"Skills folder path is not a directory: {skills_folder}"}
-
-    skills: List[str] = []
-    for entry in skills_folder.iterdir():
-        if not entry.is_dir():
-            continue
-        if not validate_skill_name(entry.name):
-            continue
-        skills.append(entry.name)
-
-    result: Dict[str, object] = {"skills": sorted(skills)}
+    catalog = get_catalog(skills_folder)
+    skills = catalog.names()
+    if catalog.error is not None:
+        return {"error": catalog.error}
+
+    result: Dict[str, object] = {"skills": skills}
     _log_duration("list_skills", start_time)
     return result
 
 
+def search_skills(query: str, skills_folder: Path, limit: int = 5) -> Dict[str, object]:
+    """Rank skills by relevance to a free-text query, with a matching snippet for each."""
+    start_time = time.perf_counter()
+    if not isinstance(query, str) or not query.strip():
+        return {"error": "Search query must not be empty"}
+    if not isinstance(limit, int) or isinstance(limit, bool) or limit <= 0:
+        return {"error": "limit must be a positive integer"}
+
+    index = get_search_index(skills_folder)
+    hits = index.search(query, min(limit, 20))
+    if index.catalog.error is not None:
+        return {"error": index.catalog.error}
+
+    result: Dict[str, object] = {
+        "query": query,
+        "results": [
+            {"skill_name": hit.skill_name, "score": hit.score, "file": hit.file, "snippet": hit.snippet}
+            for hit in hits
+        ],
+    }
+    _log_duration("search_skills", start_time)
+    return result
+
+
 def get_skill(skill_name: str, skills_folder: Path) -> Dict[str, object]:
-    """Read the SKILL.MD content for a given skill."""
+    """Read the SKILL.md content for a given skill (the file name is matched case-insensitively)."""
     start_time = time.perf_counter()
-    skills_folder = skills_folder.resolve()
     if not validate_skill_name(skill_name):
         return {
             "error": (
@@ -63,24 +73,20 @@ def get_skill(skill_name: str, skills_folder: Path) -> Dict[str, object]:
             )
         }
 
-    skill_path = skills_folder / skill_name
-    if not skill_path.exists():
+    entry = get_catalog(skills_folder).get(skill_name)
+    if entry is None:
         return {"error": f"Skill '{skill_name}' not found in skills folder"}
 
-    doc_path = skill_path / "SKILL.MD"
-    if not doc_path.exists():
-        return {"error": f"SKILL.MD not found for skill '{skill_name}'"}
+    if entry.doc_path is None:
+        return {"error": f"SKILL.md not found for skill '{skill_name}'"}
+    if entry.doc_error == "too_large":
+        return {"error": f"SKILL.md too large (>{MAX_DOCUMENTATION_BYTES // (1024 * 1024)}MB) for skill '{skill_name}'"}
+    if entry.doc_error == "invalid_utf8":
+        return {"error": f"SKILL.md contains invalid UTF-8 for skill '{skill_name}'"}
+    if entry.doc_error is not None or entry.documentation is None:
+        return {"error": f"Error reading SKILL.md for skill '{skill_name}': {entry.doc_error}"}
 
-    try:
-        if doc_path.stat().st_size > 1024 * 1024:
-            return {"error": f"SKILL.MD too large (>1MB) for skill '{skill_name}'"}
-        content = doc_path.read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        return {"error": f"SKILL.MD contains invalid UTF-8 for skill '{skill_name}'"}
-    except OSError as exc:
-        return {"error": f"Error reading SKILL.MD for skill '{skill_name}': {exc}"}
-
-    result: Dict[str, object] = {"skill_name": skill_name, "documentation": content}
+    result: Dict[str, object] = {"skill_name": skill_name, "documentation": entry.documentation}
     _log_duration("get_skill", start_time)
     return result
 
@@ -136,7 +142,6 @@ def _read_single_file_in_skill(skill_dir: Path, skill_name: str, file_path: str)
 def read_files_in_skill(skill_name: str, file_paths: List[str], skills_folder: Path) -> Dict[str, object]:
     """Read one or more files within a skill folder with path validation."""
     start_time = time.perf_counter()
-    skills_folder = skills_folder.resolve()
     if not validate_skill_name(skill_name):
         return {
             "success": False,
@@ -153,8 +158,8 @@ def read_files_in_skill(skill_name: str, file_paths: List[str], skills_folder: P
             "error": "Invalid file paths",
         }
 
-    skill_dir = skills_folder / skill_name
-    if not skill_dir.exists():
+    entry = get_catalog(skills_folder).get(skill_name)
+    if entry is None:
         return {
             "success": False,
             "skill_name": skill_name,
@@ -162,7 +167,7 @@ def read_files_in_skill(skill_name: str, file_paths: List[str], skills_folder: P
             "error": f"Skill '{skill_name}' not found in skills folder",
         }
 
-    files = [_read_single_file_in_skill(skill_dir, skill_name, file_path) for file_path in file_paths]
+    files = [_read_single_file_in_skill(entry.path, skill_name, file_path) for file_path in file_paths]
     result = {
         "success": all(file_result.get("success") is True for file_result in files),
         "skill_name": skill_name,
@@ -173,33 +178,27 @@ def read_files_in_skill(skill_name: str, file_paths: List[str], skills_folder: P
     return result
 
 
-def run_python_script(
-    skill_name: str,
-    script: str,
-    skills_folder: Path,
-    timeout_seconds: int,
-) -> Dict[str, object]:
-    """Execute a Python script using the skill's venv interpreter."""
-    start_time = time.perf_counter()
-    skills_folder = skills_folder.resolve()
+def _resolve_script_target(skill_name: str, skills_folder: Path) -> Tuple[Optional[Dict[str, object]], Path, Path]:
+    """Validate a skill for script execution; returns (error, skill_path, python_executable)."""
     if not validate_skill_name(skill_name):
         return {
             "error": (
                 f"Invalid skill name: '{skill_name}'. Skill names must not contain '/', "
                 "'\\', or '..'"
             )
-        }
+        }, Path(), Path()
 
-    skill_path = (skills_folder / skill_name).resolve()
-    if not skill_path.exists():
-        return {"error": f"Skill '{skill_name}' not found in skills folder"}
+    entry = get_catalog(skills_folder).get(skill_name)
+    if entry is None:
+        return {"error": f"Skill '{skill_name}' not found in skills folder"}, Path(), Path()
+
+    if entry.python_executable is None:
+        return {"error": f"Skill '{skill_name}' does not have a venv. Cannot execute script."}, entry.path, Path()
 
-    python_executable = find_python_executable(skill_path)
-    if python_executable is None:
-        return {"error": f"Skill '{skill_name}' does not have a venv. Cannot execute script."}
+    return None, entry.path, entry.python_executable
 
-    result = run_script(python_executable, script, skill_path, timeout_seconds)
 
+def _script_payload(skill_name: str, result: Dict[str, object]) -> Dict[str, object]:
     payload: Dict[str, object] = {
         "skill_name": skill_name,
         "stdout": result.get("stdout", ""),
@@ -208,9 +207,63 @@ def run_python_script(
         "timed_out": result.get("timed_out", False),
     }
 
+    if "output_truncated" in result:
+        payload["output_truncated"] = result["output_truncated"]
+    if "usage" in result:
+        payload["usage"] = result["usage"]
+    if "queue_wait_seconds" in result:
+        payload["queue_wait_seconds"] = result["queue_wait_seconds"]
+    if "retry_after_seconds" in result:
+        payload["retry_after_seconds"] = result["retry_after_seconds"]
     if "error" in result:
         payload["error"] = result["error"]
+    return payload
+
+
+def run_python_script(
+    skill_name: str,
+    script: str,
+    skills_folder: Path,
+    timeout_seconds: int,
+    on_output: Optional[OutputCallback] = None,
+    session: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    """Execute a Python script using the skill's venv interpreter.
 
+    ``session`` names the conversation for the execution scheduler's quotas;
+    cancelling ``cancel`` kills the running script.
+    """
+    start_time = time.perf_counter()
+    error, skill_path, python_executable = _resolve_script_target(skill_name, skills_folder)
+    if error is not None:
+        return error
+
+    result = run_script(python_executable, script, skill_path, timeout_seconds, on_output, session, cancel)
+
+    payload = _script_payload(skill_name, result)
+    _log_duration("run_python_script", start_time)
+    return payload
+
+
+async def arun_python_script(
+    skill_name: str,
+    script: str,
+    skills_folder: Path,
+    timeout_seconds: int,
+    on_output: Optional[OutputCallback] = None,
+    session: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, object]:
+    """Async counterpart of ``run_python_script``."""
+    start_time = time.perf_counter()
+    error, skill_path, python_executable = _resolve_script_target(skill_name, skills_folder)
+    if error is not None:
+        return error
+
+    result = await arun_script(python_executable, script, skill_path, timeout_seconds, on_output, session, cancel)
+
+    payload = _script_payload(skill_name, result)
     _log_duration("run_python_script", start_time)
     return payload
 
@@ -223,7 +276,6 @@ def write_file_in_skill(
 ) -> Dict[str, object]:
     """Write or overwrite a file within a skill folder with path validation."""
     start_time = time.perf_counter()
-    skills_folder = skills_folder.resolve()
 
     if not validate_skill_name(skill_name):
         return {"success": False, "error": "Invalid skill name"}
@@ -238,10 +290,12 @@ def write_file_in_skill(
     if any(part.startswith(".") for part in normalized.split("/")):
         return {"success": False, "error": "Cannot write to hidden directories/files"}
 
-    skill_dir = skills_folder / skill_name
-    if not skill_dir.exists():
+    catalog = get_catalog(skills_folder)
+    entry = catalog.get(skill_name)
+    if entry is None:
         return {"success": False, "error": f"Skill '{skill_name}' not found"}
 
+    skill_dir = entry.path
     target = (skill_dir / file_path).resolve()
     if not target.is_relative_to(skill_dir):
         return {"success": False, "error": "Path traversal detected: cannot write outside skill folder"}
@@ -251,6 +305,8 @@ def write_file_in_skill(
         target.write_text(content, encoding="utf-8")
     except OSError as exc:
         return {"success": False, "error": f"Failed to write file: {exc}"}
+    finally:
+        catalog.invalidate(skill_name)
 
     result: Dict[str, object] = {
         "success": True,
@@ -297,12 +353,12 @@ def create_skill(
 
     # Store the pending creation with a confirmation token
     token = uuid.uuid4().hex
-    _pending_creations[token] = {
+    get_pending_store().put(token, {
         "skill_name": skill_name,
         "skill_md_content": skill_md_content,
         "requirements": requirements,
         "skills_folder": str(skills_folder),
-    }
+    })
 
     result: Dict[str, object] = {
         "requires_confirmation": True,
@@ -319,10 +375,54 @@ def confirm_create_skill(token: str) -> Dict[str, object]:
     """Execute a previously proposed skill creation after user confirmation."""
     start_time = time.perf_counter()
 
-    pending = _pending_creations.pop(token, None)
+    pending = get_pending_store().take(token)
     if pending is None:
         return {"error": "Invalid or expired confirmation token"}
 
+    result = _create_confirmed_skill(pending, ProvisionReport())
+    if result.get("success"):
+        _log_duration("confirm_create_skill", start_time)
+    return result
+
+
+def start_create_skill(token: str) -> Dict[str, object]:
+    """Queue a confirmed skill creation as a background job and return the job at once.
+
+    Progress (each step and every pip output line) is recorded on the job;
+    raises ``ProvisioningBusyError`` when the job queue is full, leaving the
+    token valid for a retry.
+    """
+    pending = get_pending_store().take(token)
+    if pending is None:
+        return {"error": "Invalid or expired confirmation token"}
+
+    def work(job: ProvisioningJob) -> Dict[str, object]:
+        start_time = time.perf_counter()
+        result = _create_confirmed_skill(pending, ProvisionReport(listener=job.emit))
+        if result.get("success"):
+            _log_duration("confirm_create_skill", start_time)
+        return result
+
+    try:
+        job = get_provisioning_jobs().submit(str(pending["skill_name"]), work)
+    except ProvisioningBusyError:
+        get_pending_store().put(token, pending)
+        raise
+    return job.snapshot()
+
+
+def _create_confirmed_skill(pending: Dict[str, object], report: ProvisionReport) -> Dict[str, object]:
+    skill_name = str(pending["skill_name"])
+    skills_folder = Path(str(pending["skills_folder"]))
+    try:
+        return _materialize_skill(pending, report)
+    finally:
+        # The folder, SKILL.md and venv all appear at once for catalog readers.
+        get_catalog(skills_folder).invalidate(skill_name)
+
+
+def _materialize_skill(pending: Dict[str, object], report: ProvisionReport) -> Dict[str, object]:
+    """Create the folder, SKILL.md, requirements and venv for a confirmed skill."""
     skill_name = str(pending["skill_name"])
     skill_md_content = str(pending["skill_md_content"])
     requirements = pending.get("requirements")
@@ -331,79 +431,66 @@ def confirm_create_skill(token: str) -> Dict[str, object]:
     skill_path = skills_folder / skill_name
 
     # 1. Create folder
-    try:
-        skill_path.mkdir(parents=True, exist_ok=False)
-    except OSError as exc:
-        return {"error": f"Failed to create skill folder: {exc}"}
-
-    # 2. Write SKILL.md
-    try:
-        (skill_path / "SKILL.md").write_text(skill_md_content, encoding="utf-8")
-    except OSError as exc:
-        return {"error": f"Failed to write SKILL.md: {exc}"}
+    with report.step("create_folder"):
+        try:
+            skill_path.mkdir(parents=True, exist_ok=False)
+        except OSError as exc:
+            return {"error": f"Failed to create skill folder: {exc}"}
 
-    # 3. Write requirements.txt (if provided)
-    has_requirements = False
-    if requirements and requirements.strip():
+    with report.step("write_files"):
+        # 2. Write SKILL.md
         try:
-            (skill_path / "requirements.txt").write_text(requirements.strip() + "\n", encoding="utf-8")
-            has_requirements = True
+            (skill_path / "SKILL.md").write_text(skill_md_content, encoding="utf-8")
         except OSError as exc:
-            return {"error": f"Failed to write requirements.txt: {exc}"}
+            return {"error": f"Failed to write SKILL.md: {exc}"}
 
-    # 4. Create venv
-    venv_path = skill_path / "venv"
-    try:
-        venv.create(str(venv_path), with_pip=True)
-    except Exception as exc:
+        # 3. Write requirements.txt (if provided)
+        has_requirements = False
+        if requirements and str(requirements).strip():
+            try:
+                (skill_path / "requirements.txt").write_text(str(requirements).strip() + "\n", encoding="utf-8")
+                has_requirements = True
+            except OSError as exc:
+                return {"error": f"Failed to write requirements.txt: {exc}"}
+
+    # 4. Create venv and 5. install requirements
+    store = get_venv_store()
+    if store is not None:
+        store.attach(skill_path, str(requirements) if has_requirements else "", report)
+    else:
+        provision_venv(skill_path / "venv", skill_path / "requirements.txt" if has_requirements else None, report)
+    if not report.venv_created:
         return {
-            "warning": f"Skill folder created but venv creation failed: {exc}",
+            "warning": f"Skill folder created but {report.error}",
             "skill_name": skill_name,
             "folder_created": True,
             "venv_created": False,
+            "timings": report.timings,
         }
-
-    # 5. pip install requirements
-    pip_output = ""
-    if has_requirements:
-        pip_executable = venv_path / "bin" / "pip"
-        if not pip_executable.exists():
-            pip_executable = venv_path / "Scripts" / "pip.exe"
-
-        if pip_executable.exists():
-            try:
-                proc = subprocess.run(
-                    [str(pip_executable), "install", "-r", str(skill_path / "requirements.txt")],
-                    cwd=str(skill_path),
-                    capture_output=True,
-                    text=True,
-                    timeout=120,
-                )
-                pip_output = proc.stdout
-                if proc.returncode != 0:
-                    return {
-                        "warning": f"Skill created but pip install failed",
-                        "skill_name": skill_name,
-                        "folder_created": True,
-                        "venv_created": True,
-                        "pip_stderr": proc.stderr,
-                    }
-            except subprocess.TimeoutExpired:
-                return {
-                    "warning": "Skill created but pip install timed out (120s)",
-                    "skill_name": skill_name,
-                    "folder_created": True,
-                    "venv_created": True,
-                }
+    if report.error is not None:
+        warning: Dict[str, object] = {
+            "warning": f"Skill created but {report.error}",
+            "skill_name": skill_name,
+            "folder_created": True,
+            "venv_created": True,
+            "venv_method": report.method,
+            "timings": report.timings,
+        }
+        if report.pip_stderr:
+            warning["pip_stderr"] = report.pip_stderr
+        return warning
 
     result: Dict[str, object] = {
         "success": True,
         "skill_name": skill_name,
         "folder_created": True,
         "venv_created": True,
-        "requirements_installed": has_requirements,
-        "pip_output": pip_output,
+        "requirements_installed": report.requirements_installed,
+        "pip_output": report.pip_output,
+        "venv_method": report.method,
+        "timings": report.timings,
         "message": f"Skill '{skill_name}' created successfully!",
     }
-    _log_duration("confirm_create_skill", start_time)
+    if store is not None:
+        result["venv_key"] = skill_venv_key(skill_path)
     return result
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+import hashlib
+import logging
+import threading
+import time
+
+from .llm_client import LLMClient
+from .models import Message
+
+_logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "[Summary of earlier conversation]"
+_MAX_CACHED_SUMMARIES = 256
+_MAX_MESSAGE_CHARS = 2000
+
+_SUMMARY_INSTRUCTIONS = (
+    "You compress the history of a conversation between a user and an assistant that uses "
+    "skill tools. Write a concise summary of at most {max_words} words that keeps the user's "
+    "goals, decisions, skill names, file paths, key tool results and unfinished tasks. "
+    "Merge in the previous summary if one is given. Reply with the summary only."
+)
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def segment_key(previous: Optional[str], segment: List[Message]) -> str:
+    """Hash identifying a summary: the previous summary plus the encoded messages."""
+    digest = hashlib.sha256((previous or "").encode("utf-8"))
+    for message in segment:
+        digest.update(b"\n")
+        digest.update(message.encoded())
+    return digest.hexdigest()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+        return _executor
+
+
+def _transcript(segment: List[Message]) -> str:
+    lines = []
+    for message in segment:
+        speaker = f"{message.role} ({message.name})" if message.name else message.role
+        text = message.content or ""
+        if message.tool_calls:
+            calls = ", ".join(
+                f"{call.get('function', {}).get('name')}({call.get('function', {}).get('arguments', '')})"
+                for call in message.tool_calls
+                if isinstance(call, dict)
+            )
+            text = f"{text}\n[tool calls: {calls}]".strip()
+        if len(text) > _MAX_MESSAGE_CHARS:
+            text = text[:_MAX_MESSAGE_CHARS] + " ..."
+        lines.append(f"{speaker}: {text}")
+    return "\n\n".join(lines)
+
+
+class HistorySummarizer:
+    """Summarize trimmed history segments with a (cheaper) model, off the request path.
+
+    Summaries are cached process-wide by ``segment_key``, so a history that is
+    trimmed the same way again, e.g. a client resending it to the API, gets its
+    summary without another LLM call.
+    """
+    def __init__(self, client: LLMClient, max_words: int = 200) -> None:
+        self.client = client
+        self.max_words = max_words
+
+    def cached(self, key: str) -> Optional[str]:
+        with _cache_lock:
+            summary = _cache.get(key)
+            if summary is not None:
+                _cache.move_to_end(key)
+            return summary
+
+    def summarize(self, previous: Optional[str], segment: List[Message]) -> str:
+        """Summarize a segment synchronously, using the cache when possible."""
+        key = segment_key(previous, segment)
+        summary = self.cached(key)
+        if summary is not None:
+            return summary
+
+        start_time = time.perf_counter()
+        prompt = _transcript(segment)
+        if previous:
+            prompt = f"Previous summary:\n{previous}\n\nNew messages:\n{prompt}"
+        response = self.client.chat(
+            [
+                {"role": "system", "content": _SUMMARY_INSTRUCTIONS.format(max_words=self.max_words)},
+                {"role": "user", "content": prompt},
+            ],
+            [],
+        )
+        summary = str(response.get("content") or "").strip()
+        if not summary:
+            raise ValueError("Summarization model returned no content")
+
+        with _cache_lock:
+            _cache[key] = summary
+            while len(_cache) > _MAX_CACHED_SUMMARIES:
+                _cache.popitem(last=False)
+        _logger.info(
+            "Summarized %d trimmed messages with %s in %.2fms",
+            len(segment),
+            self.client.model_name,
+            (time.perf_counter() - start_time) * 1000,
+        )
+        return summary
+
+    def submit(self, previous: Optional[str], segment: List[Message]) -> "Future[str]":
+        """Summarize a segment on a background thread."""
+        return _get_executor().submit(self.summarize, previous, list(segment))
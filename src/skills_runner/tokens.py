@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+
+from .models import Message
+
+_logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+DEFAULT_CONTEXT_TOKENS = 32000
+# Role markers and separators the chat format adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_tokenizers: Dict[str, TokenCounter] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast tokenizer-free estimate: ~4 ASCII characters per token, 1 per other character."""
+    if not text:
+        return 0
+    non_ascii = len(text) - len(text.encode("ascii", errors="ignore"))
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+def register_tokenizer(model_prefix: str, counter: TokenCounter) -> None:
+    """Use ``counter`` for models whose name starts with ``model_prefix``."""
+    _tokenizers[model_prefix] = counter
+    _tiktoken_counter.cache_clear()
+
+
+def get_tokenizer(model_name: str) -> TokenCounter:
+    """Return the token counter for a model.
+
+    A registered counter wins (longest matching prefix), then tiktoken when it
+    is installed, then ``estimate_tokens``.
+    """
+    matches = [prefix for prefix in _tokenizers if model_name.startswith(prefix)]
+    if matches:
+        return _tokenizers[max(matches, key=len)]
+    return _tiktoken_counter(model_name) or estimate_tokens
+
+
+@lru_cache(maxsize=16)
+def _tiktoken_counter(model_name: str) -> Optional[TokenCounter]:
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:  # noqa: BLE001 - e.g. the BPE file cannot be downloaded
+        _logger.warning("tiktoken unavailable for %s, estimating tokens instead: %s", model_name, exc)
+        return None
+
+    def count(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count
+
+
+def message_tokens(message: Message, counter: TokenCounter) -> int:
+    """Token count of a message, cached on the message after the first call."""
+    if message.token_count is None:
+        total = MESSAGE_OVERHEAD_TOKENS + counter(message.content or "")
+        if message.tool_calls:
+            total += counter(json.dumps(message.tool_calls))
+        if message.name:
+            total += counter(message.name)
+        message.token_count = total
+    return message.token_count
+
+
+def tools_tokens(tools: List[Dict[str, Any]], counter: TokenCounter) -> int:
+    """Approximate tokens the tool definitions add to every request."""
+    return counter(json.dumps(tools)) if tools else 0
+
+
+def context_budget_for(model_name: str, default: int, per_model: Dict[str, int]) -> int:
+    """Pick a model's token budget: exact name, then longest matching prefix, then the default."""
+    if model_name in per_model:
+        return per_model[model_name]
+    matches = [prefix for prefix in per_model if model_name.startswith(prefix)]
+    if matches:
+        return per_model[max(matches, key=len)]
+    return default
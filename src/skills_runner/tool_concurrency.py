@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+import asyncio
+import threading
+
+# Tools that change skill folders run alone, in order, so calls issued in the
+# same round never observe each other's writes half-applied.
+SEQUENTIAL_TOOLS = frozenset({"write_file_in_skill", "create_skill"})
+
+DEFAULT_TOOL_LIMITS: Dict[str, int] = {"run_python_script": 4}
+
+
+@dataclass
+class ToolConcurrencySettings:
+    """Limits for running the tool calls of one assistant message concurrently."""
+    max_parallel: int = 8
+    per_tool: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_TOOL_LIMITS))
+
+
+class _Waiter:
+    def __init__(self, wake: Callable[[], object]) -> None:
+        self.wake = wake
+        self.granted = False
+
+
+class ToolSlots:
+    """A process-wide cap on concurrent tool calls, usable from threads and event loops.
+
+    ``with slots:`` blocks the calling thread and ``async with slots:`` only
+    the awaiting task, so conversations on either path count against the same
+    limit. A released slot goes straight to the longest waiter.
+    """
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._used = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> None:
+        with self._lock:
+            if self._used < self.limit:
+                self._used += 1
+                return
+            granted = threading.Event()
+            self._waiters.append(_Waiter(granted.set))
+        granted.wait()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.release()
+
+    async def __aenter__(self) -> None:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[None]" = loop.create_future()
+        with self._lock:
+            if self._used < self.limit:
+                self._used += 1
+                return
+            waiter = _Waiter(lambda: loop.call_soon_threadsafe(_resolve, future))
+            self._waiters.append(waiter)
+        try:
+            await future
+        except BaseException:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # The slot was handed over as the task was cancelled; pass it on.
+                self.release()
+            raise
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.release()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+                return
+            self._used -= 1
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_settings = ToolConcurrencySettings()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Created on first use and replaced on reconfiguration; callers holding an old
+# one release into it.
+_slots: Dict[Optional[str], ToolSlots] = {}
+_parallel_slots: Optional[ToolSlots] = None
+
+
+def configure_tool_concurrency(max_parallel: int, per_tool: Dict[str, int]) -> None:
+    """Set the shared executor size and per-tool limits; 1 disables parallelism."""
+    global _executor, _parallel_slots
+    with _executor_lock:
+        previous = _executor if max_parallel != _settings.max_parallel else None
+        if previous is not None:
+            _executor = None
+        _settings.max_parallel = max_parallel
+        _settings.per_tool = {**DEFAULT_TOOL_LIMITS, **per_tool}
+        _slots.clear()
+        _parallel_slots = None
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def max_parallel_tools() -> int:
+    return _settings.max_parallel
+
+
+def tool_limit(name: Optional[str]) -> int:
+    """Maximum concurrent calls of one tool across the process."""
+    if name in SEQUENTIAL_TOOLS:
+        return 1
+    return max(1, min(_settings.per_tool.get(name or "", _settings.max_parallel), _settings.max_parallel))
+
+
+def tool_slots(name: Optional[str]) -> ToolSlots:
+    """Return the process-wide limiter for one tool, shared by every conversation."""
+    with _executor_lock:
+        slots = _slots.get(name)
+        if slots is None:
+            slots = _slots[name] = ToolSlots(tool_limit(name))
+        return slots
+
+
+def parallel_slots() -> ToolSlots:
+    """Return the process-wide limiter on tool calls running at once."""
+    global _parallel_slots
+    with _executor_lock:
+        if _parallel_slots is None:
+            _parallel_slots = ToolSlots(_settings.max_parallel)
+        return _parallel_slots
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Return the process-wide bounded executor for parallel tool calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_settings.max_parallel, thread_name_prefix="tool-call")
+        return _executor
+
+
+def tool_name(tool_call: Dict[str, Any]) -> Optional[str]:
+    function = tool_call.get("function")
+    if not isinstance(function, dict):
+        return None
+    name = function.get("name")
+    return name if isinstance(name, str) else None
+
+
+def plan_tool_batches(tool_calls: List[Dict[str, Any]]) -> List[List[int]]:
+    """Group tool call indexes into batches that may run concurrently.
+
+    Consecutive read-only calls share a batch; each mutating call gets its
+    own batch, so batches run in order around it.
+    """
+    if _settings.max_parallel <= 1:
+        return [[index] for index in range(len(tool_calls))]
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for index, tool_call in enumerate(tool_calls):
+        if tool_name(tool_call) in SEQUENTIAL_TOOLS:
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([index])
+        else:
+            current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
@@ -7,6 +7,32 @@ LIST_SKILLS_DEF = {
     },
 }
 
+SEARCH_SKILLS_DEF = {
+    "type": "function",
+    "function": {
+        "name": "search_skills",
+        "description": (
+            "Search skills by keywords across their SKILL.md and text files. Returns the best "
+            "matching skill names, ranked, with a short snippet each. Prefer this over calling "
+            "get_skill on many skills when looking for one that fits a task."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords describing the task (e.g., 'convert currency exchange rate')",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of skills to return (default 5, max 20)",
+                },
+            },
+            "required": ["query"],
+        },
+    },
+}
+
 GET_SKILL_DEF = {
     "type": "function",
     "function": {
@@ -51,6 +77,41 @@ READ_FILES_IN_SKILL_DEF = {
     },
 }
 
+READ_ARTIFACT_DEF = {
+    "type": "function",
+    "function": {
+        "name": "read_artifact",
+        "description": (
+            "Read more of a large tool output that was replaced by a preview. Tool results show "
+            "a '<field>_artifact' entry with its artifact_id, total_bytes and total_lines. Read "
+            "by line (default) or byte offset; follow next_offset to continue."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "artifact_id": {
+                    "type": "string",
+                    "description": "Artifact id from a tool result (e.g., 'art_3f2a...')",
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "First line (0-based) or byte to read (default 0)",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Number of lines or bytes to read (default 200 lines; results are size capped)",
+                },
+                "unit": {
+                    "type": "string",
+                    "enum": ["lines", "bytes"],
+                    "description": "Whether offset and limit count lines or bytes (default 'lines')",
+                },
+            },
+            "required": ["artifact_id"],
+        },
+    },
+}
+
 RUN_PYTHON_SCRIPT_DEF = {
     "type": "function",
     "function": {
@@ -132,4 +193,4 @@ CREATE_SKILL_DEF = {
     },
 }
 
-SKILLS_TOOLS = [LIST_SKILLS_DEF, GET_SKILL_DEF, READ_FILES_IN_SKILL_DEF, WRITE_FILE_IN_SKILL_DEF, RUN_PYTHON_SCRIPT_DEF, CREATE_SKILL_DEF]
+SKILLS_TOOLS = [LIST_SKILLS_DEF, SEARCH_SKILLS_DEF, GET_SKILL_DEF, READ_FILES_IN_SKILL_DEF, READ_ARTIFACT_DEF, WRITE_FILE_IN_SKILL_DEF, RUN_PYTHON_SCRIPT_DEF, CREATE_SKILL_DEF]
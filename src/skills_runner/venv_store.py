@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+from .provisioning import ProvisionReport, provision_venv, venv_python
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+_logger = logging.getLogger(__name__)
+
+# Written into a skill folder that uses a shared venv; holds the store key.
+VENV_REF_FILE = ".skills-venv"
+_REQUIREMENT_NAME = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS envs (
+    key TEXT PRIMARY KEY,
+    requirements TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS env_refs (
+    key TEXT NOT NULL,
+    skill_path TEXT NOT NULL,
+    PRIMARY KEY (key, skill_path)
+);
+"""
+
+
+def normalize_requirements(text: str) -> List[str]:
+    """Requirement lines without comments, whitespace, order or name spelling differences."""
+    lines = set()
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        line = "".join(line.split())
+        match = _REQUIREMENT_NAME.match(line)
+        if match:
+            # Package names compare case-insensitively with -, _ and . equivalent (PEP 503).
+            name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+            line = name + line[match.end():]
+        lines.add(line)
+    return sorted(lines)
+
+
+def requirements_key(text: str) -> str:
+    """Store key for a dependency set, including the interpreter version the venv is built for."""
+    version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    payload = "\n".join([f"python {version} {sys.platform}", *normalize_requirements(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class VenvStore:
+    """Venvs shared by every skill with the same normalized requirements.
+
+    Each environment lives in ``root/<key>`` and is provisioned once. Skills
+    record their key in a ``.skills-venv`` file, and the store counts them per
+    key in SQLite; ``collect_garbage`` deletes environments nothing refers to.
+    A file lock per key keeps several server processes from building or
+    deleting the same environment at once.
+    """
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with self._lock held.
+        if self._db is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.root / "store.db"), check_same_thread=False, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f"{key}.lock"
+        while True:
+            handle = open(path, "a")
+            if fcntl is None:
+                break
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            # collect_garbage unlinks the file while holding the lock; a lock on
+            # the unlinked file excludes nobody, so take the lock again on a new one.
+            try:
+                if os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            handle.close()
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            handle.close()
+
+    def python_for(self, key: str) -> Optional[Path]:
+        """Interpreter of a ready environment, or ``None``."""
+        if not re.fullmatch(r"[0-9a-f]+", key):
+            return None
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM envs WHERE key = ?", (key,)).fetchone()
+        python = venv_python(self.root / key)
+        return python if row is not None and python.exists() else None
+
+    def attach(self, skill_path: Path, requirements: str, report: Optional[ProvisionReport] = None) -> ProvisionReport:
+        """Point a skill at the environment for its requirements, provisioning it on first use."""
+        report = report if report is not None else ProvisionReport()
+        key = requirements_key(requirements)
+        env_path = self.root / key
+        with self._key_lock(key):
+            if self.python_for(key) is None:
+                shutil.rmtree(env_path, ignore_errors=True)
+                requirements_path: Optional[Path] = None
+                if normalize_requirements(requirements):
+                    requirements_path = self.root / f"{key}.requirements.txt"
+                    requirements_path.write_text(requirements.strip() + "\n", encoding="utf-8")
+                provision_venv(env_path, requirements_path, report)
+                if requirements_path is not None:
+                    requirements_path.unlink()
+                if report.error is not None:
+                    shutil.rmtree(env_path, ignore_errors=True)
+                    report.venv_created = False
+                    return report
+                with self._lock:
+                    db = self._connection()
+                    with db:
+                        db.execute(
+                            "INSERT OR REPLACE INTO envs (key, requirements, created) VALUES (?, ?, ?)",
+                            (key, "\n".join(normalize_requirements(requirements)), time.time()),
+                        )
+                _logger.info("Provisioned shared venv %s", key)
+            else:
+                report.method = "shared"
+                report.venv_created = True
+                report.requirements_installed = bool(normalize_requirements(requirements))
+
+            (skill_path / VENV_REF_FILE).write_text(key + "\n", encoding="utf-8")
+            with self._lock:
+                db = self._connection()
+                with db:
+                    db.execute(
+                        "INSERT OR IGNORE INTO env_refs (key, skill_path) VALUES (?, ?)",
+                        (key, str(skill_path.resolve())),
+                    )
+        return report
+
+    def references(self, key: str) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT COUNT(*) FROM env_refs WHERE key = ?", (key,)).fetchone()
+        return int(row[0])
+
+    def collect_garbage(self) -> List[str]:
+        """Drop references of skills that no longer use a key, then delete unreferenced environments."""
+        with self._lock:
+            db = self._connection()
+            refs = db.execute("SELECT key, skill_path FROM env_refs").fetchall()
+            stale = [(key, path) for key, path in refs if skill_venv_key(Path(path)) != key]
+            with db:
+                db.executemany("DELETE FROM env_refs WHERE key = ? AND skill_path = ?", stale)
+            unused = [
+                row[0]
+                for row in db.execute(
+                    "SELECT key FROM envs WHERE key NOT IN (SELECT DISTINCT key FROM env_refs)"
+                ).fetchall()
+            ]
+
+        removed: List[str] = []
+        for key in unused:
+            with self._key_lock(key):
+                # Another process may have attached a skill since the query.
+                if self.references(key):
+                    continue
+                with self._lock:
+                    db = self._connection()
+                    with db:
+                        db.execute("DELETE FROM envs WHERE key = ?", (key,))
+                shutil.rmtree(self.root / key, ignore_errors=True)
+                try:
+                    (self.root / f"{key}.lock").unlink()
+                except OSError:  # pragma: no cover - Windows cannot unlink an open file
+                    pass
+            removed.append(key)
+        if removed:
+            _logger.info("Removed %d unused shared venv(s)", len(removed))
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def skill_venv_key(skill_path: Path) -> Optional[str]:
+    """The shared venv key a skill folder refers to, if any."""
+    try:
+        key = (skill_path / VENV_REF_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return key or None
+
+
+_store: Optional[VenvStore] = None
+
+
+def configure_venv_store(root: Optional[Path]) -> None:
+    """Enable the shared venv store at ``root`` (``None`` gives each skill its own venv)."""
+    global _store
+    previous, _store = _store, (VenvStore(root) if root is not None else None)
+    if previous is not None:
+        previous.close()
+    if _store is not None:
+        _store.collect_garbage()
+
+
+def get_venv_store() -> Optional[VenvStore]:
+    return _store
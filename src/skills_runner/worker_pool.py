@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import atexit
+import json
+import logging
+import os
+import selectors
+import subprocess
+import tempfile
+import threading
+import time
+
+from .cancellation import SCRIPT_CANCELLED, CancelToken
+from .output_capture import (
+    FileTailer,
+    OutputCallback,
+    capture_settings,
+    files_overflowed,
+    output_fields,
+    output_file_cap,
+    overflow_error,
+    read_bounded_file,
+)
+from .resource_limits import ResourceUsage, record_usage, resource_limits, usage_fields
+
+_logger = logging.getLogger(__name__)
+
+_OUTPUT_POLL_SECONDS = 0.1
+# Reply from _exchange when the job's output outgrew the limit and it must be killed.
+_OVERFLOW: Dict[str, object] = {"overflow": True}
+# Reply from _exchange when the caller cancelled the job.
+_CANCELLED: Dict[str, object] = {"cancelled": True}
+
+
+@lru_cache(maxsize=1)
+def worker_source() -> str:
+    """Return the source of the in-venv job runner passed to ``python -c``."""
+    return Path(__file__).with_name("_worker.py").read_text(encoding="utf-8")
+
+
+@dataclass
+class PoolSettings:
+    """Sizing and recycling limits shared by every per-venv pool."""
+    size: int = 0
+    idle_seconds: int = 300
+    max_jobs: int = 100
+
+
+@dataclass
+class _Worker:
+    process: subprocess.Popen[str]
+    jobs: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def kill(self) -> None:
+        if self.alive():
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            _logger.warning("Worker %s did not exit after kill", self.process.pid)
+        for stream in (self.process.stdin, self.process.stdout):
+            if stream is not None:
+                stream.close()
+
+
+def job_output_fields(stdout_path: Path, stderr_path: Path) -> Dict[str, object]:
+    """Read a job's output files, keeping only their head and tail when they are large."""
+    max_bytes = capture_settings().max_bytes
+    return output_fields(read_bounded_file(stdout_path, max_bytes), read_bounded_file(stderr_path, max_bytes))
+
+
+def wait_slices(timeout: float) -> Iterator[float]:
+    """Split a wait into short slices so job output files can be checked meanwhile."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(remaining, _OUTPUT_POLL_SECONDS)
+
+
+def reply_usage(reply: Optional[Dict[str, object]], started: float) -> ResourceUsage:
+    """Usage a worker reported for a job, with the wall time seen by the runner."""
+    reported = reply.get("usage") if reply else None
+    usage = dict(reported) if isinstance(reported, dict) else usage_fields(None, None, None, 0.0)
+    usage["wall_seconds"] = round(time.perf_counter() - started, 4)
+    return usage
+
+
+def job_tailer(job: Dict[str, object], on_output: Optional[OutputCallback]) -> Optional[FileTailer]:
+    """Forward a job's output files live when a callback is given."""
+    if on_output is None:
+        return None
+    paths = {"stdout": Path(str(job["stdout_path"])), "stderr": Path(str(job["stderr_path"]))}
+    return FileTailer(paths, on_output, capture_settings().max_bytes)
+
+
+def job_overflowed(job: Dict[str, object]) -> bool:
+    """Whether a job's output files have passed the size at which it is killed."""
+    return files_overflowed((Path(str(job["stdout_path"])), Path(str(job["stderr_path"]))), output_file_cap())
+
+
+class WorkerPool:
+    """Warm interpreter processes for one venv Python executable."""
+    def __init__(self, python_executable: Path, settings: PoolSettings) -> None:
+        self.python_executable = python_executable
+        self.settings = settings
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _spawn(self) -> _Worker:
+        process = subprocess.Popen(
+            [str(self.python_executable), "-c", worker_source(), "pool"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+        )
+        _logger.info("Started pooled worker %s for %s", process.pid, self.python_executable)
+        return _Worker(process=process)
+
+    def _acquire(self, deadline: float, cancel: Optional[CancelToken] = None) -> Optional[_Worker]:
+        """Take an idle worker or start one; ``None`` if none frees up by ``deadline`` or on cancel."""
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        self._busy += 1
+                        return worker
+                    worker.kill()
+                if self._busy < max(self.settings.size, 1):
+                    self._busy += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (cancel is not None and cancel.cancelled):
+                    return None
+                self._condition.wait(min(remaining, _OUTPUT_POLL_SECONDS) if cancel is not None else remaining)
+
+        try:
+            return self._spawn()
+        except OSError:
+            with self._condition:
+                self._busy -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        retire = worker is not None and (
+            self._closed or not worker.alive() or worker.jobs >= self.settings.max_jobs
+        )
+        with self._condition:
+            self._busy -= 1
+            if worker is not None and not retire:
+                worker.last_used = time.monotonic()
+                self._idle.append(worker)
+            self._condition.notify()
+        if worker is not None and retire:
+            worker.kill()
+
+    def run(
+        self,
+        script: str,
+        cwd: Path,
+        timeout: int,
+        on_output: Optional[OutputCallback] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Dict[str, object]:
+        """Run a script in a pooled worker, matching ``run_script``'s result shape.
+
+        Waiting for a busy pool counts against ``timeout``. A cancelled job's
+        worker is killed within one output poll interval.
+        """
+        limits = resource_limits()
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._acquire(deadline, cancel)
+        except OSError as exc:
+            return {
+                "stdout": "",
+                "stderr": "",
+                "returncode": -1,
+                "timed_out": False,
+                "error": f"Error executing script: {exc}",
+            }
+        if worker is None:
+            cancelled = cancel is not None and cancel.cancelled
+            return {
+                "stdout": "",
+                "stderr": "",
+                "returncode": -1,
+                "timed_out": not cancelled,
+                "error": SCRIPT_CANCELLED
+                if cancelled
+                else f"Script execution exceeded timeout of {timeout} seconds waiting for a pooled worker",
+            }
+
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="skills-runner-") as scratch:
+            stdout_path = Path(scratch) / "stdout"
+            stderr_path = Path(scratch) / "stderr"
+            job: Dict[str, object] = {
+                "script": script,
+                "cwd": str(cwd),
+                "stdout_path": str(stdout_path),
+                "stderr_path": str(stderr_path),
+                "line_buffered": on_output is not None,
+                "rlimits": limits.rlimits(),
+            }
+            tailer = job_tailer(job, on_output)
+            try:
+                reply = self._exchange(worker, job, deadline - time.monotonic(), tailer, cancel)
+            except BaseException:
+                worker.kill()
+                self._release(None)
+                raise
+
+            if tailer is not None:
+                tailer.poll()
+            if reply is None or reply is _OVERFLOW or reply is _CANCELLED:
+                worker.kill()
+                self._release(None)
+                if reply is None:
+                    error = f"Script execution exceeded timeout of {timeout} seconds"
+                elif reply is _OVERFLOW:
+                    error = overflow_error(output_file_cap())
+                else:
+                    error = SCRIPT_CANCELLED
+                failed: Dict[str, object] = {
+                    **job_output_fields(stdout_path, stderr_path),
+                    "returncode": -1,
+                    "timed_out": reply is None,
+                    "error": error,
+                }
+                return record_usage(failed, reply_usage(None, started), limits)
+
+            worker.jobs += 1
+            if "returncode" not in reply:
+                # The worker exited mid-job (os._exit, crash); report its exit status.
+                reply["returncode"] = worker.process.wait()
+            self._release(worker)
+            result: Dict[str, object] = {
+                **job_output_fields(stdout_path, stderr_path),
+                "returncode": int(reply["returncode"]),  # type: ignore[call-overload]
+                "timed_out": False,
+            }
+            return record_usage(result, reply_usage(reply, started), limits)
+
+    def _exchange(
+        self,
+        worker: _Worker,
+        job: Dict[str, object],
+        timeout: float,
+        tailer: Optional[FileTailer] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Optional[Dict[str, object]]:
+        """Send a job and wait for its reply.
+
+        ``None`` means the timeout elapsed, ``_OVERFLOW`` that the job's
+        output files passed ``output_file_cap()``, and
+        ``_CANCELLED`` that ``cancel`` was cancelled meanwhile.
+        """
+        assert worker.process.stdin is not None and worker.process.stdout is not None
+        try:
+            worker.process.stdin.write(json.dumps(job) + "\n")
+            worker.process.stdin.flush()
+        except OSError:
+            return {}
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(worker.process.stdout, selectors.EVENT_READ)
+            for wait in wait_slices(timeout):
+                if selector.select(wait):
+                    break
+                if tailer is not None:
+                    tailer.poll()
+                if job_overflowed(job):
+                    return _OVERFLOW
+                if cancel is not None and cancel.cancelled:
+                    return _CANCELLED
+            else:
+                return None
+
+        line = worker.process.stdout.readline()
+        if not line:
+            return {}
+        reply: Dict[str, object] = json.loads(line)
+        return reply
+
+    def evict_idle(self) -> int:
+        """Stop workers idle for longer than the configured idle timeout."""
+        cutoff = time.monotonic() - self.settings.idle_seconds
+        with self._condition:
+            stale = [worker for worker in self._idle if worker.last_used < cutoff]
+            self._idle = [worker for worker in self._idle if worker.last_used >= cutoff]
+        for worker in stale:
+            worker.kill()
+        return len(stale)
+
+    def close(self) -> None:
+        """Stop all idle workers; busy workers are stopped when released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+
+_settings = PoolSettings(size=0)
+_pools: Dict[Path, WorkerPool] = {}
+_pools_lock = threading.Lock()
+_reaper: Optional[threading.Thread] = None
+
+
+def configure_pools(size: int, idle_seconds: int, max_jobs: int) -> None:
+    """Set pool limits; a size of 0 disables pooling and cold-starts every script."""
+    _settings.size = size
+    _settings.idle_seconds = idle_seconds
+    _settings.max_jobs = max_jobs
+    if size == 0:
+        shutdown_pools()
+
+
+def get_pool(python_executable: Path) -> Optional[WorkerPool]:
+    """Return the pool for a venv interpreter, or ``None`` when pooling is off."""
+    if _settings.size <= 0 or os.name != "posix":
+        return None
+
+    global _reaper
+    with _pools_lock:
+        pool = _pools.get(python_executable)
+        if pool is None:
+            pool = WorkerPool(python_executable, _settings)
+            _pools[python_executable] = pool
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle_workers, name="worker-pool-reaper", daemon=True)
+            _reaper.start()
+    return pool
+
+
+def _reap_idle_workers() -> None:
+    while True:
+        time.sleep(max(_settings.idle_seconds / 2, 1))
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            evicted = pool.evict_idle()
+            if evicted:
+                _logger.info("Evicted %d idle worker(s) for %s", evicted, pool.python_executable)
+
+
+def shutdown_pools() -> None:
+    """Stop every pooled worker process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(shutdown_pools)
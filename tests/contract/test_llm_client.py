@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from skills_runner.llm_client import LLMClient
@@ -10,7 +12,7 @@ def test_llm_client_sends_request_and_parses_response(monkeypatch):
         model_name="gpt-4"
     )
 
-    def fake_post(url, headers, json, timeout):
+    def fake_post(url, headers, data, timeout):
         class Response:
             def raise_for_status(self):
                 return None
@@ -23,10 +25,10 @@ def test_llm_client_sends_request_and_parses_response(monkeypatch):
                 }
 
         assert url.endswith("/chat/completions")
-        assert json["model"] == "gpt-4"
+        assert json.loads(data)["model"] == "gpt-4"
         return Response()
 
-    monkeypatch.setattr("skills_runner.llm_client.requests.post", fake_post)
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     message = client.chat([{"role": "user", "content": "hi"}], tools=[])
 
@@ -0,0 +1,100 @@
+import pytest
+
+from skills_runner.artifacts import ArtifactStore
+
+
+def test_small_results_are_left_alone(tmp_path):
+    store = ArtifactStore(tmp_path, spill_bytes=100)
+    result = {"stdout": "ok", "files": [{"content": "x" * 50}]}
+
+    assert store.has_oversized(result) is False
+    assert store.spill(result) == result
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_fields_are_replaced_by_preview(tmp_path):
+    store = ArtifactStore(tmp_path, spill_bytes=100)
+    text = "".join(f"line {index}\n" for index in range(1000))
+
+    spilled = store.spill({"stdout": text, "files": [{"path": "a", "content": text}], "returncode": 0})
+
+    artifact = spilled["stdout_artifact"]
+    assert spilled["returncode"] == 0
+    assert spilled["stdout"].startswith("line 0\n")
+    assert spilled["stdout"].endswith("line 999\n")
+    assert artifact["artifact_id"] in spilled["stdout"]
+    assert artifact["total_bytes"] == len(text)
+    assert artifact["total_lines"] == 1000
+    assert len(spilled["stdout"]) < 200
+    assert "content_artifact" in spilled["files"][0]
+    assert (tmp_path / artifact["artifact_id"]).read_text() == text
+
+
+def test_ranged_reads_by_line_and_byte(tmp_path):
+    store = ArtifactStore(tmp_path, spill_bytes=100)
+    text = "".join(f"line {index}\n" for index in range(1000))
+    artifact_id = store.spill({"stdout": text})["stdout_artifact"]["artifact_id"]
+
+    lines = store.read(artifact_id, offset=10, limit=3)
+    assert lines["content"] == "line 10\nline 11\nline 12\n"
+    assert lines["next_offset"] == 13
+    assert lines["total_lines"] == 1000
+
+    capped = store.read(artifact_id, offset=0, limit=500)
+    assert len(capped["content"]) <= 100
+    assert capped["content"].endswith("\n")
+    assert capped["next_offset"] == capped["content"].count("\n")
+
+    chunk = store.read(artifact_id, offset=5, limit=10, unit="bytes")
+    assert chunk["content"] == text[5:15]
+    assert chunk["next_offset"] == 15
+    assert store.read(artifact_id, offset=len(text) - 4, unit="bytes")["next_offset"] is None
+
+
+def test_bad_reads_return_errors(tmp_path):
+    store = ArtifactStore(tmp_path, spill_bytes=100)
+
+    assert "error" in store.read("art_missing")
+    assert "error" in store.read("../secret")
+    assert "error" in store.read("art_x", unit="pages")
+    assert "error" in store.read("art_x", offset=-1)
+
+
+def test_multibyte_text_is_not_split(tmp_path):
+    store = ArtifactStore(tmp_path, spill_bytes=64)
+    spilled = store.spill({"stdout": "é" * 200})
+
+    assert "�" not in spilled["stdout"]
+    artifact_id = spilled["stdout_artifact"]["artifact_id"]
+    assert "�" not in store.read(artifact_id, offset=1, limit=9, unit="bytes")["content"]
+
+
+def test_temporary_store_is_removed(tmp_path):
+    store = ArtifactStore(spill_bytes=10)
+    store.spill({"stdout": "x" * 100})
+    root = store.root
+
+    store.delete()
+
+    assert not root.exists()
+
+
+def test_reads_do_not_load_the_whole_artifact(tmp_path, monkeypatch):
+    store = ArtifactStore(tmp_path, spill_bytes=100)
+    text = "".join(f"line {index}\n" for index in range(1000))
+    artifact_id = store.spill({"stdout": text})["stdout_artifact"]["artifact_id"]
+    monkeypatch.setattr("skills_runner.artifacts._INDEX_CHUNK", 256)
+    monkeypatch.setattr("pathlib.Path.read_bytes", lambda self: pytest.fail("read the whole artifact"))
+
+    assert store.read(artifact_id, offset=998)["content"] == "line 998\nline 999\n"
+    assert store.read(artifact_id, offset=len(text) - 9, unit="bytes")["content"] == "line 999\n"
+
+
+def test_per_turn_store_says_its_artifacts_expire():
+    store = ArtifactStore(spill_bytes=10, expires_with_turn=True)
+
+    artifact = store.spill({"stdout": "x" * 100})["stdout_artifact"]
+
+    assert "end of this turn" in artifact["expires"]
+    assert "end of their turn" in store.read("art_gone")["error"]
+    store.delete()
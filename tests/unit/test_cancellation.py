@@ -0,0 +1,179 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from skills_runner.cancellation import SCRIPT_CANCELLED, CancelToken
+from skills_runner.conversation import Conversation
+from skills_runner.exceptions import OperationCancelledError
+from skills_runner.executor import arun_script, run_script
+from skills_runner.llm_client import LLMClient
+from skills_runner.worker_pool import PoolSettings, WorkerPool
+
+
+def _cancel_later(token, delay=0.3):
+    timer = threading.Timer(delay, token.cancel, args=("client disconnected",))
+    timer.start()
+    return timer
+
+
+def test_callbacks_run_once_and_late_ones_run_immediately():
+    token = CancelToken()
+    calls = []
+    remove = token.on_cancel(lambda: calls.append("removed"))
+    token.on_cancel(lambda: calls.append("kept"))
+    remove()
+
+    token.cancel("client disconnected")
+    token.cancel("again")
+    token.on_cancel(lambda: calls.append("late"))
+
+    assert calls == ["kept", "late"]
+    assert token.reason == "client disconnected"
+    with pytest.raises(OperationCancelledError):
+        token.raise_if_cancelled()
+
+
+def test_call_abandons_blocking_work_on_cancel():
+    token = CancelToken()
+    _cancel_later(token)
+    started = time.monotonic()
+
+    with pytest.raises(OperationCancelledError):
+        token.call(lambda: time.sleep(10))
+
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_race_interrupts_the_awaited_work():
+    token = CancelToken()
+    asyncio.get_running_loop().call_later(0.1, token.cancel)
+
+    with pytest.raises(OperationCancelledError):
+        await token.race(asyncio.sleep(10))
+    # The task itself is not left cancelled.
+    await asyncio.sleep(0)
+
+
+def test_run_script_kills_cold_script_on_cancel(tmp_path):
+    token = CancelToken()
+    _cancel_later(token)
+    started = time.monotonic()
+
+    result = run_script(Path(sys.executable), "import time\ntime.sleep(30)", tmp_path, timeout=60, cancel=token)
+
+    assert time.monotonic() - started < 5
+    assert result["error"] == SCRIPT_CANCELLED
+    assert result["timed_out"] is False
+
+
+@pytest.mark.asyncio
+async def test_arun_script_kills_cold_script_on_cancel(tmp_path):
+    token = CancelToken()
+    asyncio.get_running_loop().call_later(0.3, token.cancel)
+    started = time.monotonic()
+
+    result = await arun_script(Path(sys.executable), "import time\ntime.sleep(30)", tmp_path, timeout=60, cancel=token)
+
+    assert time.monotonic() - started < 5
+    assert result["error"] == SCRIPT_CANCELLED
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="worker pools are POSIX-only")
+def test_pool_kills_worker_on_cancel(tmp_path):
+    pool = WorkerPool(Path(sys.executable), PoolSettings(size=1, idle_seconds=60, max_jobs=10))
+    token = CancelToken()
+    _cancel_later(token)
+    try:
+        result = pool.run("import time\ntime.sleep(30)", tmp_path, timeout=60, cancel=token)
+
+        assert result["error"] == SCRIPT_CANCELLED
+        assert pool.run("print('ok')", tmp_path, timeout=10)["stdout"] == "ok\n"
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_conversation_turn_stops_when_cancelled(monkeypatch):
+    client = LLMClient(api_key="test-key", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+
+    async def fake_achat(messages, tools, cancel=None):
+        cancel.cancel("client disconnected")
+        return await cancel.race(asyncio.sleep(10))
+
+    monkeypatch.setattr(client, "achat", fake_achat)
+    convo = Conversation(client=client, tools=[], skills_folder=Path("."))
+    convo.load_messages([{"role": "user", "content": "hi"}])
+
+    with pytest.raises(OperationCancelledError):
+        await convo.arun(cancel=CancelToken())
+
+
+@pytest.mark.asyncio
+async def test_api_cancels_turn_when_client_disconnects():
+    from skills_runner.api import _complete
+
+    class DisconnectingRequest:
+        async def receive(self):
+            await asyncio.sleep(0.1)
+            return {"type": "http.disconnect"}
+
+    class SlowConversation:
+        async def arun(self, cancel=None):
+            return await cancel.race(asyncio.sleep(10, result="late"))
+
+    assert await _complete(SlowConversation(), DisconnectingRequest()) is None
+
+
+class _IdleRequest:
+    async def receive(self):
+        await asyncio.sleep(10)
+
+
+class _OneReplyConversation:
+    async def astream(self, cancel=None):
+        yield {"type": "content", "delta": "hi"}
+
+
+@pytest.mark.asyncio
+async def test_stream_releases_session_when_client_is_gone_before_first_chunk():
+    from starlette.requests import ClientDisconnect
+
+    from skills_runner.api import _stream_response
+
+    finalized = []
+
+    async def finalize():
+        finalized.append(True)
+
+    async def failing_send(message):
+        raise OSError("client went away")
+
+    response = _stream_response(_OneReplyConversation(), "gpt-4", "req", _IdleRequest(), finalize)
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(ClientDisconnect):
+        await response(scope, _IdleRequest().receive, failing_send)
+
+    assert finalized == [True]
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_at_first_chunk_releases_session_once():
+    from skills_runner.api import _stream_response
+
+    finalized = []
+
+    async def finalize():
+        finalized.append(True)
+
+    response = _stream_response(_OneReplyConversation(), "gpt-4", "req", _IdleRequest(), finalize)
+    stream = response.body_iterator
+    assert "assistant" in await stream.__anext__()
+    await stream.aclose()
+    await response._on_close()
+
+    assert finalized == [True]
@@ -0,0 +1,138 @@
+import os
+import time
+
+from skills_runner import catalog as catalog_module
+from skills_runner.catalog import SkillCatalog, find_skill_doc
+from skills_runner.skills_tool import (
+    confirm_create_skill,
+    create_skill,
+    get_skill,
+    list_skills,
+    write_file_in_skill,
+)
+
+
+def _age(path, seconds=10):
+    """Backdate a path so the catalog trusts its mtime."""
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def _make_skill(root, name, doc="# Docs", doc_name="SKILL.md"):
+    skill_dir = root / name
+    skill_dir.mkdir()
+    (skill_dir / doc_name).write_text(doc, encoding="utf-8")
+    return skill_dir
+
+
+def test_find_skill_doc_matches_case_insensitively(tmp_path):
+    (tmp_path / "SKILL.MD").write_text("# Upper")
+
+    assert find_skill_doc(tmp_path) == tmp_path / "SKILL.MD"
+    assert find_skill_doc(tmp_path / "missing") is None
+
+
+def test_get_skill_reads_either_spelling(tmp_path):
+    _make_skill(tmp_path, "upper", doc="# Upper", doc_name="SKILL.MD")
+    _make_skill(tmp_path, "lower", doc="# Lower", doc_name="SKILL.md")
+
+    assert get_skill("upper", tmp_path)["documentation"] == "# Upper"
+    assert get_skill("lower", tmp_path)["documentation"] == "# Lower"
+
+
+def test_catalog_caches_entry_details(tmp_path):
+    skill_dir = _make_skill(tmp_path, "calc")
+    (skill_dir / "helper.py").write_text("x = 1")
+    (skill_dir / "venv" / "bin").mkdir(parents=True)
+    (skill_dir / "venv" / "bin" / "python").write_text("")
+    (skill_dir / "__pycache__").mkdir()
+
+    entry = SkillCatalog(tmp_path).get("calc")
+
+    assert entry is not None
+    assert entry.documentation == "# Docs"
+    assert entry.doc_hash is not None
+    assert entry.has_venv
+    assert entry.files == ["SKILL.md", "helper.py"]
+
+
+def test_unchanged_skill_is_not_reread(tmp_path, monkeypatch):
+    skill_dir = _make_skill(tmp_path, "calc")
+    _age(skill_dir / "SKILL.md")
+    _age(skill_dir)
+    _age(tmp_path)
+    catalog = SkillCatalog(tmp_path)
+
+    calls = []
+    monkeypatch.setattr(catalog_module, "_build_manifest", lambda path: calls.append(path) or [])
+    catalog.get("calc")
+    catalog.names()
+
+    assert calls == []
+
+
+def test_catalog_picks_up_changes(tmp_path):
+    catalog = SkillCatalog(tmp_path)
+    assert catalog.names() == []
+
+    skill_dir = _make_skill(tmp_path, "calc", doc="# One")
+    assert catalog.names() == ["calc"]
+
+    (skill_dir / "SKILL.md").write_text("# Two, longer")
+    assert catalog.get("calc").documentation == "# Two, longer"
+
+    (skill_dir / "SKILL.md").unlink()
+    skill_dir.rmdir()
+    assert catalog.get("calc") is None
+    assert catalog.names() == []
+
+
+def test_snapshot_round_trip_skips_rereading(tmp_path, monkeypatch):
+    skills = tmp_path / "skills"
+    skills.mkdir()
+    skill_dir = _make_skill(skills, "calc")
+    _age(skill_dir / "SKILL.md")
+    _age(skill_dir)
+    _age(skills)
+    snapshot = tmp_path / "catalog.json"
+    SkillCatalog(skills).save_snapshot(snapshot)
+
+    reads = []
+    monkeypatch.setattr(catalog_module.SkillEntry, "load_documentation", lambda self: reads.append(self.name))
+    warm = SkillCatalog(skills, snapshot_path=snapshot)
+
+    assert warm.get("calc").documentation == "# Docs"
+    assert reads == []
+
+
+def test_watcher_refreshes_in_background(tmp_path):
+    catalog = SkillCatalog(tmp_path)
+    catalog.start_watching(0.05)
+    try:
+        _make_skill(tmp_path, "calc")
+        deadline = time.monotonic() + 5
+        while "calc" not in catalog._entries and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert catalog.names() == ["calc"]
+    finally:
+        catalog.stop_watching()
+
+
+def test_write_file_in_skill_updates_catalog(tmp_path):
+    _make_skill(tmp_path, "calc")
+    assert list_skills(tmp_path) == {"skills": ["calc"]}
+
+    write_file_in_skill("calc", "SKILL.md", "# Rewritten", tmp_path)
+
+    assert get_skill("calc", tmp_path)["documentation"] == "# Rewritten"
+
+
+def test_confirmed_skill_is_visible(tmp_path, monkeypatch):
+    monkeypatch.setattr("skills_runner.skills_tool.provision_venv", lambda *args: args[2])
+    assert list_skills(tmp_path) == {"skills": []}
+
+    token = create_skill("fresh", "# Fresh", None, tmp_path)["confirmation_token"]
+    confirm_create_skill(token)
+
+    assert list_skills(tmp_path) == {"skills": ["fresh"]}
+    assert get_skill("fresh", tmp_path)["documentation"] == "# Fresh"
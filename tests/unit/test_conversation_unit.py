@@ -1,7 +1,15 @@
+import asyncio
+import json
+import threading
+import time
 from pathlib import Path
 
+import pytest
+
 from skills_runner.conversation import Conversation
 from skills_runner.llm_client import LLMClient
+from skills_runner.models import Message
+from skills_runner.tool_concurrency import configure_tool_concurrency
 
 
 def test_conversation_returns_assistant_message(monkeypatch):
@@ -45,3 +53,412 @@ def test_conversation_handles_tool_calls(monkeypatch, tmp_path):
     convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
 
     assert convo.send("hi") == "done"
+
+
+def test_conversation_stream_forwards_deltas_and_tool_events(monkeypatch, tmp_path):
+    client = LLMClient(
+        api_key="test-key",
+        api_base_url="https://api.example.com/v1",
+        model_name="gpt-4"
+    )
+
+    rounds = iter([
+        [
+            {"type": "message", "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"id": "call_1", "function": {"name": "list_skills", "arguments": "{}"}}],
+            }},
+        ],
+        [
+            {"type": "content", "delta": "do"},
+            {"type": "content", "delta": "ne"},
+            {"type": "message", "message": {"role": "assistant", "content": "done"}},
+        ],
+    ])
+
+    def fake_stream_chat(messages, tools):
+        return iter(next(rounds))
+
+    monkeypatch.setattr(client, "stream_chat", fake_stream_chat)
+
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.messages.append(Message(role="user", content="hi"))
+    events = list(convo.stream())
+
+    assert [(event["type"], event.get("phase")) for event in events] == [
+        ("tool", "start"),
+        ("tool", "end"),
+        ("content", None),
+        ("content", None),
+        ("final", None),
+    ]
+    assert events[-1]["content"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_conversation_arun_executes_tools(monkeypatch, tmp_path):
+    client = LLMClient(
+        api_key="test-key",
+        api_base_url="https://api.example.com/v1",
+        model_name="gpt-4"
+    )
+
+    replies = iter([
+        {
+            "role": "assistant",
+            "tool_calls": [{"id": "call_1", "function": {"name": "list_skills", "arguments": "{}"}}],
+        },
+        {"role": "assistant", "content": "done"},
+    ])
+
+    async def fake_achat(messages, tools):
+        return next(replies)
+
+    monkeypatch.setattr(client, "achat", fake_achat)
+    (tmp_path / "calc").mkdir()
+
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.messages.append(Message(role="user", content="hi"))
+
+    assert await convo.arun() == "done"
+    assert convo.messages[-2].role == "tool"
+    assert "calc" in convo.messages[-2].content
+
+
+def _parallel_round_client(monkeypatch):
+    client = LLMClient(
+        api_key="test-key",
+        api_base_url="https://api.example.com/v1",
+        model_name="gpt-4"
+    )
+    tool_calls = [
+        {"id": f"call_{index}", "function": {"name": "get_skill", "arguments": json.dumps({"skill_name": str(index)})}}
+        for index in range(4)
+    ]
+    replies = iter([
+        {"role": "assistant", "tool_calls": tool_calls},
+        {"role": "assistant", "content": "done"},
+    ])
+
+    async def fake_achat(messages, tools):
+        return next(replies)
+
+    monkeypatch.setattr(client, "chat", lambda messages, tools: next(replies))
+    monkeypatch.setattr(client, "achat", fake_achat)
+    return client
+
+
+def _slow_get_skill(skill_name, skills_folder):
+    # Later calls finish first, so ordering must come from tool_calls, not completion.
+    time.sleep(0.3 - int(skill_name) * 0.05)
+    return {"skill_name": skill_name}
+
+
+def test_conversation_runs_tool_calls_concurrently_in_order(monkeypatch, tmp_path):
+    client = _parallel_round_client(monkeypatch)
+    monkeypatch.setattr("skills_runner.conversation.get_skill", _slow_get_skill)
+    events = []
+
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.messages.append(Message(role="user", content="hi"))
+    started = time.perf_counter()
+    assert convo.run(tool_event_handler=lambda phase, call, result: events.append(phase)) == "done"
+
+    assert time.perf_counter() - started < 0.8
+    assert events.count("start") == 4 and events.count("end") == 4
+    tool_messages = [message for message in convo.messages if message.role == "tool"]
+    assert [message.tool_call_id for message in tool_messages] == ["call_0", "call_1", "call_2", "call_3"]
+
+
+@pytest.mark.asyncio
+async def test_conversation_arun_runs_tool_calls_concurrently_in_order(monkeypatch, tmp_path):
+    client = _parallel_round_client(monkeypatch)
+    monkeypatch.setattr("skills_runner.conversation.get_skill", _slow_get_skill)
+
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.messages.append(Message(role="user", content="hi"))
+    started = time.perf_counter()
+    assert await convo.arun() == "done"
+
+    assert time.perf_counter() - started < 0.8
+    tool_messages = [message for message in convo.messages if message.role == "tool"]
+    assert [message.tool_call_id for message in tool_messages] == ["call_0", "call_1", "call_2", "call_3"]
+
+
+@pytest.mark.asyncio
+async def test_per_tool_limits_apply_across_conversations(monkeypatch, tmp_path):
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def counted_get_skill(skill_name, skills_folder):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {"skill_name": skill_name}
+
+    monkeypatch.setattr("skills_runner.conversation.get_skill", counted_get_skill)
+    configure_tool_concurrency(8, {"get_skill": 2})
+    try:
+        convos = []
+        for _ in range(2):
+            convo = Conversation(client=_parallel_round_client(monkeypatch), tools=[], skills_folder=tmp_path)
+            convo.messages.append(Message(role="user", content="hi"))
+            convos.append(convo)
+        assert await asyncio.gather(*(convo.arun() for convo in convos)) == ["done", "done"]
+    finally:
+        configure_tool_concurrency(8, {})
+
+    assert peak[0] == 2
+
+
+def test_conversation_routes_new_user_message_once(monkeypatch, tmp_path):
+    (tmp_path / "weather").mkdir()
+    (tmp_path / "weather" / "SKILL.md").write_text("# Weather\nFetch the forecast for a city.")
+    client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    seen = []
+
+    def fake_chat(messages, tools):
+        seen.append(messages)
+        return {"role": "assistant", "content": "sunny"}
+
+    monkeypatch.setattr(client, "chat", fake_chat)
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path, routing_top_k=3)
+
+    convo.send("forecast for Paris?")
+    convo.run()
+
+    note = seen[0][-2]
+    assert note["role"] == "system"
+    assert "- weather: Fetch the forecast for a city." in note["content"]
+    assert seen[0][-1] == {"role": "user", "content": "forecast for Paris?"}
+    assert sum(message["role"] == "system" for message in seen[1]) == 2
+
+
+def test_conversation_skips_routing_when_disabled_or_unmatched(monkeypatch, tmp_path):
+    client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    monkeypatch.setattr(client, "chat", lambda messages, tools: {"role": "assistant", "content": "ok"})
+
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path, routing_top_k=3)
+    convo.send("nothing matches")
+
+    assert [message.role for message in convo.messages] == ["system", "user", "assistant"]
+
+
+def _budget_conversation(budget):
+    client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="test-model")
+    convo = Conversation(client=client, tools=[], skills_folder=Path("."), context_budget=budget)
+    convo.count_tokens = len
+    convo.messages = [Message(role="system", content="S" * 10)]
+    return convo
+
+
+def test_trim_context_drops_oldest_messages_to_fit_budget():
+    convo = _budget_conversation(200)
+    for index in range(10):
+        convo.messages.append(Message(role="user", content=f"{index}" * 30))
+        convo._trim_context()
+
+    payload = convo._serialize_messages()
+
+    assert payload[0]["content"] == "S" * 10
+    assert payload[1]["content"].startswith("[Context note:")
+    assert payload[-1]["content"] == "9" * 30
+    assert sum(len(message.get("content", "")) + 4 for message in payload) <= 200 + 100
+
+
+def test_trim_context_only_counts_new_messages(monkeypatch):
+    convo = _budget_conversation(10_000)
+    counted = []
+    convo.count_tokens = lambda text: counted.append(text) or len(text)
+    for index in range(20):
+        convo.messages.append(Message(role="user", content=f"m{index}"))
+        convo._trim_context()
+
+    assert len(counted) == 21
+
+
+def test_trim_context_never_starts_with_orphaned_tool_result():
+    convo = _budget_conversation(120)
+    convo.messages.append(Message(role="assistant", tool_calls=[{"id": "1"}], content="a" * 40))
+    convo.messages.append(Message(role="tool", tool_call_id="1", content="t" * 40))
+    convo.messages.append(Message(role="user", content="u" * 40))
+    convo._trim_context()
+
+    roles = [message["role"] for message in convo._serialize_messages()]
+
+    assert roles == ["system", "system", "user"]
+
+
+def test_trim_context_truncates_oversized_tool_results():
+    convo = _budget_conversation(400)
+    convo.messages.append(Message(role="tool", tool_call_id="1", content="x" * 1000))
+    convo.messages.append(Message(role="user", content="next"))
+    convo._trim_context()
+
+    tool = next(message for message in convo.messages if message.role == "tool")
+    assert tool.content.endswith("[truncated — result was too large]")
+    assert len(tool.content) <= 100
+
+
+def test_conversation_reuses_message_encodings_across_rounds(monkeypatch, tmp_path):
+    client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    bodies = []
+    replies = iter([
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{"id": "c1", "type": "function", "function": {"name": "list_skills", "arguments": "{}"}}],
+        },
+        {"role": "assistant", "content": "done"},
+    ])
+
+    def fake_chat(messages, tools):
+        bodies.append(messages.fragments)
+        return next(replies)
+
+    monkeypatch.setattr(client, "chat", fake_chat)
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.send("hi")
+
+    assert all(first is second for first, second in zip(bodies[0], bodies[1]))
+    assert len(bodies[1]) == len(bodies[0]) + 2
+
+
+def test_block_compaction_keeps_prefix_stable_between_compactions():
+    convo = _budget_conversation(400)
+    payloads = []
+    for index in range(30):
+        convo.messages.append(Message(role="user", content=f"{index:02d}" * 15))
+        convo._trim_context()
+        payloads.append(convo._serialize_messages())
+
+    compactions = sum(
+        1 for before, after in zip(payloads, payloads[1:]) if after.fragments[: len(before.fragments)] != before.fragments
+    )
+    notes = {payload.fragments[1] for payload in payloads if b"[Context note" in payload.fragments[1]}
+
+    assert 0 < compactions <= 5
+    assert len(notes) == 1
+    assert convo.prefix_stats.requests == 30
+    assert convo.prefix_stats.reuse_ratio > 0.5
+
+
+def test_sliding_compaction_drops_one_message_per_round():
+    convo = _budget_conversation(400)
+    convo.compaction_target = 100
+    for index in range(30):
+        convo.messages.append(Message(role="user", content=f"{index:02d}" * 15))
+        convo._trim_context()
+    before = convo._window_start
+
+    convo.messages.append(Message(role="user", content="xx" * 15))
+    convo._trim_context()
+
+    assert convo._window_start == before + 1
+
+
+def _tool_call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def test_repeated_read_only_tool_calls_reference_the_first_result(monkeypatch, tmp_path):
+    skill = tmp_path / "demo"
+    skill.mkdir()
+    (skill / "SKILL.md").write_text("# Demo\n", encoding="utf-8")
+    client = LLMClient(api_key="test-key", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    rounds = [
+        [_tool_call("call_1", "get_skill", {"skill_name": "demo"})],
+        [_tool_call("call_2", "get_skill", {"skill_name": "demo"})],
+        [_tool_call("call_3", "write_file_in_skill", {"skill_name": "demo", "file_path": "a.txt", "content": "x"})],
+        [_tool_call("call_4", "get_skill", {"skill_name": "demo"})],
+    ]
+
+    def fake_chat(messages, tools):
+        if rounds:
+            return {"role": "assistant", "tool_calls": rounds.pop(0)}
+        return {"role": "assistant", "content": "done"}
+
+    monkeypatch.setattr(client, "chat", fake_chat)
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.send("hi")
+
+    results = {m.tool_call_id: json.loads(m.content) for m in convo.messages if m.role == "tool"}
+    assert "Demo" in results["call_1"]["documentation"]
+    assert results["call_2"]["unchanged"] is True
+    assert results["call_2"]["same_as_call"] == "call_1"
+    assert "documentation" in results["call_4"]
+
+    rounds.append([_tool_call("call_5", "get_skill", {"skill_name": "demo"})])
+    convo.send("again")
+    results = {m.tool_call_id: json.loads(m.content) for m in convo.messages if m.role == "tool"}
+    assert "documentation" in results["call_5"]
+
+
+def test_large_tool_output_is_spilled_to_an_artifact(monkeypatch, tmp_path):
+    from skills_runner.artifacts import ArtifactStore
+
+    skills_folder = tmp_path / "skills"
+    skill = skills_folder / "demo"
+    skill.mkdir(parents=True)
+    (skill / "SKILL.md").write_text("# Demo\n" + "detail line\n" * 500, encoding="utf-8")
+    client = LLMClient(api_key="test-key", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    rounds = [[_tool_call("call_1", "get_skill", {"skill_name": "demo"})]]
+
+    def fake_chat(messages, tools):
+        if rounds:
+            return {"role": "assistant", "tool_calls": rounds.pop(0)}
+        if len(messages) == 4:
+            artifact_id = json.loads(messages[-1]["content"])["documentation_artifact"]["artifact_id"]
+            return {
+                "role": "assistant",
+                "tool_calls": [_tool_call("call_2", "read_artifact", {"artifact_id": artifact_id, "offset": 1, "limit": 2})],
+            }
+        return {"role": "assistant", "content": "done"}
+
+    monkeypatch.setattr(client, "chat", fake_chat)
+    convo = Conversation(
+        client=client, tools=[], skills_folder=skills_folder, artifacts=ArtifactStore(tmp_path / "artifacts", 512)
+    )
+    convo.send("hi")
+
+    results = {m.tool_call_id: json.loads(m.content) for m in convo.messages if m.role == "tool"}
+    assert len(results["call_1"]["documentation"]) < 700
+    assert results["call_2"]["content"] == "detail line\ndetail line\n"
+
+
+@pytest.mark.asyncio
+async def test_astream_emits_progress_events_for_script_output(monkeypatch, tmp_path):
+    import sys
+
+    skill = tmp_path / "demo"
+    (skill / "venv" / "bin").mkdir(parents=True)
+    (skill / "venv" / "bin" / "python").symlink_to(sys.executable)
+    (skill / "SKILL.md").write_text("# Demo\n", encoding="utf-8")
+    script = "import time\nprint('working', flush=True)\ntime.sleep(0.3)\nprint('done', flush=True)"
+    client = LLMClient(api_key="test-key", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    rounds = [[_tool_call("call_1", "run_python_script", {"skill_name": "demo", "script": script})]]
+
+    async def fake_astream_chat(messages, tools):
+        if rounds:
+            yield {"type": "message", "message": {"role": "assistant", "tool_calls": rounds.pop(0)}}
+        else:
+            yield {"type": "message", "message": {"role": "assistant", "content": "ok"}}
+
+    monkeypatch.setattr(client, "astream_chat", fake_astream_chat)
+    convo = Conversation(client=client, tools=[], skills_folder=tmp_path)
+    convo.messages.append(Message(role="user", content="run it"))
+
+    phases = []
+    output = []
+    async for event in convo.astream():
+        if event["type"] == "tool":
+            phases.append(event["phase"])
+            if event["phase"] == "progress":
+                output.append(event["result"]["text"])
+
+    assert phases[0] == "start" and phases[-1] == "end"
+    assert phases[1] == "progress"
+    assert "".join(output) == "working\ndone\n"
@@ -1,6 +1,15 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
 from pathlib import Path
 
-from skills_runner.executor import find_python_executable, run_script
+import pytest
+
+from skills_runner.executor import arun_script, find_python_executable, load_preload_modules, run_script
+from skills_runner.output_capture import capture_settings, configure_output_capture
+from skills_runner.resource_limits import configure_resource_limits, resource_limits
 
 
 def test_find_python_executable_prefers_unix(tmp_path):
@@ -22,3 +31,213 @@ def test_run_script_returns_error_for_invalid_executable(tmp_path):
 
     assert result["timed_out"] is False
     assert "error" in result
+
+
+def test_load_preload_modules_reads_manifest(tmp_path):
+    (tmp_path / "preload.txt").write_text("requests, bs4\n# comment\njson\n")
+
+    assert load_preload_modules(tmp_path) == ["requests", "bs4", "json"]
+
+
+def test_load_preload_modules_reads_skill_front_matter(tmp_path):
+    (tmp_path / "SKILL.md").write_text("---\nname: web\npreload:\n  - requests\n  - bs4\n---\n# Web\n")
+
+    assert load_preload_modules(tmp_path) == ["requests", "bs4"]
+
+
+def test_load_preload_modules_without_manifest(tmp_path):
+    (tmp_path / "SKILL.md").write_text("# Plain skill\npreload: not front matter\n")
+
+    assert load_preload_modules(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_arun_script_runs_cold_subprocess(tmp_path):
+    result = await arun_script(Path(sys.executable), "import sys\nprint('hi')\nsys.exit(2)", tmp_path, timeout=10)
+
+    usage = result.pop("usage")
+    assert result.pop("queue_wait_seconds") >= 0
+    assert result == {"stdout": "hi\n", "stderr": "", "returncode": 2, "timed_out": False}
+    assert usage["wall_seconds"] > 0
+    assert usage["max_rss_kb"] > 0
+
+
+@pytest.mark.asyncio
+async def test_arun_script_times_out_with_partial_output(tmp_path):
+    script = "import time\nprint('started', flush=True)\ntime.sleep(5)"
+
+    result = await arun_script(Path(sys.executable), script, tmp_path, timeout=1)
+
+    assert result["timed_out"] is True
+    assert result["stdout"] == "started\n"
+
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process groups are POSIX-only")
+@pytest.mark.asyncio
+async def test_arun_script_timeout_kills_processes_the_script_started(tmp_path):
+    script = "import subprocess, time\nsubprocess.Popen(['sleep', '30'])\ntime.sleep(30)"
+    started = time.monotonic()
+
+    result = await arun_script(Path(sys.executable), script, tmp_path, timeout=1)
+
+    assert result["timed_out"] is True
+    assert time.monotonic() - started < 4
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="process groups are POSIX-only")
+@pytest.mark.asyncio
+async def test_arun_script_stops_reading_pipes_held_by_an_escaped_process(tmp_path, monkeypatch):
+    monkeypatch.setattr("skills_runner.executor._READER_JOIN_SECONDS", 0.5)
+    script = "import subprocess\nsubprocess.Popen(['setsid', 'sleep', '30'])\nprint('done')"
+    started = time.monotonic()
+
+    result = await arun_script(Path(sys.executable), script, tmp_path, timeout=10)
+
+    assert result["returncode"] == 0
+    assert result["stdout"] == "done\n"
+    assert time.monotonic() - started < 4
+
+
+@pytest.fixture
+def small_output_limit():
+    settings = capture_settings()
+    saved = (settings.max_bytes, settings.kill_on_overflow)
+    configure_output_capture(100, False)
+    yield settings
+    configure_output_capture(*saved)
+
+
+def test_run_script_bounds_captured_output(tmp_path, small_output_limit):
+    script = "import sys\nsys.stdout.write('start' + 'x' * 100000 + 'end')"
+
+    result = run_script(Path(sys.executable), script, tmp_path, timeout=10)
+
+    assert result["returncode"] == 0
+    assert result["stdout"].startswith("start")
+    assert result["stdout"].endswith("end")
+    assert len(result["stdout"]) < 200
+    assert result["output_truncated"]["stdout_bytes"] == 100008
+
+
+def test_run_script_kills_on_overflow(tmp_path, small_output_limit):
+    small_output_limit.kill_on_overflow = True
+    script = "while True:\n    print('spam' * 100, flush=True)"
+
+    result = run_script(Path(sys.executable), script, tmp_path, timeout=20)
+
+    assert result["timed_out"] is False
+    assert "exceeded 100 bytes" in result["error"]
+    assert result["output_truncated"]["stdout_omitted"] > 0
+
+
+@pytest.mark.asyncio
+async def test_arun_script_kills_on_overflow(tmp_path, small_output_limit):
+    small_output_limit.kill_on_overflow = True
+    script = "import sys\nwhile True:\n    print('spam' * 100, file=sys.stderr, flush=True)"
+
+    result = await arun_script(Path(sys.executable), script, tmp_path, timeout=20)
+
+    assert "exceeded 100 bytes" in result["error"]
+    assert result["stderr"].startswith("spam")
+
+
+def test_run_script_forwards_output_while_running(tmp_path):
+    chunks = []
+    script = "import sys, time\nprint('one')\ntime.sleep(0.3)\nprint('two', file=sys.stderr)"
+
+    result = run_script(Path(sys.executable), script, tmp_path, timeout=10, on_output=lambda s, t: chunks.append((s, t)))
+
+    assert result["stdout"] == "one\n"
+    assert "".join(text for stream, text in chunks if stream == "stdout") == "one\n"
+    assert "".join(text for stream, text in chunks if stream == "stderr") == "two\n"
+
+
+@pytest.mark.asyncio
+async def test_arun_script_forwards_output_before_exit(tmp_path):
+    seen = []
+    script = "import time\nprint('early')\ntime.sleep(0.5)\nprint('late')"
+
+    async def watch():
+        while not seen:
+            await asyncio.sleep(0.01)
+        return time.perf_counter()
+
+    watcher = asyncio.ensure_future(watch())
+    result = await arun_script(Path(sys.executable), script, tmp_path, timeout=10, on_output=lambda s, t: seen.append(t))
+    finished = time.perf_counter()
+
+    assert result["stdout"] == "early\nlate\n"
+    assert "".join(seen) == "early\nlate\n"
+    assert finished - await watcher > 0.3
+
+
+@pytest.fixture
+def cpu_limit():
+    configure_resource_limits(cpu_seconds=1, memory_mb=0, open_files=0, processes=0)
+    yield resource_limits()
+    configure_resource_limits(cpu_seconds=0, memory_mb=0, open_files=0, processes=0)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rlimits are POSIX-only")
+def test_run_script_reports_cpu_limit(tmp_path, cpu_limit):
+    result = run_script(Path(sys.executable), "while True:\n    pass", tmp_path, timeout=20)
+
+    assert result["timed_out"] is False
+    assert result["error"] == "Script exceeded the CPU time limit of 1 seconds"
+    assert result["usage"]["user_cpu_seconds"] + result["usage"]["system_cpu_seconds"] >= 0.9
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rlimits are POSIX-only")
+@pytest.mark.asyncio
+async def test_arun_script_applies_open_files_limit(tmp_path):
+    configure_resource_limits(cpu_seconds=0, memory_mb=0, open_files=32, processes=0)
+    try:
+        script = "import resource\nprint(resource.getrlimit(resource.RLIMIT_NOFILE)[0])"
+        result = await arun_script(Path(sys.executable), script, tmp_path, timeout=10)
+    finally:
+        configure_resource_limits(cpu_seconds=0, memory_mb=0, open_files=0, processes=0)
+
+    assert result["stdout"] == "32\n"
+
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="rlimits are POSIX-only")
+def test_limited_script_runs_as_plain_python_c_without_preexec_fn(tmp_path, cpu_limit, monkeypatch):
+    spawned = []
+    real_popen = subprocess.Popen
+
+    def recording_popen(*args, **kwargs):
+        spawned.append(kwargs)
+        return real_popen(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", recording_popen)
+    script = "import os, resource, sys\nprint(sys.argv, resource.getrlimit(resource.RLIMIT_CPU))\nraise SystemExit(4)"
+
+    result = run_script(Path(sys.executable), script, tmp_path, timeout=10)
+
+    assert result["returncode"] == 4
+    assert result["stdout"] == "['-c'] (1, 2)\n"
+    assert all(kwargs.get("preexec_fn") is None for kwargs in spawned)
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="needs wait4")
+def test_run_script_reaps_without_waitid(tmp_path, monkeypatch):
+    # As on macOS, which has wait4 but no waitid.
+    monkeypatch.delattr(os, "waitid", raising=False)
+
+    result = run_script(Path(sys.executable), "import sys\nprint('hi')\nsys.exit(3)", tmp_path, timeout=10)
+
+    assert result["returncode"] == 3
+    assert result["stdout"] == "hi\n"
+    assert result["usage"]["max_rss_kb"] > 0
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="needs wait4")
+def test_run_script_raises_instead_of_hanging_when_reaping_fails(tmp_path, monkeypatch):
+    def broken_wait4(pid, options):
+        raise RuntimeError("wait4 broke")
+
+    monkeypatch.setattr(os, "wait4", broken_wait4)
+
+    with pytest.raises(RuntimeError, match="wait4 broke"):
+        run_script(Path(sys.executable), "print('hi')", tmp_path, timeout=10)
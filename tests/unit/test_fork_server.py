@@ -0,0 +1,83 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from skills_runner.fork_server import ForkServer, fork_supported, get_fork_server, shutdown_fork_servers
+
+pytestmark = pytest.mark.skipif(not fork_supported(), reason="fork server requires fork and Unix sockets")
+
+
+@pytest.fixture
+def server():
+    server = ForkServer(Path(sys.executable), ["json", "decimal"])
+    yield server
+    server.close()
+
+
+def test_fork_server_children_see_preloaded_modules(server, tmp_path):
+    result = server.run("import sys\nprint('decimal' in sys.modules)", tmp_path, timeout=10)
+
+    usage = result.pop("usage")
+    assert result == {"stdout": "True\n", "stderr": "", "returncode": 0, "timed_out": False}
+    assert usage["user_cpu_seconds"] is not None
+
+
+def test_fork_server_reports_hard_exit_status(server, tmp_path):
+    result = server.run("import os\nprint('bye', flush=True)\nos._exit(4)", tmp_path, timeout=10)
+
+    assert result["returncode"] == 4
+    assert result["stdout"] == "bye\n"
+
+
+def test_fork_server_kills_child_on_timeout(server, tmp_path):
+    result = server.run("import time\ntime.sleep(5)", tmp_path, timeout=1)
+
+    assert result["timed_out"] is True
+    assert server.run("print('still serving')", tmp_path, timeout=10)["stdout"] == "still serving\n"
+
+
+def test_fork_server_caps_output_files_without_kill_on_overflow(server, tmp_path):
+    from skills_runner.output_capture import OUTPUT_FILE_CAP_FACTOR, capture_settings, configure_output_capture
+
+    settings = capture_settings()
+    saved = (settings.max_bytes, settings.kill_on_overflow)
+    configure_output_capture(1000, False)
+    try:
+        result = server.run("while True:\n    print('spam' * 100, flush=True)", tmp_path, timeout=20)
+    finally:
+        configure_output_capture(*saved)
+
+    assert f"exceeded {1000 * OUTPUT_FILE_CAP_FACTOR} bytes" in result["error"]
+    assert result["timed_out"] is False
+
+
+def test_fork_servers_for_one_venv_are_kept_per_preload_list(tmp_path):
+    try:
+        first = get_fork_server(Path(sys.executable), ["json"])
+        second = get_fork_server(Path(sys.executable), ["decimal"])
+
+        assert first is not None and second is not None and first is not second
+        assert get_fork_server(Path(sys.executable), ["json"]) is first
+        assert first.alive()
+    finally:
+        shutdown_fork_servers()
+
+
+def test_retired_fork_server_finishes_its_running_job(server, tmp_path):
+    results = []
+    job = threading.Thread(
+        target=lambda: results.append(server.run("import time\ntime.sleep(1)\nprint('done')", tmp_path, timeout=10))
+    )
+    job.start()
+    while not server._active:
+        time.sleep(0.01)
+
+    server.retire()
+    assert server.alive()
+    job.join()
+
+    assert results[0]["stdout"] == "done\n"
+    assert not server.alive()
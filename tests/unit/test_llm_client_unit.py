@@ -1,7 +1,11 @@
+import json
+
+import httpx
 import pytest
 import requests
 
 from skills_runner.exceptions import ToolExecutionError
+from skills_runner.http_session import configure_http_pool, get_shared_session
 from skills_runner.llm_client import LLMClient
 
 
@@ -12,7 +16,7 @@ def test_chat_returns_message(monkeypatch):
         model_name="gpt-4"
     )
 
-    def fake_post(url, headers, json, timeout):
+    def fake_post(url, headers, data, timeout):
         class Response:
             def raise_for_status(self):
                 return None
@@ -22,7 +26,7 @@ def test_chat_returns_message(monkeypatch):
 
         return Response()
 
-    monkeypatch.setattr("skills_runner.llm_client.requests.post", fake_post)
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     message = client.chat([{"role": "user", "content": "hi"}], tools=[])
 
@@ -36,10 +40,137 @@ def test_chat_raises_on_request_error(monkeypatch):
         model_name="gpt-4"
     )
 
-    def fake_post(url, headers, json, timeout):
+    def fake_post(url, headers, data, timeout):
         raise requests.RequestException("boom")
 
-    monkeypatch.setattr("skills_runner.llm_client.requests.post", fake_post)
+    monkeypatch.setattr(client.session, "post", fake_post)
 
     with pytest.raises(ToolExecutionError):
         client.chat([{"role": "user", "content": "hi"}], tools=[])
+
+
+def test_stream_chat_yields_deltas_and_assembles_tool_calls(monkeypatch):
+    client = LLMClient(
+        api_key="test-key",
+        api_base_url="https://api.example.com/v1",
+        model_name="gpt-4"
+    )
+
+    lines = [
+        b'data: {"choices": [{"delta": {"role": "assistant", "content": "Hel"}}]}',
+        b"",
+        b'data: {"choices": [{"delta": {"content": "lo"}}]}',
+        b'data: {"choices": [{"delta": {"tool_calls": [{"index": 0, "id": "call_1", "function": {"name": "get_skill", "arguments": "{\\"skill_"}}]}}]}',
+        b'data: {"choices": [{"delta": {"tool_calls": [{"index": 0, "function": {"arguments": "name\\": \\"calc\\"}"}}]}}]}',
+        b"data: [DONE]",
+    ]
+
+    def fake_post(url, headers, data, timeout, stream):
+        class Response:
+            def raise_for_status(self):
+                return None
+
+            def iter_lines(self, chunk_size):
+                return iter(lines)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        assert stream is True
+        assert json.loads(data)["stream"] is True
+        return Response()
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+
+    events = list(client.stream_chat([{"role": "user", "content": "hi"}], tools=[]))
+
+    assert [event["delta"] for event in events if event["type"] == "content"] == ["Hel", "lo"]
+    message = events[-1]["message"]
+    assert message["content"] == "Hello"
+    assert message["tool_calls"][0]["id"] == "call_1"
+    assert message["tool_calls"][0]["function"] == {"name": "get_skill", "arguments": '{"skill_name": "calc"}'}
+
+
+def test_stream_chat_closes_response_on_error_status(monkeypatch):
+    client = LLMClient(
+        api_key="test-key",
+        api_base_url="https://api.example.com/v1",
+        model_name="gpt-4"
+    )
+    closed = []
+
+    def fake_post(url, headers, data, timeout, stream):
+        class Response:
+            def raise_for_status(self):
+                raise requests.HTTPError("429 Too Many Requests")
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                closed.append(True)
+                return False
+
+        return Response()
+
+    monkeypatch.setattr(client.session, "post", fake_post)
+
+    with pytest.raises(ToolExecutionError):
+        list(client.stream_chat([{"role": "user", "content": "hi"}], tools=[]))
+    assert closed == [True]
+
+
+def test_clients_share_process_wide_session():
+    first = LLMClient(api_key="a", api_base_url="https://api.example.com/v1", model_name="gpt-4")
+    second = LLMClient(api_key="b", api_base_url="https://api.example.com/v1", model_name="gpt-4o")
+
+    assert first.session is second.session
+    assert isinstance(first.session, requests.Session)
+
+
+def test_configure_http_pool_sets_per_host_limit():
+    configure_http_pool(pool_connections=4, pool_maxsize=7)
+    try:
+        adapter = get_shared_session().get_adapter("https://api.example.com")
+
+        assert adapter._pool_connections == 4
+        assert adapter._pool_maxsize == 7
+        assert adapter._pool_block is False
+    finally:
+        configure_http_pool(pool_connections=10, pool_maxsize=20)
+
+
+@pytest.mark.asyncio
+async def test_achat_returns_message():
+    def handler(request):
+        assert request.url.path == "/v1/chat/completions"
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as async_client:
+        client = LLMClient(
+            api_key="test-key",
+            api_base_url="https://api.example.com/v1",
+            model_name="gpt-4",
+            async_client=async_client,
+        )
+
+        message = await client.achat([{"role": "user", "content": "hi"}], tools=[])
+
+    assert message["content"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_achat_raises_on_http_error():
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500))) as async_client:
+        client = LLMClient(
+            api_key="test-key",
+            api_base_url="https://api.example.com/v1",
+            model_name="gpt-4",
+            async_client=async_client,
+        )
+
+        with pytest.raises(ToolExecutionError):
+            await client.achat([{"role": "user", "content": "hi"}], tools=[])
@@ -37,3 +37,4 @@ def test_script_execution_fields(tmp_path):
 
     assert execution.skill_name == "calc"
     assert execution.returncode == 0
+    assert execution.usage is None
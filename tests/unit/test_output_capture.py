@@ -0,0 +1,42 @@
+from skills_runner.output_capture import BoundedBuffer, output_fields, read_bounded_file
+
+
+def test_small_output_is_kept_whole():
+    buffer = BoundedBuffer(16)
+    buffer.feed(b"hello ")
+    buffer.feed(b"world")
+
+    assert buffer.text() == "hello world"
+    assert buffer.overflowed is False
+    assert "output_truncated" not in output_fields(buffer, BoundedBuffer(16))
+
+
+def test_large_output_keeps_head_and_tail():
+    buffer = BoundedBuffer(10)
+    for index in range(1000):
+        buffer.feed(f"{index:04d}".encode())
+
+    assert buffer.total == 4000
+    assert buffer.omitted == 3990
+    assert buffer.text() == "00000\n...[3990 bytes of output omitted]...\n80999"
+    assert output_fields(buffer, BoundedBuffer(10))["output_truncated"]["stdout_omitted"] == 3990
+
+
+def test_single_huge_chunk_is_bounded():
+    buffer = BoundedBuffer(8)
+    buffer.feed(b"a" * 4 + b"b" * 10000 + b"c" * 4)
+
+    assert buffer.text().startswith("aaaa\n")
+    assert buffer.text().endswith("\ncccc")
+    assert len(buffer._tail) <= 8
+
+
+def test_read_bounded_file_skips_the_middle(tmp_path):
+    path = tmp_path / "stdout"
+    path.write_bytes(b"head" + b"x" * 100000 + b"tail")
+
+    buffer = read_bounded_file(path, 8)
+
+    assert buffer.total == 100008
+    assert buffer.text() == "head\n...[100000 bytes of output omitted]...\ntail"
+    assert read_bounded_file(tmp_path / "missing", 8).text() == ""
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from skills_runner import payload
+from skills_runner.models import Message
+from skills_runner.payload import EncodedMessages, build_chat_body, dumps, encode_tools
+
+TOOLS = [{"type": "function", "function": {"name": "list_skills", "parameters": {}}}]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(payload, "orjson", None)
+    elif payload.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_body_matches_plain_json_encoding(backend):
+    messages = [{"role": "user", "content": "héllo \"quoted\""}]
+
+    body = json.loads(build_chat_body("gpt-4", messages, TOOLS, stream=True))
+
+    assert body == {
+        "model": "gpt-4",
+        "messages": messages,
+        "tools": TOOLS,
+        "tool_choice": "auto",
+        "stream": True,
+    }
+
+
+def test_body_uses_precomputed_fragments():
+    messages = EncodedMessages([{"role": "user", "content": "hi"}], [b'{"role":"user","content":"cached"}'])
+
+    body = json.loads(build_chat_body("gpt-4", messages, []))
+
+    assert body["messages"] == [{"role": "user", "content": "cached"}]
+
+
+def test_tools_are_encoded_once(monkeypatch):
+    tools = [dict(tool) for tool in TOOLS]
+    first = encode_tools(tools)
+    monkeypatch.setattr(payload, "dumps", lambda value: pytest.fail("tools encoded again"))
+
+    assert encode_tools(tools) is first
+
+
+def test_message_encoding_is_cached_until_invalidated():
+    message = Message(role="tool", content="a", tool_call_id="1")
+    first = message.encoded()
+
+    assert message.encoded() is first
+    message.content = "b"
+    message.invalidate()
+    assert json.loads(message.encoded())["content"] == "b"
+
+
+def test_dumps_falls_back_for_values_orjson_rejects():
+    assert json.loads(dumps({"big": 2**70})) == {"big": 2**70}
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from skills_runner.pending_store import MemoryPendingStore, SqlitePendingStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(ttl_seconds=60, max_entries=0):
+        if request.param == "memory":
+            store = MemoryPendingStore(ttl_seconds, max_entries)
+        else:
+            store = SqlitePendingStore(tmp_path / "pending.db", ttl_seconds, max_entries)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_token_is_taken_once(make_store):
+    store = make_store()
+    store.put("abc", {"skill_name": "calc"})
+
+    assert store.take("abc") == {"skill_name": "calc"}
+    assert store.take("abc") is None
+
+
+def test_expired_entries_are_not_returned_and_get_purged(make_store):
+    store = make_store(ttl_seconds=0)
+    store.put("old", {"skill_name": "calc"})
+    time.sleep(0.01)
+
+    assert store.purge_expired() == 1
+    store.put("older", {"skill_name": "calc"})
+    time.sleep(0.01)
+    assert store.take("older") is None
+
+
+def test_oldest_entries_are_evicted_beyond_the_limit(make_store):
+    store = make_store(max_entries=2)
+    for token in ("a", "b", "c"):
+        store.put(token, {"skill_name": token})
+        time.sleep(0.001)
+
+    assert store.take("a") is None
+    assert store.take("c") == {"skill_name": "c"}
+
+
+def test_sqlite_store_is_shared_between_processes(tmp_path):
+    proposer = SqlitePendingStore(tmp_path / "pending.db")
+    confirmer = SqlitePendingStore(tmp_path / "pending.db")
+    proposer.put("abc", {"skill_name": "calc"})
+
+    assert confirmer.take("abc") == {"skill_name": "calc"}
+    assert proposer.take("abc") is None
+    proposer.close()
+    confirmer.close()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from skills_runner.provisioning import (
+    TEMPLATE_MARKER,
+    ProvisionReport,
+    configure_provisioning,
+    ensure_template,
+    provision_venv,
+    provisioning_settings,
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="venv templates are POSIX-only")
+
+
+@pytest.fixture(scope="module")
+def template(tmp_path_factory):
+    settings = provisioning_settings()
+    saved = (settings.template_path, settings.wheelhouse, settings.offline, settings.pip_timeout_seconds)
+    root = tmp_path_factory.mktemp("provisioning")
+    configure_provisioning(root / "template", root / "wheelhouse", True, 120)
+    yield ensure_template()
+    configure_provisioning(*saved)
+
+
+def test_clone_is_a_working_venv_of_its_own(template, tmp_path):
+    report = provision_venv(tmp_path / "venv")
+
+    assert report.venv_created is True
+    assert report.method in ("reflink", "hardlink", "copy")
+    assert set(report.timings) == {"prepare_template", "create_venv"}
+    assert not (tmp_path / "venv" / TEMPLATE_MARKER).exists()
+    proc = subprocess.run(
+        [str(tmp_path / "venv" / "bin" / "pip"), "--version"], capture_output=True, text=True, timeout=60
+    )
+    assert proc.returncode == 0
+    assert str(tmp_path / "venv") in proc.stdout
+
+
+def test_clone_shares_unchanged_files_with_template(template, tmp_path):
+    report = provision_venv(tmp_path / "venv")
+
+    site = next((tmp_path / "venv" / "lib").glob("python*/site-packages"))
+    pip_init = site / "pip" / "__init__.py"
+    if report.method == "hardlink":
+        assert os.stat(pip_init).st_ino == os.stat(template / pip_init.relative_to(tmp_path / "venv")).st_ino
+    assert str(template) not in (tmp_path / "venv" / "bin" / "activate").read_text()
+
+
+def test_offline_install_with_missing_wheels_reports_failure(template, tmp_path):
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("surely-not-in-the-wheelhouse==1.0\n")
+
+    report = provision_venv(tmp_path / "venv", requirements, ProvisionReport())
+
+    assert report.venv_created is True
+    assert report.requirements_installed is False
+    assert report.error == "pip install failed"
+    assert "install_requirements" in report.timings
@@ -0,0 +1,104 @@
+import sys
+import threading
+
+import pytest
+
+from skills_runner.exceptions import ProvisioningBusyError
+from skills_runner.provisioning import ProvisionReport, _pip
+from skills_runner.provisioning_jobs import JobSettings, ProvisioningJobs
+from skills_runner.skills_tool import create_skill, list_skills, start_create_skill
+
+
+def _wait_finished(jobs, job_id):
+    job = jobs.get(job_id)
+    for _ in range(200):
+        if job.finished is not None:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_job_streams_every_event_until_it_finishes():
+    jobs = ProvisioningJobs(JobSettings(workers=1))
+    release = threading.Event()
+
+    def work(job):
+        with ProvisionReport(listener=job.emit).step("create_venv"):
+            release.wait(5)
+        return {"success": True}
+
+    job = jobs.submit("calc", work)
+    seen = []
+    async for index, event in job.aevents():
+        seen.append((index, event["type"], event.get("status") or event.get("phase")))
+        if event.get("phase") == "start":
+            release.set()
+
+    assert [entry[0] for entry in seen] == list(range(len(seen)))
+    assert [entry[1:] for entry in seen] == [
+        ("status", "queued"),
+        ("status", "running"),
+        ("step", "start"),
+        ("step", "end"),
+        ("status", "succeeded"),
+    ]
+    assert job.snapshot()["result"] == {"success": True}
+    jobs.shutdown()
+
+
+def test_full_queue_is_rejected():
+    jobs = ProvisioningJobs(JobSettings(workers=1, max_queue=1))
+    release = threading.Event()
+    running = jobs.submit("a", lambda job: release.wait(5) and {"success": True})
+    while running.status == "queued":
+        threading.Event().wait(0.01)
+    jobs.submit("b", lambda job: {"success": True})
+
+    with pytest.raises(ProvisioningBusyError):
+        jobs.submit("c", lambda job: {"success": True})
+    release.set()
+    jobs.shutdown()
+
+
+def test_failing_work_marks_job_failed():
+    jobs = ProvisioningJobs(JobSettings(workers=1))
+
+    def work(job):
+        raise OSError("disk full")
+
+    job = _wait_finished(jobs, jobs.submit("calc", work).id)
+
+    assert job.status == "failed"
+    assert job.result == {"error": "Skill creation failed: disk full"}
+    jobs.shutdown()
+
+
+def test_start_create_skill_builds_skill_in_background(tmp_path, monkeypatch):
+    monkeypatch.setattr("skills_runner.skills_tool.provision_venv", lambda *args: args[2])
+    jobs = ProvisioningJobs(JobSettings(workers=1))
+    monkeypatch.setattr("skills_runner.skills_tool.get_provisioning_jobs", lambda: jobs)
+    token = create_skill("fresh", "# Fresh", None, tmp_path)["confirmation_token"]
+
+    started = start_create_skill(token)
+    job = _wait_finished(jobs, started["job_id"])
+
+    assert started["skill_name"] == "fresh"
+    assert job.status == "succeeded"
+    assert job.result["skill_name"] == "fresh"
+    assert list_skills(tmp_path) == {"skills": ["fresh"]}
+    assert start_create_skill(token) == {"error": "Invalid or expired confirmation token"}
+    jobs.shutdown()
+
+
+def test_pip_output_lines_reach_the_listener(tmp_path):
+    events = []
+    report = ProvisionReport(listener=events.append)
+    command = [sys.executable, "-c", "import sys; print('Collecting numpy'); print('oops', file=sys.stderr)"]
+
+    proc = _pip(command, tmp_path, report)
+
+    assert proc.returncode == 0
+    assert proc.stdout == "Collecting numpy\n"
+    assert {"type": "pip", "stream": "stdout", "line": "Collecting numpy"} in events
+    assert {"type": "pip", "stream": "stderr", "line": "oops"} in events
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+
+from skills_runner.exceptions import SchedulerBusyError
+from skills_runner.scheduler import ExecutionScheduler, SchedulerSettings
+
+
+def _scheduler(**overrides):
+    settings = SchedulerSettings(max_concurrent=1, per_session=0, per_skill=0, max_queue=0, queue_timeout_seconds=5)
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return ExecutionScheduler(settings)
+
+
+def test_acquire_reports_queue_wait():
+    scheduler = _scheduler()
+
+    with scheduler.acquire("a", "calc") as slot:
+        assert slot.queue_wait_seconds < 0.1
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    scheduler = _scheduler(max_queue=1)
+    holder = scheduler.acquire("a", "calc")
+    waiting = threading.Thread(target=lambda: scheduler.acquire("b", "calc").release())
+    waiting.start()
+    while not scheduler.saturated():
+        pass
+
+    with pytest.raises(SchedulerBusyError) as excinfo:
+        scheduler.acquire("c", "calc")
+
+    assert excinfo.value.retry_after >= 1
+    holder.release()
+    waiting.join(5)
+
+
+def test_queue_timeout_raises():
+    scheduler = _scheduler(queue_timeout_seconds=1)
+    holder = scheduler.acquire("a", "calc")
+
+    with pytest.raises(SchedulerBusyError, match="within 1 seconds"):
+        scheduler.acquire("b", "calc")
+    holder.release()
+    scheduler.acquire("b", "calc").release()
+
+
+@pytest.mark.asyncio
+async def test_sessions_take_turns():
+    scheduler = _scheduler()
+    holder = scheduler.acquire("busy", "calc")
+    order = []
+
+    async def run(session):
+        slot = await scheduler.aacquire(session, "calc")
+        order.append(session)
+        await asyncio.sleep(0)
+        slot.release()
+
+    # Three requests from one session queue before a single one from another.
+    tasks = [asyncio.create_task(run("busy")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(run("quiet")))
+    await asyncio.sleep(0)
+    holder.release()
+    await asyncio.gather(*tasks)
+
+    assert order.index("quiet") == 1
+
+
+@pytest.mark.asyncio
+async def test_skill_quota_lets_other_skills_through():
+    scheduler = _scheduler(max_concurrent=2, per_skill=1)
+    holder = await scheduler.aacquire("a", "slow")
+
+    blocked = asyncio.create_task(scheduler.aacquire("b", "slow"))
+    other = await asyncio.wait_for(scheduler.aacquire("c", "fast"), 1)
+
+    assert not blocked.done()
+    other.release()
+    holder.release()
+    (await blocked).release()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    scheduler = _scheduler()
+    holder = scheduler.acquire("a", "calc")
+    waiter = asyncio.create_task(scheduler.aacquire("b", "calc"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    holder.release()
+
+    slot = await asyncio.wait_for(scheduler.aacquire("c", "calc"), 1)
+    slot.release()
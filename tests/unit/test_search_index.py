@@ -0,0 +1,58 @@
+from skills_runner.catalog import SkillCatalog
+from skills_runner.search_index import SkillSearchIndex, tokenize
+from skills_runner.skills_tool import search_skills
+
+
+def _make_skill(root, name, doc, **files):
+    skill_dir = root / name
+    skill_dir.mkdir()
+    (skill_dir / "SKILL.md").write_text(doc, encoding="utf-8")
+    for file_name, content in files.items():
+        (skill_dir / file_name.replace("__", ".")).write_text(content, encoding="utf-8")
+    return skill_dir
+
+
+def test_tokenize_splits_on_underscores_and_case():
+    assert tokenize("Currency_Converter: USD->EUR") == ["currency", "converter", "usd", "eur"]
+
+
+def test_search_ranks_relevant_skill_first(tmp_path):
+    _make_skill(tmp_path, "weather", "# Weather\nFetch the forecast and temperature for a city.")
+    _make_skill(tmp_path, "currency", "# Currency\nConvert amounts using exchange rates.")
+    _make_skill(tmp_path, "notes", "# Notes\nStore short notes about the weather sometimes.")
+
+    result = search_skills("temperature forecast", tmp_path)
+
+    assert [hit["skill_name"] for hit in result["results"]][0] == "weather"
+    assert result["results"][0]["snippet"] == "Fetch the forecast and temperature for a city."
+    assert result["results"][0]["file"] == "SKILL.md"
+
+
+def test_search_covers_text_files(tmp_path):
+    _make_skill(tmp_path, "pdf", "# PDF tools", helper__py="def extract_tables(): pass")
+
+    result = search_skills("tables", tmp_path)
+
+    assert result["results"][0]["skill_name"] == "pdf"
+    assert result["results"][0]["file"] == "helper.py"
+
+
+def test_index_updates_incrementally(tmp_path):
+    _make_skill(tmp_path, "alpha", "# Alpha\nfirst")
+    beta = _make_skill(tmp_path, "beta", "# Beta\nsecond")
+    index = SkillSearchIndex(SkillCatalog(tmp_path))
+    assert index.sync() == 2
+
+    (beta / "SKILL.md").write_text("# Beta\nrewritten with zebra", encoding="utf-8")
+    assert index.sync() == 1
+    assert [hit.skill_name for hit in index.search("zebra")] == ["beta"]
+
+    (beta / "SKILL.md").unlink()
+    beta.rmdir()
+    assert index.search("zebra") == []
+    assert len(index) == 1
+
+
+def test_search_skills_rejects_empty_query(tmp_path):
+    assert "error" in search_skills("  ", tmp_path)
+    assert "error" in search_skills("x", tmp_path, limit=0)
@@ -0,0 +1,129 @@
+import asyncio
+from pathlib import Path
+
+from skills_runner.conversation import Conversation
+from skills_runner.llm_client import LLMClient
+from skills_runner.session_store import SessionStore
+
+
+def _build(replies):
+    def build(model):
+        client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name=model)
+        client.chat = lambda messages, tools: {"role": "assistant", "content": replies.pop(0)}
+        return Conversation(client=client, tools=[], skills_folder=Path("."))
+
+    return build
+
+
+def _turn(store, session, text):
+    conversation = session.conversation
+    conversation.journal = []
+    reply = conversation.send(text)
+    store.append(session, conversation.journal)
+    conversation.journal = None
+    return reply
+
+
+def test_session_round_trips_through_sqlite(tmp_path):
+    db_path = tmp_path / "sessions.db"
+    build = _build(["first", "second"])
+    store = SessionStore(db_path)
+
+    conversation = build("gpt-4")
+    conversation.load_messages([{"role": "system", "content": "sys"}])
+    session = store.create("gpt-4", conversation)
+    assert _turn(store, session, "hello") == "first"
+    store.close()
+
+    reopened = SessionStore(db_path)
+    loaded = reopened.get(session.id, build)
+    assert loaded is not None
+    assert loaded.model == "gpt-4"
+    assert [m.content for m in loaded.conversation.messages] == ["sys", "hello", "first"]
+
+    assert _turn(reopened, loaded, "again") == "second"
+    reopened.close()
+
+    roles = [m.role for m in SessionStore(db_path).get(session.id, build).conversation.messages]
+    assert roles == ["system", "user", "assistant", "user", "assistant"]
+
+
+def test_hot_sessions_are_served_from_memory(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db", cache_size=1)
+    build = _build([])
+    first = store.create("gpt-4", build("gpt-4"))
+    store.release(first)
+
+    assert store.get(first.id, build) is first
+    store.release(first)
+
+    second = store.create("gpt-4", build("gpt-4"))
+    store.release(second)
+    reloaded = store.get(first.id, build)
+    store.release(reloaded)
+    assert reloaded is not first
+    assert [m.role for m in reloaded.conversation.messages] == ["system"]
+    assert store.get(second.id, build) is not second
+
+
+def test_sessions_in_use_are_not_evicted(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db", cache_size=1)
+    build = _build(["first"])
+    held = store.create("gpt-4", build("gpt-4"))
+
+    other = store.create("gpt-4", build("gpt-4"))
+    store.release(other)
+    # A second request for the held session shares it instead of loading a copy.
+    assert store.get(held.id, build) is held
+    assert _turn(store, held, "hello") == "first"
+    store.release(held)
+    store.release(held)
+
+    store.release(store.create("gpt-4", build("gpt-4")))
+    reloaded = store.get(held.id, build)
+    assert reloaded is not held
+    assert [m.content for m in reloaded.conversation.messages][-2:] == ["hello", "first"]
+
+
+def test_unknown_and_deleted_sessions(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+    build = _build([])
+    assert store.get("missing", build) is None
+
+    session = store.create("gpt-4", build("gpt-4"))
+    assert store.delete(session.id) is True
+    assert store.get(session.id, build) is None
+    assert store.delete(session.id) is False
+
+
+def test_sessions_created_off_the_loop_get_a_usable_lock(tmp_path):
+    store = SessionStore(tmp_path / "sessions.db")
+
+    async def turn():
+        session = await asyncio.to_thread(store.create, "gpt-4", _build([])("gpt-4"))
+        async with session.lock:
+            return session.lock.locked()
+
+    assert asyncio.run(turn()) is True
+    store.close()
+
+
+def test_routing_note_is_stored_where_it_was_inserted(tmp_path):
+    (tmp_path / "skills" / "weather").mkdir(parents=True)
+    (tmp_path / "skills" / "weather" / "SKILL.md").write_text("# Weather\nFetch the forecast for a city.")
+    store = SessionStore(tmp_path / "sessions.db")
+
+    def build(model):
+        conversation = _build(["sunny"])(model)
+        conversation.skills_folder = tmp_path / "skills"
+        conversation.routing_top_k = 3
+        return conversation
+
+    session = store.create("gpt-4", build("gpt-4"))
+    _turn(store, session, "forecast for Paris?")
+    store.close()
+
+    live = [(m.role, m.content) for m in session.conversation.messages]
+    stored = [(m.role, m.content) for m in SessionStore(tmp_path / "sessions.db").get(session.id, build).conversation.messages]
+    assert stored == live
+    assert [role for role, _ in stored] == ["system", "system", "user", "assistant"]
@@ -0,0 +1,42 @@
+from skills_runner.skill_router import (
+    ROUTING_NOTE_PREFIX,
+    SkillRoute,
+    format_routing_note,
+    route_skills,
+    summarize_documentation,
+)
+
+
+def test_summary_prefers_front_matter_description():
+    doc = "---\nname: weather\ndescription: Forecasts for any city\n---\n# Weather\nLong text"
+
+    assert summarize_documentation(doc) == "Forecasts for any city"
+
+
+def test_summary_falls_back_to_first_prose_line():
+    assert summarize_documentation("# Weather\n\nFetch forecasts.\nMore.") == "Fetch forecasts."
+    assert summarize_documentation("# Only a heading") == "Only a heading"
+
+
+def test_route_skills_returns_top_matches(tmp_path):
+    for name, doc in {
+        "weather": "# Weather\nFetch the forecast for a city.",
+        "currency": "# Currency\nConvert money between currencies.",
+        "notes": "# Notes\nKeep notes.",
+    }.items():
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "SKILL.md").write_text(doc)
+
+    routes = route_skills(tmp_path, "What is the forecast in Paris?", 2)
+
+    assert [route.skill_name for route in routes] == ["weather"]
+    assert routes[0].summary == "Fetch the forecast for a city."
+
+
+def test_format_routing_note():
+    assert format_routing_note([]) is None
+
+    note = format_routing_note([SkillRoute("weather", 1.0, "Forecasts")])
+
+    assert note.startswith(ROUTING_NOTE_PREFIX)
+    assert note.endswith("- weather: Forecasts")
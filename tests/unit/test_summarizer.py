@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from skills_runner.conversation import Conversation
+from skills_runner.llm_client import LLMClient
+from skills_runner.models import Message
+from skills_runner.summarizer import SUMMARY_PREFIX, HistorySummarizer, segment_key
+
+
+def _summary_client(monkeypatch, replies):
+    client = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="cheap-model")
+    calls = []
+
+    def fake_chat(messages, tools):
+        calls.append(messages)
+        return {"role": "assistant", "content": replies.pop(0)}
+
+    monkeypatch.setattr(client, "chat", fake_chat)
+    return client, calls
+
+
+def test_summarize_caches_by_segment_hash(monkeypatch):
+    client, calls = _summary_client(monkeypatch, ["user wants weather"])
+    summarizer = HistorySummarizer(client)
+    segment = [Message(role="user", content="weather in Paris? (unique-1)")]
+
+    assert summarizer.summarize(None, segment) == "user wants weather"
+    assert summarizer.summarize(None, list(segment)) == "user wants weather"
+    assert len(calls) == 1
+    assert calls[0][1]["content"] == "user: weather in Paris? (unique-1)"
+    assert summarizer.cached(segment_key(None, segment)) == "user wants weather"
+
+
+def test_segment_key_depends_on_previous_summary():
+    segment = [Message(role="user", content="hi")]
+
+    assert segment_key(None, segment) != segment_key("earlier", segment)
+
+
+def test_conversation_adopts_background_summary_between_turns(monkeypatch):
+    summary_client, calls = _summary_client(monkeypatch, ["the user counted to ten (unique-2)"])
+    main = LLMClient(api_key="k", api_base_url="https://api.example.com/v1", model_name="main-model")
+    monkeypatch.setattr(main, "chat", lambda messages, tools: {"role": "assistant", "content": "ok"})
+    convo = Conversation(
+        client=main,
+        tools=[],
+        skills_folder=Path("."),
+        context_budget=1000,
+        summarizer=HistorySummarizer(summary_client),
+    )
+    convo.count_tokens = len
+    convo.messages = [Message(role="system", content="S")]
+
+    index = 0
+    while convo._summary_job is None:
+        convo.send(f"message {index} " * 3)
+        index += 1
+    convo._summary_job.result(timeout=5)
+    assert convo._serialize_messages()[1]["content"].startswith("[Context note:")
+    convo.send("next")
+
+    payload = convo._serialize_messages()
+    assert payload[1]["content"] == f"{SUMMARY_PREFIX}\nthe user counted to ten (unique-2)"
+    assert len(calls) == 1
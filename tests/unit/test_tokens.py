@@ -0,0 +1,47 @@
+from skills_runner import tokens
+from skills_runner.models import Message
+from skills_runner.tokens import (
+    context_budget_for,
+    estimate_tokens,
+    get_tokenizer,
+    message_tokens,
+    register_tokenizer,
+)
+
+
+def test_estimate_tokens_counts_ascii_and_other_characters():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("日本語") == 3
+
+
+def test_registered_tokenizer_wins_by_longest_prefix(monkeypatch):
+    monkeypatch.setattr(tokens, "_tokenizers", {})
+    register_tokenizer("local", lambda text: 1)
+    register_tokenizer("local-big", lambda text: 2)
+
+    assert get_tokenizer("local-big-v2")("anything") == 2
+    assert get_tokenizer("local-small")("anything") == 1
+
+
+def test_message_tokens_is_cached():
+    calls = []
+
+    def counter(text):
+        calls.append(text)
+        return len(text)
+
+    message = Message(role="tool", content="abc", name="get_skill")
+    first = message_tokens(message, counter)
+
+    assert first == tokens.MESSAGE_OVERHEAD_TOKENS + 3 + 9
+    assert message_tokens(message, counter) == first
+    assert len(calls) == 2
+
+
+def test_context_budget_for_prefers_exact_then_prefix():
+    per_model = {"gpt-4": 8000, "gpt-4o": 128000}
+
+    assert context_budget_for("gpt-4", 1000, per_model) == 8000
+    assert context_budget_for("gpt-4o-mini", 1000, per_model) == 128000
+    assert context_budget_for("llama", 1000, per_model) == 1000
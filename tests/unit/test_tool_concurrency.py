@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+from skills_runner.tool_concurrency import ToolSlots, configure_tool_concurrency, plan_tool_batches, tool_limit, tool_slots
+
+
+def _call(name):
+    return {"id": name, "function": {"name": name, "arguments": "{}"}}
+
+
+def test_plan_tool_batches_isolates_mutating_tools():
+    calls = [
+        _call("get_skill"),
+        _call("read_files_in_skill"),
+        _call("write_file_in_skill"),
+        _call("run_python_script"),
+        _call("list_skills"),
+    ]
+
+    assert plan_tool_batches(calls) == [[0, 1], [2], [3, 4]]
+
+
+def test_tool_limits_respect_configuration():
+    configure_tool_concurrency(4, {"read_files_in_skill": 2, "run_python_script": 10})
+    try:
+        assert tool_limit("read_files_in_skill") == 2
+        assert tool_limit("run_python_script") == 4
+        assert tool_limit("create_skill") == 1
+    finally:
+        configure_tool_concurrency(8, {})
+
+
+def test_single_worker_runs_calls_one_by_one():
+    configure_tool_concurrency(1, {})
+    try:
+        assert plan_tool_batches([_call("get_skill"), _call("list_skills")]) == [[0], [1]]
+    finally:
+        configure_tool_concurrency(8, {})
+
+
+def test_tool_slots_are_shared_until_reconfigured():
+    assert tool_slots("get_skill") is tool_slots("get_skill")
+    previous = tool_slots("get_skill")
+    configure_tool_concurrency(8, {})
+
+    assert tool_slots("get_skill") is not previous
+
+
+def test_tool_slots_hand_a_slot_from_a_task_to_a_thread():
+    slots = ToolSlots(1)
+    order = []
+
+    def thread_call():
+        with slots:
+            order.append("thread")
+
+    async def main():
+        async with slots:
+            waiter = threading.Thread(target=thread_call)
+            waiter.start()
+            await asyncio.sleep(0.1)
+            order.append("task")
+        await asyncio.to_thread(waiter.join, 5)
+
+    asyncio.run(main())
+    assert order == ["task", "thread"]
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    slots = ToolSlots(1)
+
+    async def main():
+        async with slots:
+            waiter = asyncio.ensure_future(slots.__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        async with slots:
+            return "free"
+
+    assert asyncio.run(main()) == "free"
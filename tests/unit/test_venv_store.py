@@ -0,0 +1,105 @@
+import shutil
+import threading
+
+import pytest
+
+from skills_runner import venv_store
+from skills_runner.executor import find_python_executable
+from skills_runner.provisioning import ProvisionReport
+from skills_runner.venv_store import VenvStore, normalize_requirements, requirements_key
+
+
+@pytest.fixture
+def provisioned(monkeypatch):
+    """Replace real venv creation with an empty interpreter file; records each target."""
+    targets = []
+
+    def fake_provision(target, requirements=None, report=None):
+        targets.append(target)
+        (target / "bin").mkdir(parents=True)
+        (target / "bin" / "python").write_text("", encoding="utf-8")
+        report.method = "copy"
+        report.venv_created = True
+        report.requirements_installed = requirements is not None
+        return report
+
+    monkeypatch.setattr(venv_store, "provision_venv", fake_provision)
+    return targets
+
+
+def test_requirements_key_ignores_order_comments_and_name_spelling():
+    first = "requests>=2.0\n# http\nPyYAML==6.0\n"
+    second = "pyyaml == 6.0  # config\n\nRequests>=2.0"
+
+    assert normalize_requirements(first) == ["pyyaml==6.0", "requests>=2.0"]
+    assert requirements_key(first) == requirements_key(second)
+    assert requirements_key(first) != requirements_key("requests>=2.1")
+
+
+def test_skills_with_same_requirements_share_one_venv(provisioned, tmp_path):
+    store = VenvStore(tmp_path / "store")
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+
+    created = store.attach(first, "numpy\n", ProvisionReport())
+    reused = store.attach(second, "NumPy", ProvisionReport())
+
+    key = requirements_key("numpy")
+    assert len(provisioned) == 1
+    assert created.method == "copy"
+    assert reused.method == "shared"
+    assert reused.venv_created is True
+    assert store.references(key) == 2
+    assert (second / venv_store.VENV_REF_FILE).read_text(encoding="utf-8").strip() == key
+    store.close()
+
+
+def test_find_python_executable_resolves_through_store(provisioned, tmp_path, monkeypatch):
+    store = VenvStore(tmp_path / "store")
+    skill = tmp_path / "calc"
+    skill.mkdir()
+    store.attach(skill, "", ProvisionReport())
+
+    monkeypatch.setattr(venv_store, "_store", store)
+
+    assert find_python_executable(skill) == tmp_path / "store" / requirements_key("") / "bin" / "python"
+    store.close()
+
+
+def test_collect_garbage_removes_unreferenced_venvs(provisioned, tmp_path):
+    store = VenvStore(tmp_path / "store")
+    kept, dropped = tmp_path / "kept", tmp_path / "dropped"
+    kept.mkdir()
+    dropped.mkdir()
+    store.attach(kept, "numpy", ProvisionReport())
+    store.attach(dropped, "pandas", ProvisionReport())
+
+    shutil.rmtree(dropped)
+    removed = store.collect_garbage()
+
+    assert removed == [requirements_key("pandas")]
+    assert not (tmp_path / "store" / requirements_key("pandas")).exists()
+    assert store.python_for(requirements_key("numpy")) is not None
+    assert store.python_for(requirements_key("pandas")) is None
+    store.close()
+
+
+@pytest.mark.skipif(venv_store.fcntl is None, reason="key locks need fcntl")
+def test_key_lock_waiter_relocks_when_the_lock_file_is_removed(tmp_path):
+    store = VenvStore(tmp_path / "store")
+    lock_path = tmp_path / "store" / "abc.lock"
+    seen = []
+
+    def waiter():
+        with store._key_lock("abc"):
+            seen.append(lock_path.exists())
+
+    with store._key_lock("abc"):
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        thread.join(0.2)
+        lock_path.unlink()
+    thread.join(5)
+
+    assert seen == [True]
@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from skills_runner.resource_limits import configure_resource_limits
+from skills_runner.worker_pool import PoolSettings, WorkerPool
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="worker pools are POSIX-only")
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(Path(sys.executable), PoolSettings(size=1, idle_seconds=60, max_jobs=2))
+    yield pool
+    pool.close()
+
+
+def test_pool_runs_script_and_captures_output(pool, tmp_path):
+    result = pool.run("import sys\nprint('hi')\nprint('oops', file=sys.stderr)", tmp_path, timeout=10)
+
+    usage = result.pop("usage")
+    assert result == {"stdout": "hi\n", "stderr": "oops\n", "returncode": 0, "timed_out": False}
+    assert set(usage) == {"user_cpu_seconds", "system_cpu_seconds", "max_rss_kb", "wall_seconds"}
+
+
+def test_pool_uses_clean_namespace_per_script(pool, tmp_path):
+    pool.run("leaked = 1", tmp_path, timeout=10)
+
+    result = pool.run("print('leaked' in globals())", tmp_path, timeout=10)
+
+    assert result["stdout"] == "False\n"
+
+
+def test_pool_reports_exit_codes_and_tracebacks(pool, tmp_path):
+    exited = pool.run("import sys\nsys.exit(3)", tmp_path, timeout=10)
+    raised = pool.run("raise ValueError('bad')", tmp_path, timeout=10)
+
+    assert exited["returncode"] == 3
+    assert raised["returncode"] == 1
+    assert "ValueError: bad" in raised["stderr"]
+
+
+def test_pool_recycles_worker_after_max_jobs(pool, tmp_path):
+    pids = [pool.run("import os\nprint(os.getpid())", tmp_path, timeout=10)["stdout"] for _ in range(3)]
+
+    assert pids[0] == pids[1]
+    assert pids[2] != pids[1]
+
+
+def test_pool_times_out_and_replaces_worker(pool, tmp_path):
+    result = pool.run("import time\nprint('started', flush=True)\ntime.sleep(5)", tmp_path, timeout=1)
+
+    assert result["timed_out"] is True
+    assert result["stdout"] == "started\n"
+    assert pool.run("print('ok')", tmp_path, timeout=10)["stdout"] == "ok\n"
+
+
+def test_evict_idle_stops_stale_workers(tmp_path):
+    pool = WorkerPool(Path(sys.executable), PoolSettings(size=1, idle_seconds=0, max_jobs=10))
+    pool.run("pass", tmp_path, timeout=10)
+
+    assert pool.evict_idle() == 1
+    pool.close()
+
+
+def test_pool_kills_script_on_output_overflow(pool, tmp_path):
+    from skills_runner.output_capture import capture_settings, configure_output_capture
+
+    settings = capture_settings()
+    saved = (settings.max_bytes, settings.kill_on_overflow)
+    configure_output_capture(1000, True)
+    try:
+        result = pool.run("while True:\n    print('spam' * 100, flush=True)", tmp_path, timeout=20)
+    finally:
+        configure_output_capture(*saved)
+
+    assert "exceeded 1000 bytes" in result["error"]
+    assert result["output_truncated"]["stdout_omitted"] > 0
+    assert pool.run("print('ok')", tmp_path, timeout=10)["stdout"] == "ok\n"
+
+
+def test_pool_caps_output_files_without_kill_on_overflow(pool, tmp_path):
+    from skills_runner.output_capture import OUTPUT_FILE_CAP_FACTOR, capture_settings, configure_output_capture
+
+    settings = capture_settings()
+    saved = (settings.max_bytes, settings.kill_on_overflow)
+    configure_output_capture(1000, False)
+    try:
+        result = pool.run("while True:\n    print('spam' * 100, flush=True)", tmp_path, timeout=20)
+    finally:
+        configure_output_capture(*saved)
+
+    assert f"exceeded {1000 * OUTPUT_FILE_CAP_FACTOR} bytes" in result["error"]
+    assert result["timed_out"] is False
+
+
+def test_pool_forwards_output_while_running(pool, tmp_path):
+    chunks = []
+    script = "import time\nprint('first')\ntime.sleep(0.5)\nprint('second')"
+
+    result = pool.run(script, tmp_path, timeout=10, on_output=lambda stream, text: chunks.append((stream, text)))
+
+    assert result["stdout"] == "first\nsecond\n"
+    assert "".join(text for stream, text in chunks if stream == "stdout") == "first\nsecond\n"
+    assert chunks[0] == ("stdout", "first\n")
+
+
+def test_pool_cpu_limit_counts_from_job_start(pool, tmp_path):
+    burn = "import time\nend = time.process_time() + {}\nwhile time.process_time() < end: pass"
+    # The worker has used more CPU than the limit before the limited jobs start.
+    pool.run(burn.format(1.5), tmp_path, timeout=20)
+    configure_resource_limits(cpu_seconds=1, memory_mb=0, open_files=0, processes=0)
+    try:
+        within = pool.run(burn.format(0.5), tmp_path, timeout=20)
+        killed = pool.run("while True:\n    pass", tmp_path, timeout=20)
+    finally:
+        configure_resource_limits(cpu_seconds=0, memory_mb=0, open_files=0, processes=0)
+
+    assert within["returncode"] == 0
+    assert killed["error"] == "Script exceeded the CPU time limit of 1 seconds"
+
+
+def test_pool_wait_counts_against_the_script_timeout(pool, tmp_path):
+    busy = threading.Thread(target=pool.run, args=("import time\ntime.sleep(3)", tmp_path, 10))
+    busy.start()
+    time.sleep(0.5)
+    started = time.monotonic()
+
+    result = pool.run("print('late')", tmp_path, timeout=1)
+
+    assert time.monotonic() - started < 2
+    assert result["timed_out"] is True
+    assert "waiting for a pooled worker" in result["error"]
+    busy.join()